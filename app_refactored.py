@@ -13,7 +13,8 @@ from flask_login import LoginManager, login_user, login_required, logout_user, c
 from firebase_config import User, firebase_auth, db
 
 # Import our data loader and helper functions
-from data_loader import build_steam_data_index, load_summaries, get_game_data_by_appid
+from data_loader import build_steam_data_index, build_game_attributes, build_summaries_db
+from json_provider import OrjsonProvider
 from game_chatbot import semantic_search_query
 from llm_processor import OPENROUTER_API_KEY
 
@@ -24,6 +25,7 @@ from blueprints.lists import lists_bp
 from blueprints.games import games_bp
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)  # Faster serialization for the JSON API endpoints
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "your-secret-key")  # Required for session support
 
 # Initialize LoginManager
@@ -70,14 +72,23 @@ ANALYSIS_CACHE_FILE = "data/analysis_cache.jsonl"
 # TESTING flag for development
 TESTING_ENABLE_SYNTHETIC_SUMMARIES = True
 
-# Build the index map once at startup and store in app.config
-# so it can be accessed by blueprints
 logging.basicConfig(level=logging.INFO)
-index_map = build_steam_data_index(STEAM_DATA_FILE)
-app.config['index_map'] = index_map  # Store in app config for blueprint access
 app.config['STEAM_DATA_FILE'] = STEAM_DATA_FILE  # Store file paths in config
 app.config['SUMMARIES_FILE'] = SUMMARIES_FILE
 app.config['ANALYSIS_CACHE_FILE'] = ANALYSIS_CACHE_FILE
+app.config['TESTING_ENABLE_SYNTHETIC_SUMMARIES'] = TESTING_ENABLE_SYNTHETIC_SUMMARIES  # Synthetic rerank summaries
+
+# Build the index map and search data once and store them in app.config so they can be
+# accessed by blueprints. This runs at startup, before the server takes requests, rather than
+# at import: the data loader starts worker processes, which re-import the main script when spawned
+def load_game_data():
+    """
+    Build the game index, summaries DB and filter attributes. Call once before serving.
+    """
+    index_map = build_steam_data_index(STEAM_DATA_FILE)
+    build_summaries_db(SUMMARIES_FILE)  # So the first search doesn't have to convert the summaries
+    app.config['index_map'] = index_map  # Store in app config for blueprint access
+    app.config['game_attributes'] = build_game_attributes(STEAM_DATA_FILE, index_map)  # Columnar search filter fields
 
 # Register blueprints
 app.register_blueprint(search_bp, url_prefix='')
@@ -100,4 +111,8 @@ def server_error(e):
     return render_template('error.html', message="Internal server error"), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000))) 
\ No newline at end of file
+    debug = True
+    # The reloader serves from a child process, so build the data there rather than in the watcher
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        load_game_data()
+    app.run(debug=debug, host='0.0.0.0', port=int(os.environ.get('PORT', 5000))) 
\ No newline at end of file
@@ -1,18 +1,58 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app, g
 from flask_login import login_required, current_user
 import json
+import hashlib
 from data_loader import get_game_data_by_appid
+from google.api_core.exceptions import GoogleAPIError
+from firebase_config import LIST_METADATA_FIELDS, MAX_LIST_METADATA_LENGTH
 
 # Create the blueprint
 lists_bp = Blueprint('lists', __name__, template_folder='templates')
 
+# Failures the list routes report as {"success": false} instead of raising: Firestore API
+# errors, reading the game data file, and AttributeError/TypeError from a JSON body that
+# isn't an object
+LIST_ROUTE_ERRORS = (GoogleAPIError, OSError, AttributeError, TypeError)
+
+def _saved_game_fields(appid):
+    """
+    Fields stored with a saved game. get_game_data_by_appid keeps recently read
+    games in data_loader's LRU cache, so repeated saves don't re-read the file.
+    """
+    STEAM_DATA_FILE = current_app.config.get('STEAM_DATA_FILE', "data/steam_games_data.jsonl")
+    index_map = current_app.config.get('index_map')
+    
+    game_data = get_game_data_by_appid(appid, STEAM_DATA_FILE, index_map)
+    if not game_data:
+        return None
+    return {
+        "name": game_data.get("name", "Unknown Game"),
+        "header_image": game_data.get("header_image", ""),
+        "short_description": game_data.get("short_description", "")
+    }
+
+def get_user_lists():
+    """
+    Get the current user's lists, querying Firestore at most once per request
+    """
+    if 'user_lists' not in g:
+        g.user_lists = current_user.get_lists()
+    return g.user_lists
+
+@lists_bp.teardown_request
+def _drop_user_lists(exc):
+    """
+    Forget the memoized lists, in case the app context outlives this request
+    """
+    g.pop('user_lists', None)
+
 @lists_bp.route('/lists')
 @login_required
 def user_lists():
     """
     Display the user's game lists
     """
-    user_lists = current_user.get_lists()
+    user_lists = get_user_lists()
     return render_template('lists.html', lists=user_lists)
 
 @lists_bp.route('/list/<list_id>')
@@ -21,20 +61,11 @@ def view_list(list_id):
     """
     View a specific list's details
     """
-    # Get the list info
-    user_lists = current_user.get_lists()
-    list_info = None
-    for lst in user_lists:
-        if lst['id'] == list_id:
-            list_info = lst
-            break
-            
+    # Get the list info and its games together
+    list_info, games = current_user.get_list_with_games(list_id)
     if not list_info:
         flash('List not found', 'error')
         return redirect(url_for('lists.user_lists'))
-        
-    # Get games in the list
-    games = current_user.get_games_in_list(list_id)
     
     return render_template(
         'list_detail.html', 
@@ -49,10 +80,13 @@ def create_list():
     """
     Create a new list
     """
+    # Every outcome returns to the lists page
+    lists_url = url_for('lists.user_lists')
+    
     list_name = request.form.get('list_name', '').strip()
     if not list_name:
         flash('List name cannot be empty', 'error')
-        return redirect(url_for('lists.user_lists'))
+        return redirect(lists_url)
         
     list_id = current_user.create_list(list_name)
     if list_id:
@@ -60,7 +94,15 @@ def create_list():
     else:
         flash('Failed to create list', 'error')
         
-    return redirect(url_for('lists.user_lists'))
+    return redirect(lists_url)
+
+def _game_lists_etag(appid, user_lists):
+    """
+    ETag for a game's list memberships. Adding or removing games and editing a list
+    all bump its updated_at, so the user's list ids and timestamps identify the response.
+    """
+    versions = "|".join(f"{lst['id']}@{lst.get('updated_at')}" for lst in user_lists)
+    return hashlib.sha1(f"{current_user.id}:{appid}:{versions}".encode("utf-8")).hexdigest()
 
 @lists_bp.route('/api/game_lists/<appid>')
 @login_required
@@ -68,42 +110,45 @@ def get_game_lists(appid):
     """
     Get all lists for a specific game
     """
-    game_lists = current_user.get_game_lists(appid)
-    all_lists = current_user.get_lists()
+    # Read the lists fresh: the cached copy can miss another worker's save, and a stale
+    # updated_at would let the ETag answer 304 with out-of-date memberships
+    all_lists = current_user.get_lists(fresh=True)
     
-    response = {
-        'in_lists': game_lists,
-        'all_lists': all_lists
-    }
+    # Skip the membership lookup if the client's copy is still current
+    etag = _game_lists_etag(appid, all_lists)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        game_lists = current_user.get_game_lists(appid, lists=all_lists)
+        response = jsonify({
+            'in_lists': game_lists,
+            'all_lists': all_lists
+        })
     
-    return jsonify(response)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
-@lists_bp.route('/save_game/<appid>', methods=['POST'])
+@lists_bp.route('/save_game/<int:appid>', methods=['POST'])
 @login_required
 def save_game(appid):
     """
     Save a game to one or more lists
     """
     try:
-        # Get the target list IDs
-        if request.is_json:
-            data = request.get_json()
-            list_ids = data.get('list_ids', [])
-        else:
-            list_ids = request.form.getlist('list_ids')
+        # Get the target list IDs from a JSON body or, failing that, form data
+        data = request.get_json(silent=True) or {}
+        list_ids = data.get('list_ids') or request.form.getlist('list_ids')
             
+        # Nothing to save; answer before touching the game data or Firestore
         if not list_ids:
             return jsonify({
                 "success": False,
                 "message": "No lists selected"
-            })
+            }), 400
             
         # Get game data
-        appid = int(appid)
-        STEAM_DATA_FILE = current_app.config.get('STEAM_DATA_FILE', "data/steam_games_data.jsonl")
-        index_map = current_app.config.get('index_map')
-        
-        game_data = get_game_data_by_appid(appid, STEAM_DATA_FILE, index_map)
+        game_data = _saved_game_fields(appid)
         if not game_data:
             return jsonify({
                 "success": False,
@@ -111,18 +156,10 @@ def save_game(appid):
             })
             
         # Prepare game data for storage
-        game_to_save = {
-            "appid": appid,
-            "name": game_data.get("name", "Unknown Game"),
-            "header_image": game_data.get("header_image", ""),
-            "short_description": game_data.get("short_description", "")
-        }
+        game_to_save = {"appid": appid, **game_data}
         
-        # Save to each selected list
-        success_count = 0
-        for list_id in list_ids:
-            if current_user.add_game_to_list(list_id, game_to_save):
-                success_count += 1
+        # Save to all selected lists
+        success_count = current_user.add_game_to_lists(list_ids, game_to_save)
                 
         if success_count == 0:
             return jsonify({
@@ -140,22 +177,20 @@ def save_game(appid):
                 "message": "Game saved successfully to all selected lists"
             })
             
-    except Exception as e:
+    except LIST_ROUTE_ERRORS as e:
         current_app.logger.error(f"Error saving game: {e}", exc_info=True)
         return jsonify({
             "success": False,
             "message": f"Error saving game: {str(e)}"
         })
 
-@lists_bp.route('/remove_game/<list_id>/<appid>', methods=['POST'])
+@lists_bp.route('/remove_game/<list_id>/<int:appid>', methods=['POST'])
 @login_required
 def remove_game(list_id, appid):
     """
     Remove a game from a list
     """
     try:
-        appid = int(appid)
-        
         if current_user.remove_game_from_list(list_id, appid):
             return jsonify({
                 "success": True,
@@ -166,7 +201,7 @@ def remove_game(list_id, appid):
                 "success": False,
                 "message": "Failed to remove game from list"
             })
-    except Exception as e:
+    except LIST_ROUTE_ERRORS as e:
         current_app.logger.error(f"Error removing game: {e}", exc_info=True)
         return jsonify({
             "success": False,
@@ -180,7 +215,7 @@ def update_list(list_id):
     Update list metadata (name, description, notes)
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         field = data.get('field')
         value = data.get('value')
         
@@ -190,12 +225,19 @@ def update_list(list_id):
                 "message": "Missing field or value"
             })
             
-        if field not in ['name', 'description', 'notes']:
+        if field not in LIST_METADATA_FIELDS:
             return jsonify({
                 "success": False,
                 "message": f"Invalid field: {field}"
             })
             
+        # Turn away non-text and oversized values before they reach Firestore
+        if not isinstance(value, str) or len(value) > MAX_LIST_METADATA_LENGTH:
+            return jsonify({
+                "success": False,
+                "message": f"Invalid value for {field}"
+            }), 400
+            
         if current_user.update_list_metadata(list_id, field, value):
             return jsonify({
                 "success": True,
@@ -207,13 +249,26 @@ def update_list(list_id):
                 "message": f"Failed to update list {field}"
             })
             
-    except Exception as e:
+    except LIST_ROUTE_ERRORS as e:
         current_app.logger.error(f"Error updating list: {e}", exc_info=True)
         return jsonify({
             "success": False,
             "message": f"Error updating list: {str(e)}"
         })
 
+def _game_from_result(game):
+    """
+    Build the stored list entry for a search result, reading each field once
+    """
+    media = game.get("media")
+    summary = game.get("ai_summary") or ""
+    return {
+        "appid": game.get("appid"),
+        "name": game.get("name", "Unknown Game"),
+        "header_image": media[0] if media else "",
+        "short_description": summary[:200] + "..." if len(summary) > 200 else summary
+    }
+
 @lists_bp.route('/api/save_results_as_list', methods=['POST'])
 @login_required
 def save_results_as_list():
@@ -221,7 +276,7 @@ def save_results_as_list():
     Save search results as a new list
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         list_name = data.get('list_name', '').strip()
         results = data.get('results', [])
         
@@ -245,23 +300,17 @@ def save_results_as_list():
                 "message": "Failed to create list"
             })
             
-        # Add each game to the list
-        for game in results:
-            game_to_save = {
-                "appid": game.get("appid"),
-                "name": game.get("name", "Unknown Game"),
-                "header_image": game.get("media", [])[0] if game.get("media") else "",
-                "short_description": game.get("ai_summary", "")[:200] + "..." if len(game.get("ai_summary", "")) > 200 else game.get("ai_summary", "")
-            }
-            current_user.add_game_to_list(list_id, game_to_save)
+        # Add the games to the list
+        games_to_save = [_game_from_result(game) for game in results]
+        saved_count = current_user.add_games_to_list(list_id, games_to_save)
             
         return jsonify({
             "success": True,
-            "message": f"Created list '{list_name}' with {len(results)} games",
+            "message": f"Created list '{list_name}' with {saved_count} games",
             "list_id": list_id
         })
             
-    except Exception as e:
+    except LIST_ROUTE_ERRORS as e:
         current_app.logger.error(f"Error creating list from results: {e}", exc_info=True)
         return jsonify({
             "success": False,
@@ -1,21 +1,74 @@
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, current_app
+from flask import (Blueprint, render_template, stream_template, request, jsonify, session, redirect,
+                   url_for, current_app, g)
 import time
 import uuid
-from threading import Thread
+import heapq
+from threading import Thread, Lock
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 
 # Import necessary modules for search functionality
-from data_loader import get_game_data_by_appid, load_summaries
-from game_chatbot import semantic_search_query
+from data_loader import (get_game_data_by_appid, get_games_data_by_appids, get_summaries_for_appids,
+                         PLATFORM_BITS)
+from game_chatbot import semantic_search_query, embed_query, embed_queries
 from llm_processor import (rerank_search_results, optimize_search_query, 
                           deep_search_generate_variations, deep_search_generate_summary)
 
 # Create the blueprint
 search_bp = Blueprint('search', __name__, template_folder='templates')
 
-# Global search state variables 
-# These will need to be moved to a proper background task queue in later refactoring
-regular_search_status = {
+class SearchStatusStore:
+    """
+    Thread-safe progress of background searches, keyed by session id.
+    Background tasks write through update(); request handlers read copies through snapshot().
+    """
+    MAX_SESSIONS = 100  # Oldest sessions are forgotten past this
+
+    def __init__(self, defaults):
+        self._defaults = defaults
+        self._statuses = OrderedDict()
+        self._lock = Lock()
+
+    def create(self, **fields):
+        """Start tracking a new session and return its id"""
+        session_id = str(uuid.uuid4())
+        with self._lock:
+            self._statuses[session_id] = {**self._defaults, **fields, "session_id": session_id}
+            while len(self._statuses) > self.MAX_SESSIONS:
+                self._statuses.popitem(last=False)
+        return session_id
+
+    def update(self, session_id, **fields):
+        with self._lock:
+            status = self._statuses.get(session_id)
+            if status is not None:
+                status.update(fields)
+
+    def snapshot(self, session_id=None):
+        """
+        Copy of a session's status, or of the most recent session if no id is given.
+        Lists such as results are replaced rather than mutated, so sharing them is safe.
+        """
+        with self._lock:
+            if session_id is None:
+                session_id = next(reversed(self._statuses), None)
+            status = self._statuses.get(session_id)
+            return dict(status) if status is not None else None
+
+    def find(self, predicate):
+        """Copy of the most recent status matching predicate, or None"""
+        with self._lock:
+            for status in reversed(self._statuses.values()):
+                if predicate(status):
+                    return dict(status)
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._statuses.clear()
+
+REGULAR_SEARCH_DEFAULTS = {
     "active": False,
     "progress": 0,
     "current_step": "",
@@ -25,7 +78,7 @@ regular_search_status = {
     "session_id": None
 }
 
-deep_search_status = {
+DEEP_SEARCH_DEFAULTS = {
     "active": False,
     "progress": 0,
     "total_steps": 0,
@@ -39,11 +92,204 @@ deep_search_status = {
     "results_served": False
 }
 
+regular_search_store = SearchStatusStore(REGULAR_SEARCH_DEFAULTS)
+deep_search_store = SearchStatusStore(DEEP_SEARCH_DEFAULTS)
+
+# Finished searches, reused when a new query means nearly the same thing with the same options.
+# Maps (normalized query, options) -> (unit embedding, options, results, explanation, expires_at)
+SEMANTIC_CACHE_SIZE = 500
+SEMANTIC_CACHE_THRESHOLD = 0.95  # Minimum cosine similarity for a hit
+SEMANTIC_CACHE_TTL = 300  # Seconds
+semantic_cache = OrderedDict()
+semantic_cache_lock = Lock()
+
+def _unit_vector(embedding):
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def semantic_cache_get(vector, options):
+    """
+    Return (results, explanation) for the most similar unexpired cached query
+    with the same options, or None if nothing is similar enough
+    """
+    now = time.time()
+    best_key, best_similarity = None, SEMANTIC_CACHE_THRESHOLD
+    with semantic_cache_lock:
+        for key, (cached_vector, cached_options, _, _, expires_at) in list(semantic_cache.items()):
+            if expires_at <= now:
+                del semantic_cache[key]
+                continue
+            if cached_options != options:
+                continue
+            similarity = float(np.dot(vector, cached_vector))
+            if similarity >= best_similarity:
+                best_key, best_similarity = key, similarity
+        
+        if best_key is None:
+            return None
+        semantic_cache.move_to_end(best_key)
+        _, _, results, explanation, _ = semantic_cache[best_key]
+    return list(results), explanation
+
+def semantic_cache_put(key, vector, options, results, explanation):
+    """
+    Store a finished search, evicting the least recently used entries past the size cap
+    """
+    with semantic_cache_lock:
+        semantic_cache[key] = (vector, options, list(results), explanation, time.time() + SEMANTIC_CACHE_TTL)
+        semantic_cache.move_to_end(key)
+        while len(semantic_cache) > SEMANTIC_CACHE_SIZE:
+            semantic_cache.popitem(last=False)
+
+# Re-ranking is sent to the LLM in chunks that run concurrently
+RERANK_CHUNK_SIZE = 10
+# The best games of each chunk are re-ranked together, so a strong match in a late chunk
+# can still come first
+RERANK_FINALISTS_PER_CHUNK = 3
+rerank_executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix='rerank')
+
+# LLM orderings for chunks already re-ranked, so paging or re-sorting a search doesn't
+# ask again. Summaries are fixed per appid, so (normalized query, sorted appids) is the key.
+# Maps that key -> (ordered appids, comment)
+RERANK_CACHE_SIZE = 512
+rerank_cache = OrderedDict()
+rerank_cache_lock = Lock()
+
+def cached_rerank(query, chunk):
+    """
+    Re-rank one chunk through rerank_search_results, reusing an earlier ordering of
+    the same games for the same query. Failed re-rankings are not cached.
+    """
+    key = (query.strip().lower(), tuple(sorted(c["appid"] for c in chunk)))
+    with rerank_cache_lock:
+        if key in rerank_cache:
+            rerank_cache.move_to_end(key)
+            ordered, comment = rerank_cache[key]
+            return list(ordered), comment
+    
+    ordered, comment = rerank_search_results(query, chunk)
+    if ordered is not None:
+        with rerank_cache_lock:
+            rerank_cache[key] = (tuple(ordered), comment)
+            rerank_cache.move_to_end(key)
+            while len(rerank_cache) > RERANK_CACHE_SIZE:
+                rerank_cache.popitem(last=False)
+    return ordered, comment
+
+def rerank_in_chunks(query, candidates, chunk_size=RERANK_CHUNK_SIZE):
+    """
+    Re-rank candidates in concurrent chunks, then re-rank the top RERANK_FINALISTS_PER_CHUNK
+    of every chunk together to order the best games across chunks. Finalists lead, followed
+    by the rest of each chunk in chunk order. A chunk whose re-ranking fails keeps its semantic
+    order; if the final round fails the chunks stay in semantic order, each ordered locally.
+    If every chunk fails this returns (None, reason) like rerank_search_results.
+    """
+    chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+    futures = {rerank_executor.submit(cached_rerank, query, chunk): index
+               for index, chunk in enumerate(chunks)}
+    
+    chunk_orders = [None] * len(chunks)
+    comments = [None] * len(chunks)
+    for future in as_completed(futures):
+        index = futures[future]
+        try:
+            chunk_orders[index], comments[index] = future.result()
+        except Exception as e:
+            current_app.logger.warning(f"Re-ranking chunk {index + 1}/{len(chunks)} failed: {e}")
+            comments[index] = str(e)
+    
+    if all(order is None for order in chunk_orders):
+        return None, next((c for c in comments if c), "Re-ranking failed")
+    
+    chunk_rankings = []
+    for chunk, order in zip(chunks, chunk_orders):
+        chunk_appids = [c["appid"] for c in chunk]
+        chunk_rankings.append(_merge_ranking(order, chunk_appids) if order is not None else chunk_appids)
+    
+    # The first chunk holds the most relevant games, so its comment leads
+    comment = next((c for c, order in zip(comments, chunk_orders) if order is not None and c), "")
+    if len(chunks) == 1:
+        return chunk_rankings[0], comment
+    
+    finalists = [appid for ranking in chunk_rankings for appid in ranking[:RERANK_FINALISTS_PER_CHUNK]]
+    by_appid = {c["appid"]: c for c in candidates}
+    try:
+        final_order, final_comment = cached_rerank(query, [by_appid[appid] for appid in finalists])
+    except Exception as e:
+        final_order, final_comment = None, str(e)
+    if final_order is None:
+        current_app.logger.warning(f"Final re-ranking round failed, keeping chunk order: {final_comment}")
+        return [appid for ranking in chunk_rankings for appid in ranking], comment
+    
+    finalist_set = set(finalists)
+    ordered_appids = _merge_ranking(final_order, finalists)
+    ordered_appids.extend(appid for ranking in chunk_rankings for appid in ranking if appid not in finalist_set)
+    return ordered_appids, final_comment or comment
+
+def _merge_ranking(order, appids):
+    """
+    The appids in an LLM ordering, keeping only the given ones, followed by any it left out
+    """
+    appid_set = set(appids)
+    ranked = list(dict.fromkeys(appid for appid in order if appid in appid_set))
+    ranked_set = set(ranked)
+    return ranked + [appid for appid in appids if appid not in ranked_set]
+
+def prefilter_appids(appids, attributes, selected_genre, selected_year, selected_platform, selected_price):
+    """
+    Drop appids whose precomputed attributes can't pass the filters, before their
+    game data is processed. Games without attributes are kept for the full filter.
+    """
+    filters = (selected_genre, selected_year, selected_platform, selected_price)
+    if not attributes or not appids or all(f == "All" for f in filters):
+        return appids
+
+    rows = np.array([attributes["appid_to_row"].get(appid, -1) for appid in appids], dtype=np.int64)
+    checked = np.flatnonzero(rows >= 0)
+    checked = checked[attributes["known"][rows[checked]]]
+    rows = rows[checked]
+    passes = np.ones(len(rows), dtype=bool)
+
+    if selected_genre != "All":
+        column = attributes["genre_index"].get(selected_genre)
+        passes &= attributes["genres"][rows, column] if column is not None else False
+    if selected_year != "All" and selected_year.isdigit():
+        passes &= attributes["years"][rows] == int(selected_year)
+    platform_bit = PLATFORM_BITS.get(selected_platform.lower())
+    if selected_platform != "All" and platform_bit:
+        passes &= (attributes["platforms"][rows] & platform_bit) != 0
+    if selected_price == "Free":
+        passes &= attributes["free"][rows]
+    elif selected_price == "Paid":
+        passes &= ~attributes["free"][rows]
+
+    keep = np.ones(len(appids), dtype=bool)
+    keep[checked] = passes
+    return [appid for appid, kept in zip(appids, keep.tolist()) if kept]
+
+def _sort_key_array(sort_by, results, years, total_reviews, pos_percent):
+    """
+    Ascending sort key for each result under a "sort by" option, or None if the option is unknown
+    """
+    if sort_by == "Name (A-Z)":
+        return np.array([r["name"] for r in results], dtype=str)
+    if sort_by == "Release Date (Newest)":
+        return -np.array([int(y) if y.isdigit() else 0 for y in years], dtype=np.int64)
+    if sort_by == "Release Date (Oldest)":
+        return np.array([int(y) if y.isdigit() else np.inf for y in years], dtype=np.float64)
+    if sort_by in ("Price (Low to High)", "Price (High to Low)"):
+        prices = np.array([r["price"] for r in results], dtype=np.float64)
+        return prices if sort_by == "Price (Low to High)" else -prices
+    if sort_by == "Review Count (High to Low)":
+        return -total_reviews
+    if sort_by == "Positive Review % (High to Low)":
+        return -pos_percent
+    return None
+
 # Helper function for force HTTPS
 def force_https(url: str) -> str:
-    if url.startswith("http://"):
-        return "https://" + url[7:]
-    return url
+    return "https" + url[4:] if url[:7] == "http://" else url
 
 # Helper functions for search processing
 def perform_search(query, selected_genre="All", selected_year="All", selected_platform="All", 
@@ -57,7 +303,7 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
     # Define file paths
     SUMMARIES_FILE = "data/summaries.jsonl"
     STEAM_DATA_FILE = "data/steam_games_data.jsonl"
-    TESTING_ENABLE_SYNTHETIC_SUMMARIES = True
+    TESTING_ENABLE_SYNTHETIC_SUMMARIES = current_app.config.get('TESTING_ENABLE_SYNTHETIC_SUMMARIES', False)
     
     # Get the index_map from the Flask app
     index_map = current_app.config.get('index_map')
@@ -71,40 +317,34 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
     
     # If requesting a deep search, we'll start the background process and return empty results
     if use_deep_search:
-        global deep_search_status
-        
-        # Check if we already have a completed deep search for this query that hasn't been served
-        if deep_search_status["completed"] and not deep_search_status["results_served"] and deep_search_status["original_query"].lower() == query.lower():
-            # Use the completed deep search results instead of starting a new search
-            print(f"Using existing completed deep search results for query: '{query}'")
-            return deep_search_status["results"], "Deep Search completed. Here are your results."
+        # Look at the latest deep search for this query; searches for other queries run independently
+        existing = deep_search_store.find(lambda status: status["original_query"].lower() == query.lower())
         
-        # If a deep search is already running, just return empty results
-        if deep_search_status["active"]:
-            return [], "A Deep Search is already in progress."
+        if existing:
+            # Check if we already have a completed deep search for this query that hasn't been served
+            if existing["completed"] and not existing["results_served"]:
+                # Use the completed deep search results instead of starting a new search
+                print(f"Using existing completed deep search results for query: '{query}'")
+                return existing["results"], "Deep Search completed. Here are your results."
+            
+            # If this search is already running, just return empty results
+            if existing["active"]:
+                g.search_session_id = existing["session_id"]  # Poll the running search
+                return [], "A Deep Search is already in progress."
+            
+            # Check if this is a restart of an identical search
+            if existing["completed"]:
+                print(f"Preventing automatic restart of deep search for: '{query}'")
+                return [], "This search was already completed. Refresh the page to start a new deep search."
         
-        # Check if this is a restart of an identical search
-        if deep_search_status["completed"] and deep_search_status["original_query"].lower() == query.lower():
-            print(f"Preventing automatic restart of deep search for: '{query}'")
-            return [], "This search was already completed. Refresh the page to start a new deep search."
+        session_id = deep_search_store.create(
+            active=True,
+            current_step="Initializing Deep Search",
+            original_query=query
+        )
         
-        # Reset deep search status with a completely new dictionary to prevent partial updates
-        deep_search_status.clear()
-        deep_search_status.update({
-            "active": True,
-            "progress": 0,
-            "total_steps": 0,
-            "current_step": "Initializing Deep Search",
-            "results": [],
-            "grand_summary": "",
-            "original_query": query,  # Set the original query
-            "completed": False,
-            "error": None,
-            "session_id": None,  # Will be set in the background task
-            "results_served": False  # Reset the served flag
-        })
-        
-        print(f"Initialized new deep search for: '{query}'")
+        print(f"Initialized new deep search for: '{query}' (Session: {session_id})")
+        g.search_session_id = session_id  # Handed to the client so it polls its own search
         
         # Start the background task
         search_params = {
@@ -113,17 +353,32 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
             "platform": selected_platform,
             "price": selected_price,
         }
-        thread = Thread(target=deep_search_background_task, args=(query, search_params))
+        thread = Thread(target=deep_search_background_task, args=(query, search_params, session_id))
         thread.daemon = True
         thread.start()
         
         # Return empty results - the client will poll for updates
         return [], "Deep Search started. Please wait while we find the best results for you."
     
-    # Regular search process
-    summaries_dict = load_summaries(SUMMARIES_FILE)
-    print(f"Perform search loaded {len(summaries_dict)} summaries") # NEW DEBUG
+    # Reuse a recent search for a query with (nearly) the same meaning and the same options
+    cache_key = query_vector = None
+    use_semantic_cache = current_app.config.get('SEMANTIC_CACHE_ENABLED', True) and query
+    if use_semantic_cache:
+        search_options = (use_ai_enhanced, selected_genre, selected_year, selected_platform,
+                          selected_price, sort_by, limit)
+        try:
+            query_vector = _unit_vector(embed_query(query))
+            cached = semantic_cache_get(query_vector, search_options)
+        except Exception as e:
+            current_app.logger.warning(f"Semantic cache lookup failed: {e}")
+            use_semantic_cache = False
+        else:
+            if cached is not None:
+                current_app.logger.info(f"Semantic cache hit for query: '{query}'")
+                return cached
+            cache_key = (query.lower(), search_options)
     
+    # Regular search process
     # Apply AI optimization to the query if enabled
     actual_search_query = query
     optimization_explanation = ""
@@ -161,6 +416,30 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
             sample = raw_results[0]
             print(f"Sample raw result: appid={sample.get('appid')}, name={sample.get('name')}")
 
+    # Fetch the summaries of just these results, in one lookup
+    summaries_dict = get_summaries_for_appids(
+        [r["appid"] for r in raw_results if r.get("appid")], SUMMARIES_FILE
+    )
+    print(f"Perform search found {len(summaries_dict)} summaries") # NEW DEBUG
+
+    # Game data is only read for the games that need it, and kept for the rest of the search
+    # so a game used for a synthetic summary isn't read again while building results
+    game_data_cache = {}
+    def fetch_games(appids):
+        """Read the games not read yet in one pass, in file order"""
+        unread = [appid for appid in appids if appid not in game_data_cache]
+        if unread:
+            game_data_cache.update(get_games_data_by_appids(unread, STEAM_DATA_FILE, index_map or {}))
+    def get_game(appid):
+        if appid not in game_data_cache:
+            game_data_cache[appid] = get_game_data_by_appid(appid, STEAM_DATA_FILE, index_map)
+        return game_data_cache[appid]
+
+    # Only games without an AI summary need their data for a synthetic one
+    if TESTING_ENABLE_SYNTHETIC_SUMMARIES:
+        fetch_games([int(r["appid"]) for r in raw_results[:limit_for_reranking]
+                     if r.get("appid") and not summaries_dict.get(int(r["appid"]), {}).get("ai_summary")])
+
     # 2. Prepare candidates for potential LLM re-ranking and track original order
     candidates_for_reranking = []
     original_semantic_order_appids = []
@@ -173,18 +452,18 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
         original_semantic_order_appids.append(appid_int)
         # Prepare candidate only if it's within the limit we send to the LLM
         if len(candidates_for_reranking) < limit_for_reranking:
-             # Get the actual game data to access more information if needed
-             game_data = None
-             if TESTING_ENABLE_SYNTHETIC_SUMMARIES:
-                 game_data = get_game_data_by_appid(appid_int, STEAM_DATA_FILE, index_map)
-             
              summary_obj = summaries_dict.get(appid_int, {})
              ai_summary = summary_obj.get("ai_summary", "")
              
+             # Only look at the game data when a synthetic summary is actually needed
+             game_data = None
+             if not ai_summary and TESTING_ENABLE_SYNTHETIC_SUMMARIES:
+                 game_data = get_game(appid_int)
+             
              if ai_summary:
                  # We have a real AI summary from the summaries file
                  candidates_for_reranking.append({"appid": appid_int, "ai_summary": ai_summary})
-             elif TESTING_ENABLE_SYNTHETIC_SUMMARIES and game_data:
+             elif game_data:
                  # TESTING MODE: Generate a synthetic summary for testing
                  missing_summaries_count += 1
                  
@@ -230,13 +509,13 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
             print(">> First candidate summary (truncated): " + candidates_for_reranking[0]['ai_summary'][:100] + "...")
             
             # Call the new re-ranking function
-            current_app.logger.info("Calling rerank_search_results...") # DEBUG
-            print(">> Calling rerank_search_results function now...")
+            current_app.logger.info("Calling rerank_in_chunks...") # DEBUG
+            print(">> Calling rerank_in_chunks function now...")
             
-            ordered_appids_from_llm, llm_comment = rerank_search_results(actual_search_query, candidates_for_reranking)
+            ordered_appids_from_llm, llm_comment = rerank_in_chunks(actual_search_query, candidates_for_reranking)
             
-            current_app.logger.info("rerank_search_results call completed.") # DEBUG
-            print(">> rerank_search_results call completed.")
+            current_app.logger.info("rerank_in_chunks call completed.") # DEBUG
+            print(">> rerank_in_chunks call completed.")
 
             if ordered_appids_from_llm is not None:
                 current_app.logger.info(f"LLM Re-ranking successful. Comment: {llm_comment}") # Expected log
@@ -269,37 +548,38 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
         current_app.logger.info("Skipping LLM re-ranking based on sort_by or empty candidates.") # DEBUG
         print(f">> Skipping LLM re-ranking. sort_by={sort_by}, candidates={len(candidates_for_reranking)}")
 
-    # 4. Fetch full data, filter, and build results based on the determined processing_order_appids
-    results_dict = {} # Use dict to store results before final sorting
-    processed_count = 0
-    max_results_to_display = 25 # Limit final results shown on page? Adjust as needed.
-
-    for appid in processing_order_appids:
-        # Optional: Stop processing if we have enough results for the page
-        # if processed_count >= max_results_to_display:
-        #    break
+    # 4. Fetch full data and build results based on the determined processing_order_appids.
+    # The precomputed attributes rule games out first, so only the survivors are read from disk
+    candidates = [] # Results in processing order, before filtering
+    positive_counts = []
+    total_review_counts = []
+    filterable_appids = prefilter_appids(
+        processing_order_appids, current_app.config.get('game_attributes'),
+        selected_genre, selected_year, selected_platform, selected_price
+    )
+    fetch_games(filterable_appids)
 
+    for appid in filterable_appids:
         # --- Fetch full game data ---
-        game_data = get_game_data_by_appid(appid, STEAM_DATA_FILE, index_map)
+        game_data = get_game(appid)
         if not game_data:
             current_app.logger.warning(f"Could not retrieve game data for appid {appid} during search processing.")
             continue
 
         # --- Extract data needed for filtering and display (reuse existing logic) ---
         reviews = game_data.get("reviews", [])
-        total_reviews = len(reviews)
-        positive_count = sum(1 for review in reviews if review.get("voted_up"))
-        pos_percent = (positive_count / total_reviews * 100) if total_reviews > 0 else 0
+        total_review_counts.append(len(reviews))
+        positive_counts.append(sum(1 for review in reviews if review.get("voted_up")))
 
-        media = [] # Extract media... (keep existing logic)
+        media_urls = [] # Extract media... (keep existing logic)
         if game_data.get("header_image"): 
-            media.append(force_https(game_data["header_image"]))
+            media_urls.append(game_data["header_image"])
         if isinstance(game_data.get("screenshots"), list):
             for s in game_data["screenshots"]:
                 if isinstance(s, dict) and s.get("path_full"):
-                    media.append(force_https(s["path_full"]))
+                    media_urls.append(s["path_full"])
                 else:
-                    media.append(force_https(str(s)))
+                    media_urls.append(str(s))
         store_data = game_data.get("store_data", {})
         if isinstance(store_data, dict):
             movies = store_data.get("movies", [])
@@ -307,13 +587,15 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
                 webm_max = movie.get("webm", {}).get("max")
                 mp4_max = movie.get("mp4", {}).get("max")
                 if webm_max:
-                    media.append(force_https(webm_max))
+                    media_urls.append(webm_max)
                 elif mp4_max:
-                    media.append(force_https(mp4_max))
+                    media_urls.append(mp4_max)
                 else:
                     thumb = movie.get("thumbnail")
                     if thumb:
-                        media.append(force_https(thumb))
+                        media_urls.append(thumb)
+        # Upgrade to https in one pass, inlined to skip a force_https call per URL
+        media = ["https" + url[4:] if url[:7] == "http://" else url for url in media_urls]
 
         summary_obj = summaries_dict.get(appid, {}) # Fetch summary again or pass from raw_results if needed
         ai_summary = summary_obj.get("ai_summary", "")
@@ -347,22 +629,7 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
                 except Exception as e:
                     current_app.logger.error(f"Error calculating price for appid {appid}: {e}")
 
-        # --- Apply Filters ---
-        if selected_genre != "All" and selected_genre not in genres: 
-            continue
-        if selected_year != "All" and year != selected_year: 
-            continue
-        if selected_platform != "All":
-            platform_key = selected_platform.lower()
-            if not platforms.get(platform_key, False): 
-                continue
-        if selected_price == "Free" and not is_free: 
-            continue
-        if selected_price == "Paid" and is_free: 
-            continue
-
-        # --- If filters pass, store the result ---
-        results_dict[appid] = {
+        candidates.append({
             "appid": appid,
             "name": game_data.get("name", "Unknown"),
             "media": media,
@@ -371,80 +638,106 @@ def perform_search(query, selected_genre="All", selected_year="All", selected_pl
             "platforms": platforms,
             "is_free": is_free,
             "price": price,
-            "pos_percent": pos_percent,
-            "total_reviews": total_reviews,
+            "pos_percent": 0,
+            "total_reviews": len(reviews),
             "ai_summary": ai_summary # Keep summary for potential display
-        }
-        processed_count += 1
-
-    # 5. Create the final list, respecting the processing order
-    # This ensures that if sort_by=="Relevance", the LLM/semantic order is maintained after filtering
-    final_results = [results_dict[appid] for appid in processing_order_appids if appid in results_dict]
+        })
 
-    # 6. Apply final explicit sorting ONLY if the user chose something other than "Relevance"
+    # 5. Lay the filter and sort fields out as parallel arrays, so filtering is a
+    # boolean mask and sorting a single argsort instead of per-result lookups
+    total_reviews = np.array(total_review_counts, dtype=np.int64)
+    pos_percent = np.divide(np.array(positive_counts, dtype=np.float64) * 100, total_reviews,
+                            out=np.zeros(len(candidates)), where=total_reviews > 0)
+    for result, percent in zip(candidates, pos_percent.tolist()):
+        result["pos_percent"] = percent
+
+    years = np.array([r["release_year"] for r in candidates], dtype=str)
+    free = np.array([bool(r["is_free"]) for r in candidates], dtype=bool)
+
+    # --- Apply Filters ---
+    mask = np.ones(len(candidates), dtype=bool)
+    if selected_genre != "All":
+        mask &= np.array([selected_genre in r["genres"] for r in candidates], dtype=bool)
+    if selected_year != "All":
+        mask &= years == selected_year
+    if selected_platform != "All":
+        platform_key = selected_platform.lower()
+        mask &= np.array([bool(r["platforms"].get(platform_key, False)) for r in candidates], dtype=bool)
+    if selected_price == "Free":
+        mask &= free
+    elif selected_price == "Paid":
+        mask &= ~free
+    kept = np.flatnonzero(mask)
+
+    # 6. Apply final explicit sorting ONLY if the user chose something other than "Relevance".
+    # Otherwise the LLM/semantic processing order is kept after filtering.
     if sort_by != "Relevance":
         current_app.logger.info(f"Applying final sort: {sort_by}")
-        if sort_by == "Name (A-Z)":
-            final_results.sort(key=lambda x: x["name"])
-        elif sort_by == "Release Date (Newest)":
-            final_results.sort(key=lambda x: int(x["release_year"]) if x["release_year"].isdigit() else 0, reverse=True)
-        elif sort_by == "Release Date (Oldest)":
-            final_results.sort(key=lambda x: int(x["release_year"]) if x["release_year"].isdigit() else float('inf'))
-        elif sort_by == "Price (Low to High)":
-            final_results.sort(key=lambda x: x["price"])
-        elif sort_by == "Price (High to Low)":
-            final_results.sort(key=lambda x: x["price"], reverse=True)
-        elif sort_by == "Review Count (High to Low)":
-            final_results.sort(key=lambda x: x["total_reviews"], reverse=True)
-        elif sort_by == "Positive Review % (High to Low)":
-            final_results.sort(key=lambda x: x["pos_percent"], reverse=True)
+        sort_key = _sort_key_array(sort_by, candidates, years, total_reviews, pos_percent)
+        if sort_key is not None:
+            if limit and limit < len(kept):
+                # Only the first `limit` results are shown, so pick them with a bounded heap
+                # instead of sorting everything. Like a stable sort, nsmallest keeps ties in order.
+                keys = sort_key.tolist()
+                kept = np.array(heapq.nsmallest(limit, kept.tolist(), key=keys.__getitem__), dtype=np.int64)
+            else:
+                # A stable ascending sort on (negated, for descending) keys keeps ties in processing order
+                kept = kept[np.argsort(sort_key[kept], kind="stable")]
+
+    final_results = [candidates[i] for i in kept]
 
     # Limit the final results based on the user's selection
     if limit and limit < len(final_results):
         current_app.logger.info(f"Limiting final results from {len(final_results)} to {limit}")
         final_results = final_results[:limit]
 
-    # If this is a deep search and we need to save to status
-    if save_to_status and use_deep_search:
-        deep_search_status["results"] = final_results
+    if use_semantic_cache and final_results:
+        semantic_cache_put(cache_key, query_vector, search_options, final_results, optimization_explanation)
 
     current_app.logger.info(f"--- Exiting perform_search --- Returning {len(final_results)} final results.") # DEBUG
     return final_results, optimization_explanation
 
 # Deep search background process
-def deep_search_background_task(query, search_params):
+def deep_search_background_task(query, search_params, session_id=None):
     """
-    Background task for processing deep search queries
+    Background task for processing deep search queries, reporting progress under session_id
     """
-    global deep_search_status
-    
     # Store the original query for reference and later matching
     original_query = query.strip()
     
-    # Generate a unique session ID for this search
-    session_id = str(uuid.uuid4())
-    deep_search_status["session_id"] = session_id
-    deep_search_status["original_query"] = original_query  # Make sure to set this explicitly
+    # Track a new session if the caller didn't start one
+    if session_id is None:
+        session_id = deep_search_store.create(active=True, original_query=original_query)
+    else:
+        deep_search_store.update(session_id, original_query=original_query)  # Make sure to set this explicitly
     
     print(f"\n==== STARTING DEEP SEARCH FOR: '{original_query}' (Session: {session_id}) ====\n")
     
     try:
         # Step 1: Generate search variations using LLM
-        deep_search_status["current_step"] = "Generating search variations"
-        deep_search_status["progress"] = 10
+        deep_search_store.update(session_id, current_step="Generating search variations", progress=10)
         variations = deep_search_generate_variations(original_query)
         
         # Set total steps based on number of variations
         total_steps = len(variations) + 2  # variations + summarization + finalization
-        deep_search_status["total_steps"] = total_steps
+        deep_search_store.update(session_id, total_steps=total_steps)
         
         # Step 2: Execute searches for each variation
         all_results = []
         
+        # Embed every variation in one request; the searches below find them cached
+        try:
+            embed_queries(variations)
+        except Exception as e:
+            print(f"Batch embedding failed, embedding variations one at a time: {e}")
+        
         for i, variation in enumerate(variations):
             progress_pct = 10 + int((i / len(variations)) * 60)  # Progress from 10% to 70%
-            deep_search_status["progress"] = progress_pct
-            deep_search_status["current_step"] = f"Searching variation {i+1}/{len(variations)}: '{variation}'"
+            deep_search_store.update(
+                session_id,
+                progress=progress_pct,
+                current_step=f"Searching variation {i+1}/{len(variations)}: '{variation}'"
+            )
             
             # Execute search for this variation, but don't save to status
             results, _ = perform_search(
@@ -474,8 +767,7 @@ def deep_search_background_task(query, search_params):
                 unique_results.append(result)
         
         # Step 4: Generate a summary and final ranking
-        deep_search_status["progress"] = 80
-        deep_search_status["current_step"] = "Generating final summary and ranking"
+        deep_search_store.update(session_id, progress=80, current_step="Generating final summary and ranking")
         
         ranked_appids, grand_summary = deep_search_generate_summary(original_query, unique_results)
         
@@ -496,12 +788,15 @@ def deep_search_background_task(query, search_params):
                 ranked_results.append(result)
         
         # Final step: Update the status with all our results
-        deep_search_status["progress"] = 100
-        deep_search_status["current_step"] = "Complete"
-        deep_search_status["results"] = ranked_results
-        deep_search_status["grand_summary"] = grand_summary
-        deep_search_status["completed"] = True
-        deep_search_status["active"] = False
+        deep_search_store.update(
+            session_id,
+            progress=100,
+            current_step="Complete",
+            results=ranked_results,
+            grand_summary=grand_summary,
+            completed=True,
+            active=False
+        )
         
     except Exception as e:
         # Log the error and update status
@@ -509,11 +804,14 @@ def deep_search_background_task(query, search_params):
         error_details = traceback.format_exc()
         print(f"ERROR in deep search: {e}\n{error_details}")
         
-        deep_search_status["error"] = str(e)
-        deep_search_status["progress"] = 100
-        deep_search_status["current_step"] = f"Error: {str(e)}"
-        deep_search_status["completed"] = True
-        deep_search_status["active"] = False
+        deep_search_store.update(
+            session_id,
+            error=str(e),
+            progress=100,
+            current_step=f"Error: {str(e)}",
+            completed=True,
+            active=False
+        )
 
 # Regular search background process
 def regular_search_background_task(query, search_params):
@@ -535,19 +833,17 @@ def search_page():
 @search_bp.route('/search_status')
 def check_search_status():
     """
-    API endpoint to check the status of an ongoing search
+    API endpoint to check the status of an ongoing search, optionally for a given session_id
     """
-    global regular_search_status
-    return jsonify(regular_search_status)
+    status = regular_search_store.snapshot(request.args.get('session_id'))
+    return jsonify(status or REGULAR_SEARCH_DEFAULTS)
 
 @search_bp.route('/deep_search_status')
 def check_deep_search_status():
     """
-    API endpoint to check the status of an ongoing deep search
+    API endpoint to check the status of a deep search, given by session_id or else the latest one
     """
-    global deep_search_status
-    
-    status_copy = dict(deep_search_status)  # Make a copy to avoid thread issues
+    status_copy = deep_search_store.snapshot(request.args.get('session_id')) or dict(DEEP_SEARCH_DEFAULTS)
     
     # Ensure all necessary fields are present
     if "progress" not in status_copy:
@@ -596,15 +892,33 @@ def execute_search():
     except ValueError:
         result_limit = 50
     
+    # Track a regular search under its own session; a deep search starts one in perform_search
+    session_id = None if use_deep_search else regular_search_store.create(
+        active=True, current_step="Searching for games", original_query=query
+    )
+    
     results, explanation = perform_search(
         query, genre, year, platform, price, sort_by,
         use_ai_enhanced, use_deep_search, True, result_limit
     )
     
-    return render_template(
+    if session_id:
+        regular_search_store.update(
+            session_id, active=False, completed=True, progress=100,
+            current_step="Search complete", results=results
+        )
+    else:
+        session_id = g.get('search_session_id')
+    
+    # Stream the partial so the first results reach the browser while the rest render
+    response = current_app.response_class(stream_template(
         'search_results_partial.html',
         results=results,
         query=query,
         explanation=explanation,
         use_deep_search=use_deep_search
-    ) 
\ No newline at end of file
+    ))
+    # The client sends this back when polling, so it only sees its own search's progress
+    if session_id:
+        response.headers['X-Search-Session-Id'] = session_id
+    return response 
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import re
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -42,6 +43,7 @@ ASCII_ART_PATTERNS = [
     r'[\/\\\|\-\=\+]{20,}',
     r'(.+\n)\1{3,}'
 ]
+ASCII_ART_REGEXES = [re.compile(pattern) for pattern in ASCII_ART_PATTERNS]
 
 KNOWN_COPYPASTA_STARTS = [
     "my grandfather smoked his whole life",
@@ -59,8 +61,12 @@ OFF_TOPIC_INDICATORS = [
     'trade offer'
 ]
 
-GAME_RELATED_TERMS = {
+# Each indicator list compiled into one alternation, so a review is scanned once per list
+RECIPE_INDICATORS_REGEX = re.compile('|'.join(map(re.escape, RECIPE_INDICATORS)))
+OFF_TOPIC_INDICATORS_REGEX = re.compile('|'.join(map(re.escape, OFF_TOPIC_INDICATORS)))
+
+GAME_RELATED_TERMS = frozenset({
     'play', 'game', 'level', 'character', 'story', 'graphics',
     'control', 'gameplay', 'multiplayer', 'single', 'player',
     'steam', 'hour', 'recommend', 'feature', 'mission'
-}
\ No newline at end of file
+})
\ No newline at end of file
@@ -1,49 +1,270 @@
+import io
 import os
-import json
+import re
+import mmap
 import pickle
+import sqlite3
+import tempfile
+import hashlib
 import logging
+import multiprocessing
+from functools import lru_cache
+from itertools import chain
+from collections.abc import Mapping
+from threading import Lock
+from concurrent.futures import ProcessPoolExecutor
+import orjson
+import numpy as np
 
 # Cache file for the index map
-INDEX_CACHE_FILE = "data/index_map.pkl"
+INDEX_CACHE_FILE = "data/index_map.npz"
+# The crawler writes appid as each record's first key, so the index can read it without parsing
+APPID_PREFIX_RE = re.compile(rb'\{\s*"appid"\s*:\s*"?(\d+)"?\s*[,}]')
+# Data files at least this large are indexed, and summaries parsed, by one process per core
+INDEX_PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+# Workers are spawned, not forked: by the time the app builds its data, firebase_config has
+# started gRPC and executor threads, and forking a process with those running isn't safe
+PROCESS_POOL_CONTEXT = multiprocessing.get_context("spawn")
+# Block size for sequential passes over a JSONL file, which is read as bytes for orjson
+JSONL_READ_BUFFER = 4 * 1024 * 1024
+# Bytes hashed from each end of a data file to tell whether its cached index is current
+FINGERPRINT_BYTES = 64 * 1024
 
-def build_steam_data_index(file_path: str) -> dict:
-    """Builds an index map (appid -> file offset) for the large JSONL file.
-       Uses a cache file to avoid re–scanning the file if it hasn't changed.
+# Cache file for the columnar filter attributes
+ATTRIBUTES_CACHE_FILE = "data/game_attributes.pkl"
+PLATFORM_BITS = {"windows": 1, "mac": 2, "linux": 4}
+
+# SQLite copy of the summaries file, keyed by appid
+SUMMARIES_DB_FILE = "data/summaries.sqlite"
+_summaries_db_lock = Lock()
+
+# Parsed games kept in memory, for the popular games many searches return
+GAME_CACHE_SIZE = 4096
+
+# Memory maps of the game data files, by absolute path
+_mapped_files = {}
+_mapped_files_lock = Lock()
+
+def _sort_by_appid(appids):
+    """Sorts appids, returning the order and a mask keeping only each appid's last entry,
+       so a later line for the same appid replaces an earlier one, as dict assignment would.
     """
-    if os.path.exists(INDEX_CACHE_FILE):
-        data_mtime = os.path.getmtime(file_path)
-        cache_mtime = os.path.getmtime(INDEX_CACHE_FILE)
-        if cache_mtime >= data_mtime:
-            logging.info("Loading index map from cache...")
-            with open(INDEX_CACHE_FILE, "rb") as f:
-                return pickle.load(f)
-    logging.info("Building index map from data file...")
-    index_map = {}
-    with open(file_path, "r", encoding="utf-8") as f:
-        offset = 0
-        line = f.readline()
-        while line:
+    appids = np.asarray(appids, dtype=np.int64)
+    order = np.argsort(appids, kind="stable")
+    appids = appids[order]
+    last = np.append(appids[1:] != appids[:-1], True) if len(appids) else np.ones(0, dtype=bool)
+    return order, last
+
+class AppIdIndex(Mapping):
+    """Read-only appid -> file offset mapping backed by two sorted int64 arrays.
+       Uses a fraction of a dict's memory for millions of games; lookups are a binary search.
+    """
+    __slots__ = ("appids", "offsets")
+
+    def __init__(self, appids, offsets):
+        order, last = _sort_by_appid(appids)
+        self.appids = np.asarray(appids, dtype=np.int64)[order][last]
+        self.offsets = np.asarray(offsets, dtype=np.int64)[order][last]
+
+    @classmethod
+    def from_dict(cls, index_map: dict) -> "AppIdIndex":
+        count = len(index_map)
+        return cls(np.fromiter(index_map.keys(), dtype=np.int64, count=count),
+                   np.fromiter(index_map.values(), dtype=np.int64, count=count))
+
+    def __getitem__(self, appid) -> int:
+        if not isinstance(appid, (int, np.integer)):
+            raise KeyError(appid)
+        i = np.searchsorted(self.appids, appid)
+        if i < len(self.appids) and self.appids[i] == appid:
+            return int(self.offsets[i])
+        raise KeyError(appid)
+
+    def __iter__(self):
+        return iter(self.appids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.appids)
+
+    def items(self):
+        """(appid, offset) pairs straight from the arrays, without a lookup per appid."""
+        return zip(self.appids.tolist(), self.offsets.tolist())
+
+class SummaryStore(Mapping):
+    """Read-only appid -> summary mapping that keeps each summary as its raw JSON bytes in one buffer.
+       Entries are parsed on access, so the store holds no per-summary Python objects;
+       an entry that turns out not to be valid JSON is treated as missing.
+    """
+    __slots__ = ("appids", "starts", "ends", "buffer")
+
+    def __init__(self, appids, starts, ends, buffer: bytes):
+        order, last = _sort_by_appid(appids)
+        self.appids = np.asarray(appids, dtype=np.int64)[order][last]
+        self.starts = np.asarray(starts, dtype=np.int64)[order][last]
+        self.ends = np.asarray(ends, dtype=np.int64)[order][last]
+        self.buffer = bytes(buffer)
+
+    def __getitem__(self, appid) -> dict:
+        if not isinstance(appid, (int, np.integer)):
+            raise KeyError(appid)
+        i = np.searchsorted(self.appids, appid)
+        if i < len(self.appids) and self.appids[i] == appid:
             try:
-                data = json.loads(line)
+                return orjson.loads(memoryview(self.buffer)[self.starts[i]:self.ends[i]])
+            except orjson.JSONDecodeError as e:
+                logging.warning(f"Error parsing summary for appid {appid}: {e}")
+        raise KeyError(appid)
+
+    def __iter__(self):
+        return iter(self.appids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.appids)
+
+def _line_start(mapped, pos: int) -> int:
+    """Moves a byte position forward to the start of the next line, unless a line starts there."""
+    if pos > 0 and mapped[pos - 1:pos] != b"\n":
+        return mapped.find(b"\n", pos) + 1 or len(mapped)
+    return pos
+
+def _index_lines(mapped, start: int, stop: int) -> tuple:
+    """Indexes the lines that begin in [start, stop) of a mapped data file, as parallel lists
+       of appids and offsets in file order. A range that starts mid-line skips ahead to the
+       next line; the range before it owns that line.
+    """
+    # Lists grow without rehashing, unlike a dict; AppIdIndex sorts and dedupes them
+    appids, offsets = [], []
+    add_appid, add_offset = appids.append, offsets.append
+    start = _line_start(mapped, start)
+    size = len(mapped)
+    # Bound once: the loop runs once per game, so attribute lookups add up
+    find_newline = mapped.find
+    match_prefix = APPID_PREFIX_RE.match
+    while start < stop:
+        end = find_newline(b"\n", start)
+        if end == -1:
+            end = size
+        match = match_prefix(mapped, start, end)
+        if match:
+            add_appid(int(match[1]))
+            add_offset(start)
+        elif end > start:
+            try:
+                data = orjson.loads(mapped[start:end])
                 appid = data.get("appid")
                 if appid is not None:
-                    index_map[int(appid)] = offset
+                    add_appid(appid if appid.__class__ is int else int(appid))
+                    add_offset(start)
             except Exception as e:
-                logging.warning(f"Error parsing line at offset {offset}: {e}")
-            offset = f.tell()
-            line = f.readline()
-    with open(INDEX_CACHE_FILE, "wb") as f:
-        pickle.dump(index_map, f)
+                logging.warning(f"Error parsing line at offset {start}: {e}")
+        start = end + 1
+    return appids, offsets
+
+def _fadvise(f, advice_name: str, offset: int = 0, length: int = 0):
+    """Page cache hint for an open file (the whole file by default).
+       A no-op where posix_fadvise isn't available, as on Windows and macOS.
+    """
+    advice = getattr(os, advice_name, None)
+    if advice is not None:
+        try:
+            os.posix_fadvise(f.fileno(), offset, length, advice)
+        except Exception:
+            pass  # Only a hint; streams without a real file descriptor are read as usual
+
+def _madvise(mapped: mmap.mmap, advice_name: str):
+    """Access pattern hint for a memory map, where the platform supports it."""
+    advice = getattr(mmap, advice_name, None)
+    if advice is not None:
+        try:
+            mapped.madvise(advice)
+        except OSError:
+            pass
+
+def _index_file_range(file_path: str, start: int, stop: int) -> tuple:
+    """Maps the file and indexes one byte range; also the worker process entry point.
+       The scan reads ahead, and its pages are dropped afterwards so they don't push
+       the games that searches look up out of the page cache.
+    """
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            _madvise(mapped, "MADV_SEQUENTIAL")
+            entries = _index_lines(mapped, start, stop)
+        _fadvise(f, "POSIX_FADV_DONTNEED", start, stop - start)
+    return entries
+
+def _file_fingerprint(file_path: str) -> str:
+    """Identifies a data file's contents by its size and a hash of its first and last bytes.
+       Reads at most two small blocks, however large the file is.
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(size - FINGERPRINT_BYTES, FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return f"{size}:{digest.hexdigest()}"
+
+def _temp_path_for(path: str) -> str:
+    """Creates an empty, uniquely named file next to path, for building a replacement to swap in
+       with os.replace. Each call gets its own name, so builders in other threads or processes
+       never write into the same temp file.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path) or ".")
+    os.close(fd)
+    return tmp_path
+
+def build_steam_data_index(file_path: str) -> AppIdIndex:
+    """Builds an index map (appid -> file offset) for the large JSONL file.
+       Uses a cache file to avoid re–scanning the file if it hasn't changed.
+    """
+    cache_file = INDEX_CACHE_FILE
+    # Compare contents rather than mtimes, which backups and syncs touch without changing anything
+    fingerprint = _file_fingerprint(file_path)
+    if os.path.exists(cache_file):
+        with np.load(cache_file) as cache:
+            if "fingerprint" in cache.files and cache["fingerprint"].item() == fingerprint:
+                logging.info("Loading index map from cache...")
+                return AppIdIndex(cache["appids"], cache["offsets"])
+    logging.info("Building index map from data file...")
+    size = os.path.getsize(file_path)
+    workers = os.cpu_count() or 1
+    if size >= INDEX_PARALLEL_MIN_BYTES and workers > 1:
+        # Split the file into one byte range per core and merge the ranges in file order
+        bounds = [size * i // workers for i in range(workers + 1)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_POOL_CONTEXT) as executor:
+            parts = executor.map(_index_file_range, [file_path] * workers, bounds[:-1], bounds[1:])
+            appids, offsets = [], []
+            for part_appids, part_offsets in parts:
+                appids.extend(part_appids)
+                offsets.extend(part_offsets)
+    else:
+        # Scan the memory-mapped file for newlines; each line's start is its offset
+        appids, offsets = _index_file_range(file_path, 0, size) if size else ([], [])
+    index_map = AppIdIndex(appids, offsets)
+    # Cached as the index's two arrays, which load in one read instead of unpickling entry by entry,
+    # next to the fingerprint of the file they index. Written aside and swapped in, so a crash
+    # or a concurrent load never sees a truncated archive
+    tmp_path = _temp_path_for(cache_file)
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, appids=index_map.appids, offsets=index_map.offsets, fingerprint=np.array(fingerprint))
+        os.replace(tmp_path, cache_file)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
     logging.info("Index map built and cached with %d entries.", len(index_map))
     return index_map
 
-def load_summaries(file_path: str) -> dict:
-    """Loads the AI summaries file fully into memory."""
-    summaries_dict = {}
+def load_summaries(file_path: str) -> SummaryStore:
+    """Loads the AI summaries file fully into memory, as a SummaryStore of the raw lines."""
+    appids, starts, ends = [], [], []
+    buffer = bytearray()
     if not os.path.exists(file_path):
         logging.warning(f"Summaries file not found: {file_path}")
         print(f"WARNING: Summaries file not found at {file_path}")
-        return summaries_dict
+        return SummaryStore(appids, starts, ends, buffer)
     
     # Add file size check for debugging
     file_size = os.path.getsize(file_path)
@@ -52,13 +273,24 @@ def load_summaries(file_path: str) -> dict:
     loaded_count = 0
     error_count = 0
     
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
+    with open(file_path, "rb", buffering=JSONL_READ_BUFFER) as f:
+        # Read once from start to end; afterwards the pages are only taking cache space
+        _fadvise(f, "POSIX_FADV_SEQUENTIAL")
+        match_prefix = APPID_PREFIX_RE.match
+        for line_num, line in enumerate(chain.from_iterable(_read_line_batches(f)), 1):
             try:
-                obj = json.loads(line)
-                appid = obj.get("appid")
+                # Only the appid is needed now; read it off the line like the index does, and
+                # parse lines that don't start with it. The bytes are what's kept.
+                match = match_prefix(line)
+                if match:
+                    appid = int(match[1])
+                else:
+                    appid = orjson.loads(line).get("appid")
                 if appid is not None:
-                    summaries_dict[int(appid)] = obj
+                    appids.append(appid if appid.__class__ is int else int(appid))
+                    starts.append(len(buffer))
+                    buffer += line
+                    ends.append(len(buffer))
                     loaded_count += 1
                 else:
                     error_count += 1
@@ -66,11 +298,13 @@ def load_summaries(file_path: str) -> dict:
             except Exception as e:
                 error_count += 1
                 logging.warning(f"Error parsing summary at line {line_num}: {e}")
+        _fadvise(f, "POSIX_FADV_DONTNEED")
     
+    summaries_dict = SummaryStore(appids, starts, ends, buffer)
     print(f"Loaded {loaded_count} summaries, encountered {error_count} errors")
     if loaded_count > 0:
         # Print a sample of loaded appids for verification
-        sample_keys = list(summaries_dict.keys())[:5]
+        sample_keys = summaries_dict.appids[:5].tolist()
         print(f"Sample appids in summaries: {sample_keys}")
     else:
         print("WARNING: No summaries were loaded. Re-ranking will not work!")
@@ -78,17 +312,270 @@ def load_summaries(file_path: str) -> dict:
     logging.info(f"Loaded {len(summaries_dict)} summaries.")
     return summaries_dict
 
+def _read_line_batches(f):
+    """Yields the lines of a binary file, without their newlines, one list per block read.
+       Splitting whole blocks keeps the per-line work out of Python-level readline calls.
+    """
+    tail = b""
+    while True:
+        block = f.read(JSONL_READ_BUFFER)
+        if not block:
+            if tail:
+                yield [tail]
+            return
+        lines = (tail + block).split(b"\n")
+        # The last piece is the start of a line that continues in the next block
+        tail = lines.pop()
+        if lines:
+            yield lines
+
+def _parse_jsonl(f):
+    """Yields (line number, record) for each line of a binary JSONL file that parses.
+       Lines are parsed a block at a time; only a block containing a bad line is parsed again
+       line by line, to log and skip it.
+    """
+    loads = orjson.loads
+    first_line = 1
+    for batch in _read_line_batches(f):
+        try:
+            records = [loads(line) for line in batch]
+        except orjson.JSONDecodeError:
+            records = []
+            for line_num, line in enumerate(batch, first_line):
+                try:
+                    records.append(loads(line))
+                except orjson.JSONDecodeError as e:
+                    logging.warning(f"Error parsing line {line_num}: {e}")
+                    records.append(None)
+        for line_num, record in enumerate(records, first_line):
+            if record is not None:
+                yield line_num, record
+        first_line += len(batch)
+
+def _summary_rows(f) -> list:
+    """(appid, summary) rows for the summaries database, from a binary JSONL file object."""
+    rows = []
+    for line_num, obj in _parse_jsonl(f):
+        appid = obj.get("appid") if obj.__class__ is dict else None
+        if appid is None:
+            continue
+        # Most appids are already ints; only quoted ones need converting
+        if appid.__class__ is not int:
+            try:
+                appid = int(appid)
+            except (TypeError, ValueError) as e:
+                logging.warning(f"Error parsing summary at line {line_num}: {e}")
+                continue
+        rows.append((appid, obj.get("ai_summary", "")))
+    return rows
+
+def _summary_rows_in_range(file_path: str, start: int, stop: int) -> list:
+    """Summary rows for the lines that begin in [start, stop); the worker process entry point.
+       Line numbers in warnings count from the start of the range.
+    """
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start, stop = _line_start(mapped, start), _line_start(mapped, stop)
+            rows = _summary_rows(io.BytesIO(mapped[start:stop]))
+        _fadvise(f, "POSIX_FADV_DONTNEED", start, stop - start)
+    return rows
+
+def build_summaries_db(file_path: str, db_path: str = SUMMARIES_DB_FILE) -> bool:
+    """Converts the summaries JSONL file into an SQLite table keyed by appid.
+       Skips the work if the database is newer than the file. Returns whether the database exists.
+    """
+    if not os.path.exists(file_path):
+        return os.path.exists(db_path)
+    with _summaries_db_lock:
+        if os.path.exists(db_path) and os.path.getmtime(db_path) >= os.path.getmtime(file_path):
+            return True
+        logging.info("Building summaries database from %s...", file_path)
+        # Build next to the old database and swap it in, so readers never see a partial table.
+        # The lock only covers this process; another process building at the same time writes
+        # its own temp file, and whichever finishes last swaps in a complete database
+        tmp_path = _temp_path_for(db_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("CREATE TABLE summaries (appid INTEGER PRIMARY KEY, ai_summary TEXT)")
+            size = os.path.getsize(file_path)
+            workers = os.cpu_count() or 1
+            if size >= INDEX_PARALLEL_MIN_BYTES and workers > 1:
+                # orjson holds the GIL while it parses, so split the file across processes, as the index does
+                bounds = [size * i // workers for i in range(workers + 1)]
+                with ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_POOL_CONTEXT) as executor:
+                    parts = executor.map(_summary_rows_in_range, [file_path] * workers, bounds[:-1], bounds[1:])
+                    rows = list(chain.from_iterable(parts))
+            else:
+                with open(file_path, "rb", buffering=JSONL_READ_BUFFER) as f:
+                    _fadvise(f, "POSIX_FADV_SEQUENTIAL")
+                    rows = _summary_rows(f)
+                    _fadvise(f, "POSIX_FADV_DONTNEED")
+            conn.executemany("INSERT OR REPLACE INTO summaries VALUES (?, ?)", rows)
+            conn.commit()
+        except BaseException:
+            conn.close()
+            os.remove(tmp_path)
+            raise
+        conn.close()
+        os.replace(tmp_path, db_path)
+        logging.info("Summaries database built with %d entries.", len(rows))
+        return True
+
+def get_summaries_for_appids(appids, file_path: str, db_path: str = SUMMARIES_DB_FILE) -> dict:
+    """Looks up the summaries for the given appids with one query against the summaries database.
+       Returns an empty dict if the database can't be built or read.
+    """
+    appids = list({int(appid) for appid in appids})
+    try:
+        if not build_summaries_db(file_path, db_path) or not appids:
+            return {}
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            placeholders = ",".join("?" * len(appids))
+            rows = conn.execute(
+                f"SELECT appid, ai_summary FROM summaries WHERE appid IN ({placeholders})", appids
+            ).fetchall()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        logging.warning(f"Summaries database unavailable: {e}")
+        return {}
+    return {appid: {"appid": appid, "ai_summary": ai_summary} for appid, ai_summary in rows}
+
+def _mapped_file(file_path: str) -> mmap.mmap:
+    """Memory-maps a data file once per process; the kernel keeps the hot pages cached.
+       Like the index map, the mapping assumes the file doesn't change while the app runs.
+    """
+    # Relative and absolute spellings of a path share one mapping
+    file_path = os.path.abspath(file_path)
+    mapped = _mapped_files.get(file_path)
+    if mapped is None:
+        with _mapped_files_lock:
+            mapped = _mapped_files.get(file_path)
+            if mapped is None:
+                with open(file_path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                # Lookups jump around the file, so reading ahead would only waste the page cache
+                _madvise(mapped, "MADV_RANDOM")
+                _mapped_files[file_path] = mapped
+    return mapped
+
+def _read_line_at(mapped: mmap.mmap, offset: int) -> dict:
+    end = mapped.find(b"\n", offset)
+    return orjson.loads(mapped[offset:end if end != -1 else len(mapped)])
+
+@lru_cache(maxsize=GAME_CACHE_SIZE)
+def _load_game(file_path: str, offset: int) -> dict:
+    # Keyed by offset rather than appid, so each index reads what it points at
+    return _read_line_at(_mapped_file(file_path), offset)
+
 def get_game_data_by_appid(appid: int, file_path: str, index_map: dict) -> dict:
-    """Random-access lookup of game data from the large JSONL file using the pre-built index."""
+    """Random-access lookup of game data from the large JSONL file using the pre-built index.
+       Recently read games come from an in-process LRU cache; callers share the returned dict
+       and must not modify it.
+    """
     offset = index_map.get(appid)
     if offset is None:
         logging.info(f"AppID {appid} not found in index map.")
         return None
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            f.seek(offset)
-            line = f.readline()
-            return json.loads(line)
+        return _load_game(file_path, offset)
     except Exception as e:
         logging.error(f"Failed to load game data for appid {appid}: {e}")
         return None
+
+def get_games_data_by_appids(appids, file_path: str, index_map: dict) -> dict:
+    """Reads several games from the large JSONL file, visiting their lines in file order.
+       Returns {appid: game data} for the appids found in the index map; like
+       get_game_data_by_appid, cached games are shared and must not be modified.
+    """
+    offsets = sorted({(index_map[appid], appid) for appid in appids if appid in index_map})
+    games = {}
+    if not offsets:
+        return games
+    try:
+        _mapped_file(file_path)
+    except Exception as e:
+        logging.error(f"Failed to read game data file {file_path}: {e}")
+        return games
+    for offset, appid in offsets:
+        try:
+            games[appid] = _load_game(file_path, offset)
+        except Exception as e:
+            logging.error(f"Failed to load game data for appid {appid}: {e}")
+    return games
+
+def build_game_attributes(file_path: str, index_map: dict) -> dict:
+    """Builds parallel arrays of every indexed game's filterable fields (release year, free flag,
+       platform bits and genre flags), so search filters can be checked without parsing games.
+       Uses a cache file, like the index map, to avoid re-reading the data file if it hasn't changed.
+    """
+    fingerprint = _file_fingerprint(file_path) if os.path.exists(file_path) else None
+    if fingerprint and os.path.exists(ATTRIBUTES_CACHE_FILE):
+        with open(ATTRIBUTES_CACHE_FILE, "rb") as f:
+            attributes = pickle.load(f)
+        # The index may have been rebuilt from another file; only trust a matching cache
+        if attributes.get("fingerprint") == fingerprint and attributes["appid_to_row"].keys() == set(index_map):
+            logging.info("Loading game attributes from cache...")
+            return attributes
+
+    logging.info("Building game attributes from data file...")
+    appids = sorted(index_map)
+    count = len(appids)
+    known = np.zeros(count, dtype=bool)
+    years = np.full(count, -1, dtype=np.int32)  # -1 when the year isn't a number
+    free = np.zeros(count, dtype=bool)
+    platforms = np.zeros(count, dtype=np.uint8)
+    genre_index = {}
+    genre_rows = []
+
+    appid_to_row = {appid: row for row, appid in enumerate(appids)}
+    mapped = _mapped_file(file_path) if appids else None
+    # Visit games in file order, parsing one at a time
+    for offset, appid in sorted((offset, appid) for appid, offset in index_map.items()):
+        row = appid_to_row[appid]
+        try:
+            game_data = _read_line_at(mapped, offset)
+        except Exception as e:
+            logging.warning(f"Error parsing game data for appid {appid}: {e}")
+            continue
+        if not isinstance(game_data, dict):
+            continue
+        known[row] = True
+        # Derived the same way perform_search derives them for display
+        year = (game_data.get("release_date") or "").split(",")[-1].strip()
+        if year.isdigit():
+            years[row] = int(year)
+        store_data = game_data.get("store_data", {})
+        if not isinstance(store_data, dict):
+            continue
+        free[row] = bool(store_data.get("is_free", False))
+        for platform, bit in PLATFORM_BITS.items():
+            if (store_data.get("platforms") or {}).get(platform):
+                platforms[row] |= bit
+        for genre in store_data.get("genres", []):
+            description = genre.get("description")
+            if description:
+                genre_rows.append((row, genre_index.setdefault(description, len(genre_index))))
+
+    genres = np.zeros((count, len(genre_index)), dtype=bool)
+    for row, column in genre_rows:
+        genres[row, column] = True
+
+    attributes = {
+        "appid_to_row": appid_to_row,
+        "known": known,
+        "years": years,
+        "free": free,
+        "platforms": platforms,
+        "genre_index": genre_index,
+        "genres": genres,
+        "fingerprint": fingerprint
+    }
+    # Write next to the old cache and swap it in, so a crash can't leave a truncated pickle
+    tmp_path = _temp_path_for(ATTRIBUTES_CACHE_FILE)
+    with open(tmp_path, "wb") as f:
+        pickle.dump(attributes, f)
+    os.replace(tmp_path, ATTRIBUTES_CACHE_FILE)
+    logging.info("Game attributes built for %d games and %d genres.", count, len(genre_index))
+    return attributes
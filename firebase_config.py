@@ -1,8 +1,12 @@
 import os
 import json
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
+from google.api_core.exceptions import AlreadyExists, NotFound
 from flask_login import UserMixin
 import pyrebase
 
@@ -54,7 +58,9 @@ firebase = pyrebase.initialize_app(FIREBASE_CONFIG)
 firebase_auth = firebase.auth()
 firebase_db = firebase.database()
 
-# Get a reference to the Firestore database
+# Get a reference to the Firestore database. This is the only client in the process:
+# everything imports this `db`, so all requests share its gRPC channel, which multiplexes
+# concurrent calls as HTTP/2 streams rather than queuing them behind one another
 try:
     db = firestore.client()
     print("Firestore database connected successfully")
@@ -62,6 +68,75 @@ except Exception as e:
     print(f"Error connecting to Firestore: {e}")
     db = None
 
+# List metadata fields users are allowed to edit, and the longest value accepted for them
+LIST_METADATA_FIELDS = frozenset({'name', 'description', 'notes'})
+MAX_LIST_METADATA_LENGTH = 20000
+
+# Maximum number of writes Firestore accepts in a single batch commit
+FIRESTORE_BATCH_LIMIT = 500
+
+# Membership checks only need to know a game document exists; fetch just this field of it
+MEMBERSHIP_FIELD_PATHS = ['appid']
+
+# Shared pool for fanning out independent Firestore round-trips
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='firestore')
+
+def _warm_up_firestore():
+    """
+    Make one tiny read so the client's gRPC channel (connection, TLS and HTTP/2 setup)
+    is open before the first request needs it, rather than adding seconds to that request
+    """
+    try:
+        db.collection('users').select([]).limit(1).get()
+    except Exception as e:
+        print(f"Error warming up Firestore connection: {e}")
+
+# Warm up in the background so importing this module isn't held up by the network
+if db is not None:
+    _executor.submit(_warm_up_firestore)
+
+# Recently read users and lists, so Flask-Login's reload on every request and repeated
+# list reads skip Firestore. Writes through User drop the affected entries; changes made
+# elsewhere (another worker process, the console) show up once an entry expires.
+# Maps user_id -> (value, expires_at)
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 60  # Seconds
+LISTS_CACHE_TTL = 20  # Seconds
+_user_cache = OrderedDict()
+_lists_cache = OrderedDict()
+_cache_lock = Lock()
+
+def _cache_get(cache, key):
+    """Return the unexpired value cached under key, or None"""
+    with _cache_lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return value
+
+def _cache_put(cache, key, value, ttl):
+    """Cache value under key for ttl seconds, evicting the least recently used entries past the size cap"""
+    with _cache_lock:
+        cache[key] = (value, time.time() + ttl)
+        cache.move_to_end(key)
+        while len(cache) > USER_CACHE_SIZE:
+            cache.popitem(last=False)
+
+def _cache_drop(cache, key):
+    with _cache_lock:
+        cache.pop(key, None)
+
+def clear_user_caches():
+    """Forget every cached user and list"""
+    with _cache_lock:
+        _user_cache.clear()
+        _lists_cache.clear()
+
 # User class for Flask-Login
 class User(UserMixin):
     def __init__(self, uid, email, display_name=None, photo_url=None):
@@ -69,20 +144,27 @@ class User(UserMixin):
         self.email = email
         self.display_name = display_name
         self.photo_url = photo_url
+        # id -> list dict, filled by get_lists() and dropped on any list write
+        self._lists_by_id = None
         
     @staticmethod
     def get(user_id):
         """Retrieve user from Firestore by user ID"""
+        # Cache the fields rather than the User, so each request gets its own instance
+        fields = _cache_get(_user_cache, user_id)
+        if fields is not None:
+            return User(uid=user_id, **fields)
         try:
             user_doc = db.collection('users').document(user_id).get()
             if user_doc.exists:
                 user_data = user_doc.to_dict()
-                return User(
-                    uid=user_id,
-                    email=user_data.get('email'),
-                    display_name=user_data.get('display_name'),
-                    photo_url=user_data.get('photo_url')
-                )
+                fields = {
+                    'email': user_data.get('email'),
+                    'display_name': user_data.get('display_name'),
+                    'photo_url': user_data.get('photo_url')
+                }
+                _cache_put(_user_cache, user_id, fields, USER_CACHE_TTL)
+                return User(uid=user_id, **fields)
         except Exception as e:
             print(f"Error getting user: {e}")
         return None
@@ -103,20 +185,46 @@ class User(UserMixin):
                 user_data['photo_url'] = self.photo_url
                 
             user_ref.set(user_data, merge=True)
+            _cache_drop(_user_cache, self.id)
             return True
         except Exception as e:
             print(f"Error creating/updating user: {e}")
             return False
     
-    def get_lists(self):
-        """Get all game lists for this user"""
+    def get_lists(self, fresh=False):
+        """Get all game lists for this user.
+        Pass fresh=True to skip the cache, e.g. when the lists' updated_at feeds an ETag"""
+        result = None if fresh else _cache_get(_lists_cache, self.id)
+        if result is None:
+            try:
+                lists_ref = db.collection('users').document(self.id).collection('lists')
+                result = [{'id': doc.id, **doc.to_dict()} for doc in lists_ref.get()]
+                _cache_put(_lists_cache, self.id, result, LISTS_CACHE_TTL)
+            except Exception as e:
+                print(f"Error getting user lists: {e}")
+                return []
+        # Hand out copies so a caller changing a list can't alter the cached ones
+        lists = [dict(lst) for lst in result]
+        self._lists_by_id = {lst['id']: lst for lst in lists}
+        return lists
+    
+    def get_list(self, list_id):
+        """Get a single game list by ID, or None if it doesn't exist"""
+        if self._lists_by_id is not None:
+            return self._lists_by_id.get(list_id)
         try:
-            lists_ref = db.collection('users').document(self.id).collection('lists')
-            lists = lists_ref.get()
-            return [{'id': doc.id, **doc.to_dict()} for doc in lists]
+            list_doc = db.collection('users').document(self.id).collection('lists').document(list_id).get()
+            if list_doc.exists:
+                return {'id': list_doc.id, **list_doc.to_dict()}
+            return None
         except Exception as e:
-            print(f"Error getting user lists: {e}")
-            return []
+            print(f"Error getting list: {e}")
+            return None
+    
+    def _invalidate_lists_cache(self):
+        """Drop the id -> list index and the cached lists after a list has been modified"""
+        self._lists_by_id = None
+        _cache_drop(_lists_cache, self.id)
     
     def create_list(self, list_name):
         """Create a new game list for this user"""
@@ -130,6 +238,7 @@ class User(UserMixin):
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
             new_list_ref = lists_ref.add(new_list)
+            self._invalidate_lists_cache()
             return new_list_ref[1].id  # Return the ID of the new list
         except Exception as e:
             print(f"Error creating list: {e}")
@@ -140,26 +249,30 @@ class User(UserMixin):
         try:
             # First delete all games in the list
             games_ref = db.collection('users').document(self.id).collection('lists').document(list_id).collection('games')
-            self._delete_collection(games_ref, 50)
+            self._delete_collection(games_ref)
             
             # Then delete the list itself
             list_ref = db.collection('users').document(self.id).collection('lists').document(list_id)
             list_ref.delete()
+            self._invalidate_lists_cache()
             return True
         except Exception as e:
             print(f"Error deleting list: {e}")
             return False
     
-    def _delete_collection(self, collection_ref, batch_size):
-        """Helper method to delete a collection"""
-        docs = collection_ref.limit(batch_size).get()
-        deleted = 0
-        for doc in docs:
-            doc.reference.delete()
-            deleted += 1
-        
-        if deleted >= batch_size:
-            return self._delete_collection(collection_ref, batch_size)
+    def _delete_collection(self, collection_ref, batch_size=FIRESTORE_BATCH_LIMIT):
+        """Helper method to delete a collection, one batched commit per page of documents"""
+        while True:
+            # Only the document references are needed, so fetch no fields
+            docs = collection_ref.select([]).limit(batch_size).get()
+            if not docs:
+                return
+            batch = db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            batch.commit()
+            if len(docs) < batch_size:
+                return
     
     def add_game_to_list(self, list_id, game_data):
         """Add a game to a list"""
@@ -172,27 +285,87 @@ class User(UserMixin):
             # Add a timestamp for client-side sorting (Firestore SERVER_TIMESTAMP can't be read directly)
             game_data['timestamp'] = int(time.time())
             
-            # Add the game to the list
+            # Add the game and update the list's updated_at timestamp in one commit
             game_ref = list_ref.collection('games').document(str(game_data['appid']))
             game_data['added_at'] = firestore.SERVER_TIMESTAMP
-            game_ref.set(game_data)
-            
-            # Update the list's updated_at timestamp
-            list_ref.update({'updated_at': firestore.SERVER_TIMESTAMP})
+            batch = db.batch()
+            batch.set(game_ref, game_data)
+            batch.update(list_ref, {'updated_at': firestore.SERVER_TIMESTAMP})
+            batch.commit()
+            self._invalidate_lists_cache()
             return True
         except Exception as e:
             print(f"Error adding game to list: {e}")
             return False
     
+    def add_game_to_lists(self, list_ids, game_data):
+        """Add a game to several lists in one batched write, returning how many lists it was added to"""
+        try:
+            lists_ref = db.collection('users').document(self.id).collection('lists')
+            list_refs = [lists_ref.document(list_id) for list_id in dict.fromkeys(list_ids)]
+            
+            # Verify which lists exist with a single read
+            existing_refs = [doc.reference for doc in db.get_all(list_refs) if doc.exists]
+            if not existing_refs:
+                return 0
+            
+            game_data = dict(game_data, timestamp=int(time.time()), added_at=firestore.SERVER_TIMESTAMP)
+            game_id = str(game_data['appid'])
+            
+            # Write the game and bump updated_at on every list in one commit
+            batch = db.batch()
+            for list_ref in existing_refs:
+                batch.set(list_ref.collection('games').document(game_id), game_data)
+                batch.update(list_ref, {'updated_at': firestore.SERVER_TIMESTAMP})
+            batch.commit()
+            self._invalidate_lists_cache()
+            return len(existing_refs)
+        except Exception as e:
+            print(f"Error adding game to lists: {e}")
+            return 0
+    
+    def add_games_to_list(self, list_id, games):
+        """Add several games to a list in batched writes, returning how many were added"""
+        try:
+            # Verify the list exists
+            list_ref = db.collection('users').document(self.id).collection('lists').document(list_id)
+            if not list_ref.get().exists:
+                return 0
+            
+            games_ref = list_ref.collection('games')
+            timestamp = int(time.time())
+            added = 0
+            
+            # A batch holds at most 500 writes; leave room for the list's updated_at.
+            # Each commit is all-or-nothing, so the chunk size is the number of games written.
+            for start in range(0, len(games), FIRESTORE_BATCH_LIMIT - 1):
+                chunk = games[start:start + FIRESTORE_BATCH_LIMIT - 1]
+                batch = db.batch()
+                for game_data in chunk:
+                    game_ref = games_ref.document(str(game_data['appid']))
+                    batch.set(game_ref, dict(game_data, timestamp=timestamp, added_at=firestore.SERVER_TIMESTAMP))
+                batch.update(list_ref, {'updated_at': firestore.SERVER_TIMESTAMP})
+                batch.commit()
+                added += len(chunk)
+            
+            self._invalidate_lists_cache()
+            return added
+        except Exception as e:
+            print(f"Error adding games to list: {e}")
+            return 0
+    
     def remove_game_from_list(self, list_id, appid):
         """Remove a game from a list"""
         try:
-            game_ref = db.collection('users').document(self.id).collection('lists').document(list_id).collection('games').document(str(appid))
-            game_ref.delete()
-            
-            # Update the list's updated_at timestamp
             list_ref = db.collection('users').document(self.id).collection('lists').document(list_id)
-            list_ref.update({'updated_at': firestore.SERVER_TIMESTAMP})
+            game_ref = list_ref.collection('games').document(str(appid))
+            
+            # Delete the game and update the list's updated_at timestamp in one atomic commit
+            batch = db.batch()
+            batch.delete(game_ref)
+            batch.update(list_ref, {'updated_at': firestore.SERVER_TIMESTAMP})
+            batch.commit()
+            self._invalidate_lists_cache()
             return True
         except Exception as e:
             print(f"Error removing game from list: {e}")
@@ -208,25 +381,41 @@ class User(UserMixin):
             print(f"Error getting games in list: {e}")
             return []
     
+    def get_list_with_games(self, list_id):
+        """Get a list and its games, reading both concurrently.
+        Returns (list_info, games); list_info is None if the list doesn't exist"""
+        games_future = _executor.submit(self.get_games_in_list, list_id)
+        list_info = self.get_list(list_id)
+        games = games_future.result()
+        return list_info, (games if list_info else [])
+    
     def is_game_in_list(self, list_id, appid):
         """Check if a game is in a list"""
         try:
             game_ref = db.collection('users').document(self.id).collection('lists').document(list_id).collection('games').document(str(appid))
-            return game_ref.get().exists
+            return game_ref.get(field_paths=MEMBERSHIP_FIELD_PATHS).exists
         except Exception as e:
             print(f"Error checking if game is in list: {e}")
             return False
     
-    def get_game_lists(self, appid):
-        """Get all lists that contain a specific game"""
+    def get_game_lists(self, appid, lists=None):
+        """Get all lists that contain a specific game.
+        Pass the user's lists if they have already been fetched to skip re-reading them"""
         try:
-            lists = self.get_lists()
-            result = []
-            for list_info in lists:
-                list_id = list_info['id']
-                if self.is_game_in_list(list_id, appid):
-                    result.append(list_info)
-            return result
+            if lists is None:
+                lists = self.get_lists()
+            if not lists:
+                return []
+            
+            # Game documents are keyed by appid, so membership is a direct key lookup;
+            # fetch the game document from every list in one batched read. A collection
+            # group query would also be one round-trip, but game documents don't record
+            # their owner, so it would need a new field, a composite index and a backfill
+            lists_ref = db.collection('users').document(self.id).collection('lists')
+            game_refs = [lists_ref.document(list_info['id']).collection('games').document(str(appid)) for list_info in lists]
+            snapshots = db.get_all(game_refs, field_paths=MEMBERSHIP_FIELD_PATHS)
+            containing_ids = {doc.reference.parent.parent.id for doc in snapshots if doc.exists}
+            return [list_info for list_info in lists if list_info['id'] in containing_ids]
         except Exception as e:
             print(f"Error getting game lists: {e}")
             return []
@@ -241,7 +430,7 @@ class User(UserMixin):
                 return False
                 
             # Only allow certain fields to be updated
-            if field not in ['name', 'description', 'notes']:
+            if field not in LIST_METADATA_FIELDS:
                 print(f"Invalid field: {field}")
                 return False
                 
@@ -251,6 +440,7 @@ class User(UserMixin):
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
             list_ref.update(update_data)
+            self._invalidate_lists_cache()
             
             print(f"Successfully updated {field} for list {list_id}")
             return True
@@ -272,13 +462,16 @@ class User(UserMixin):
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
             
-            # If this is a new note, add created_at
-            note_doc = notes_ref.get()
-            if not note_doc.exists:
-                notes_data['created_at'] = firestore.SERVER_TIMESTAMP
-                
-            # Save the note
-            notes_ref.set(notes_data, merge=True)
+            # Most saves edit an existing note, so try that first: one write, no read.
+            # update() fails if there is no note yet; then create it with created_at
+            try:
+                notes_ref.update(notes_data)
+            except NotFound:
+                try:
+                    notes_ref.create(dict(notes_data, created_at=firestore.SERVER_TIMESTAMP))
+                except AlreadyExists:
+                    # Created by a concurrent save in the meantime
+                    notes_ref.update(notes_data)
             
             print(f"Successfully saved note for game {appid}")
             return True
@@ -307,15 +500,15 @@ class User(UserMixin):
         """Delete a note for a specific game"""
         try:
             note_ref = db.collection('users').document(self.id).collection('game_notes').document(str(appid))
-            note_doc = note_ref.get()
             
-            if note_doc.exists:
-                note_ref.delete()
-                print(f"Successfully deleted note for game {appid}")
-                return True
-            else:
+            # The exists precondition makes a missing note fail the delete, without a read first
+            try:
+                note_ref.delete(option=db.write_option(exists=True))
+            except NotFound:
                 print(f"No note found for game {appid}")
                 return False
+            print(f"Successfully deleted note for game {appid}")
+            return True
         except Exception as e:
             print(f"Error deleting game note: {e}")
             return False 
\ No newline at end of file
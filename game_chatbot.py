@@ -1,7 +1,11 @@
-import json
 import os
 import logging
 import time
+import orjson
+import numpy as np
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from typing import List, Dict, Any
 from pinecone import Pinecone, ServerlessSpec
 import openai
@@ -19,6 +23,26 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # Use OpenAI's official API key
 # Configure file paths
 EMBEDDINGS_FILE = "embeddings.jsonl"  # Your embeddings file in root folder
 UPLOAD_CHECKPOINT_FILE = "pinecone_upload_complete.txt"  # To track if upload is done
+EMBEDDINGS_READ_BUFFER = 1 << 20  # Embedding lines are large; read the file a megabyte at a time
+
+# Decimal places kept in uploaded embedding values. The index compares vectors by cosine,
+# so 1e-6 of absolute error in components around 1e-2 doesn't change the ranking, while
+# each value is sent as ~8 characters of JSON instead of ~20
+EMBEDDING_UPLOAD_DECIMALS = 6
+
+# Upserts run on this many threads while the file is read, with at most
+# MAX_PENDING_UPSERTS batches parsed and waiting so memory stays bounded
+UPSERT_WORKERS = 8
+MAX_PENDING_UPSERTS = 16
+
+# Top-K hits per normalized query. Entries expire so a web process picks up vectors
+# upserted by another process; an upsert in this process clears them right away
+TOP_K_CACHE_SIZE = 64
+TOP_K_CACHE_TTL = 600  # Seconds
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_BATCH_LIMIT = 2048  # Most inputs the embeddings endpoint accepts in one request
+EMBEDDING_CACHE_SIZE = 256
 
 # Set OpenAI API key for official embedding endpoint
 openai.api_key = OPENAI_API_KEY
@@ -74,6 +98,63 @@ class GameKnowledgeBase:
             logging.error("Error checking index stats: %s", e)
             return False
 
+    def _read_vector_batches(self, embeddings_file: str, batch_size: int):
+        """Yield the records of an embeddings file as lists of up to batch_size Pinecone vectors."""
+        # Every vector in this run gets the same timestamp
+        last_updated = time.strftime('%Y-%m-%d %H:%M:%S')
+        batch = []
+        with open(embeddings_file, 'rb', buffering=EMBEDDINGS_READ_BUFFER) as f:
+            for line in f:
+                record = orjson.loads(line)
+                
+                # Include the ai_summary field in metadata. Pinecone's REST client takes
+                # values as a list of floats, so the rounded array is converted back to one.
+                batch.append({
+                    'id': record['appid'],
+                    'values': np.round(record['embedding'], EMBEDDING_UPLOAD_DECIMALS).tolist(),
+                    'metadata': {
+                        'name': record['name'],
+                        'appid': record['appid'],
+                        'ai_summary': record.get('ai_summary', 'No summary available'),
+                        'last_updated': last_updated
+                    }
+                })
+                
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _upsert_batches(self, batches) -> int:
+        """
+        Upsert batches of vectors concurrently, reading the next batches while earlier
+        ones are in flight. Raises the first upsert error; returns the vectors upserted.
+        """
+        total = 0
+        pending = deque()
+        
+        def finish_oldest():
+            nonlocal total
+            total += pending.popleft().result()
+            logging.info("Upserted %d vectors so far", total)
+        
+        def upsert(batch):
+            logging.debug("Upserting batch of %d vectors", len(batch))
+            self.index.upsert(vectors=batch, namespace="")
+            return len(batch)
+        
+        with ThreadPoolExecutor(max_workers=UPSERT_WORKERS, thread_name_prefix='upsert') as executor:
+            for batch in batches:
+                pending.append(executor.submit(upsert, batch))
+                if len(pending) >= MAX_PENDING_UPSERTS:
+                    finish_oldest()
+            while pending:
+                finish_oldest()
+        # Hits cached before the upsert may now be missing or outranked games
+        clear_top_k_cache()
+        return total
+
     def upload_embeddings(self, embeddings_file: str = EMBEDDINGS_FILE, batch_size: int = 100):
         """Upload embeddings from file to Pinecone in batches."""
         logging.info("Starting embeddings upload from %s", embeddings_file)
@@ -82,40 +163,8 @@ class GameKnowledgeBase:
             logging.info("Embeddings already uploaded to Pinecone. Skipping upload.")
             return
 
-        total_uploaded = 0
-        batch = []
-
         try:
-            with open(embeddings_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    record = json.loads(line)
-                    
-                    # Include the ai_summary field in metadata.
-                    vector_record = {
-                        'id': record['appid'],
-                        'values': record['embedding'],
-                        'metadata': {
-                            'name': record['name'],
-                            'appid': record['appid'],
-                            'ai_summary': record.get('ai_summary', 'No summary available'),
-                            'last_updated': time.strftime('%Y-%m-%d %H:%M:%S')
-                        }
-                    }
-                    batch.append(vector_record)
-                    
-                    if len(batch) >= batch_size:
-                        logging.debug("Uploading batch of %d vectors", len(batch))
-                        self.index.upsert(vectors=batch, namespace="")
-
-                        total_uploaded += len(batch)
-                        logging.info("Uploaded %d vectors so far", total_uploaded)
-                        batch = []
-                
-                if batch:
-                    logging.debug("Uploading final batch of %d vectors", len(batch))
-                    self.index.upsert(vectors=batch, namespace="")
-
-                    total_uploaded += len(batch)
+            total_uploaded = self._upsert_batches(self._read_vector_batches(embeddings_file, batch_size))
             
             with open(UPLOAD_CHECKPOINT_FILE, 'w') as f:
                 f.write(f"Upload completed on {time.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -139,39 +188,8 @@ class GameKnowledgeBase:
             logging.error("Error retrieving current index stats: %s", e)
             current_stats = None
         
-        total_processed = 0
-        batch = []
         try:
-            with open(embeddings_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    record = json.loads(line)
-                    
-                    # Include ai_summary in metadata during update as well.
-                    vector_record = {
-                        'id': record['appid'],
-                        'values': record['embedding'],
-                        'metadata': {
-                            'name': record['name'],
-                            'appid': record['appid'],
-                            'ai_summary': record.get('ai_summary', 'No summary available'),
-                            'last_updated': time.strftime('%Y-%m-%d %H:%M:%S')
-                        }
-                    }
-                    batch.append(vector_record)
-                    
-                    if len(batch) >= batch_size:
-                        logging.debug("Processing batch of %d vectors", len(batch))
-                        self.index.upsert(vectors=batch, namespace="")
-
-                        total_processed += len(batch)
-                        logging.info("Processed batch of %d vectors", len(batch))
-                        batch = []
-                
-                if batch:
-                    logging.debug("Processing final batch of %d vectors", len(batch))
-                    self.index.upsert(vectors=batch, namespace="")
-
-                    total_processed += len(batch)
+            total_processed = self._upsert_batches(self._read_vector_batches(embeddings_file, batch_size))
             
             new_stats = self.index.describe_index_stats()
             logging.info("Update complete!")
@@ -215,18 +233,11 @@ class GameChatbot:
         # Instantiate the new OpenAI client
         self.openai_client = openai.OpenAI()
 
-    @retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(3))
     def get_embedding(self, text: str) -> List[float]:
-        """Get embedding for text using OpenAI's official API."""
+        """Get embedding for text using OpenAI's official API, reusing earlier results."""
         logging.debug("Requesting embedding for text: %s", text)
         try:
-            response = openai.embeddings.create(
-                model="text-embedding-3-large",
-                input=text,
-                encoding_format="float"
-            )
-            # Use attribute access for the response.
-            embedding = response.data[0].embedding
+            embedding = list(_embed_query(text))
             logging.debug("Received embedding of length %d", len(embedding))
             return embedding
         except Exception as e:
@@ -241,6 +252,7 @@ class GameChatbot:
             results = self.kb.index.query(
                 vector=query_embedding,
                 top_k=top_k,
+                include_values=False,  # Only the metadata is used, not the 3072 floats per match
                 include_metadata=True
             )
             logging.debug("Search returned %d matches", len(results.matches))
@@ -322,17 +334,80 @@ def chat_loop(chatbot):
         logging.info("Chat loop interrupted by user.")
         print("\n\nChat interrupted by user. Goodbye!")
 
-def semantic_search_query(query: str, top_k: int = 10):
+@retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(3))
+def _embedding_request(texts: List[str]) -> List[List[float]]:
+    """One embeddings API call for up to EMBEDDING_BATCH_LIMIT texts, in input order."""
+    response = openai.embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=texts,
+        encoding_format="float"
+    )
+    return [item.embedding for item in response.data]
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embeddings for several texts, sent as few API requests as the batch limit allows."""
+    embeddings = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_LIMIT):
+        embeddings.extend(_embedding_request(texts[start:start + EMBEDDING_BATCH_LIMIT]))
+    return embeddings
+
+# Maps query text -> embedding, least recently used first
+embedding_cache = OrderedDict()
+embedding_cache_lock = Lock()
+
+def clear_embedding_cache():
+    """Forget every cached query embedding."""
+    with embedding_cache_lock:
+        embedding_cache.clear()
+
+def _embed_queries(queries: List[str]) -> List[tuple]:
     """
-    A simple helper that:
-    1. Instantiates our GameKnowledgeBase and GameChatbot
-    2. Performs a semantic search for 'query' via chatbot.search_games()
-    3. Returns a list of dictionaries with the top matches
+    Embeddings for several search queries or chatbot questions. Repeated and paginated
+    searches, and repeated questions, reuse cached ones; the rest go to the API together.
     """
-    kb = GameKnowledgeBase()
-    chatbot = GameChatbot(kb)
+    found = {}
+    with embedding_cache_lock:
+        for query in queries:
+            if query in embedding_cache:
+                embedding_cache.move_to_end(query)
+                found[query] = embedding_cache[query]
+    missing = [query for query in dict.fromkeys(queries) if query not in found]
+    if missing:
+        logging.debug("Requesting embeddings for %d queries", len(missing))
+        fresh = [tuple(embedding) for embedding in get_embeddings(missing)]
+        found.update(zip(missing, fresh))
+        with embedding_cache_lock:
+            embedding_cache.update(zip(missing, fresh))
+            for query in missing:
+                embedding_cache.move_to_end(query)
+            while len(embedding_cache) > EMBEDDING_CACHE_SIZE:
+                embedding_cache.popitem(last=False)
+    return [found[query] for query in queries]
+
+def _embed_query(query: str) -> tuple:
+    """Embedding for one search query or chatbot question, cached like _embed_queries."""
+    return _embed_queries([query])[0]
+
+def embed_queries(queries: List[str]) -> List[tuple]:
+    """Embeddings for several search queries in one request, normalized like embed_query."""
+    return _embed_queries([query.strip().lower() for query in queries])
 
-    pinecone_results = chatbot.search_games(query, top_k=top_k)
+def embed_query(query: str) -> tuple:
+    """Embedding for a search query, normalized so case and whitespace don't matter."""
+    return _embed_query(query.strip().lower())
+
+def semantic_search_topk(embedding, top_k: int = 10):
+    """
+    Query Pinecone with a precomputed embedding and return the top matches
+    as dictionaries, sorted by descending similarity score
+    """
+    kb = GameKnowledgeBase()
+    pinecone_results = kb.index.query(
+        vector=list(embedding),
+        top_k=top_k,
+        include_values=False,
+        include_metadata=True
+    ).matches
 
     results = []
     for match in pinecone_results:
@@ -353,6 +428,43 @@ def semantic_search_query(query: str, top_k: int = 10):
     results.sort(key=lambda x: x["similarity_score"], reverse=True)
     return results
 
+# Maps (normalized query, top_k) -> (hits, expires_at)
+top_k_cache = OrderedDict()
+top_k_cache_lock = Lock()
+
+def clear_top_k_cache():
+    """Forget every cached top-K result, e.g. after the index changes."""
+    with top_k_cache_lock:
+        top_k_cache.clear()
+
+def _cached_top_k(query: str, top_k: int) -> tuple:
+    """
+    Raw top-K hits for a normalized query, so requests that only change the
+    result limit or filters don't query the index again within TOP_K_CACHE_TTL
+    """
+    key = (query, top_k)
+    with top_k_cache_lock:
+        entry = top_k_cache.get(key)
+        if entry is not None and entry[1] > time.time():
+            top_k_cache.move_to_end(key)
+            return entry[0]
+    hits = tuple(semantic_search_topk(_embed_query(query), top_k))
+    with top_k_cache_lock:
+        top_k_cache[key] = (hits, time.time() + TOP_K_CACHE_TTL)
+        top_k_cache.move_to_end(key)
+        while len(top_k_cache) > TOP_K_CACHE_SIZE:
+            top_k_cache.popitem(last=False)
+    return hits
+
+def semantic_search_query(query: str, top_k: int = 10):
+    """
+    A simple helper that:
+    1. Normalizes 'query' and looks up (or computes) its embedding
+    2. Performs a semantic search for it against the Pinecone index
+    3. Returns a list of dictionaries with the top matches
+    """
+    # Hand out copies so callers can't modify the cached hits
+    return [dict(hit) for hit in _cached_top_k(query.strip().lower(), top_k)]
 
 def main():
     logging.info("Starting main program")
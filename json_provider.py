@@ -0,0 +1,22 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Types orjson can't serialize natively (and datetimes, so Firestore
+    timestamps keep Flask's HTTP date format) fall back to Flask's default
+    conversion.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
@@ -23,14 +23,13 @@ class ReviewFilter:
         text_lower = text.lower()
 
         # Check for recipes
-        recipe_score = sum(indicator in text_lower 
-                         for indicator in RECIPE_INDICATORS)
+        recipe_score = len(set(RECIPE_INDICATORS_REGEX.findall(text_lower)))
         if recipe_score >= 2:
             return False, "Recipe detected"
 
         # Check for ASCII art
-        for pattern in ASCII_ART_PATTERNS:
-            if re.search(pattern, text):
+        for pattern in ASCII_ART_REGEXES:
+            if pattern.search(text):
                 return False, "ASCII art detected"
 
         # Check for known copypasta
@@ -55,8 +54,7 @@ class ReviewFilter:
                 return False, "Repetitive content"
 
         # Check for off-topic content
-        if any(indicator in text_lower 
-               for indicator in OFF_TOPIC_INDICATORS):
+        if OFF_TOPIC_INDICATORS_REGEX.search(text_lower):
             return False, "Off-topic promotion"
 
         return True, None
@@ -79,7 +77,7 @@ class ReviewFilter:
                 sent[0].isupper() and sent.endswith(('.', '!', '?'))
                 for sent in sentences
             ),
-            'has_game_terms': len(set(words).intersection(GAME_RELATED_TERMS)) >= 2,
+            'has_game_terms': len(GAME_RELATED_TERMS.intersection(words)) >= 2,
             'has_reasonable_length': MIN_REVIEW_WORDS <= word_count <= MAX_REVIEW_WORDS,
             'has_proper_formatting': True
         }
@@ -3,6 +3,7 @@ Test fixtures for SteamSeek tests.
 """
 import pytest
 from flask import Flask
+from flask.testing import FlaskClient
 from flask_login import LoginManager
 from unittest.mock import patch, MagicMock
 import os
@@ -15,6 +16,20 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from app_refactored import app as flask_app
 
 
+class BufferedClient(FlaskClient):
+    """
+    Test client that reads each response in full by default. A streamed response keeps its
+    request context pushed until it is read or closed, and tests often drop responses unread.
+    Pass buffered=False to test streaming itself.
+    """
+    def open(self, *args, **kwargs):
+        kwargs.setdefault('buffered', True)
+        return super().open(*args, **kwargs)
+
+
+flask_app.test_client_class = BufferedClient
+
+
 @pytest.fixture
 def app():
     """Create and configure a Flask app for testing."""
@@ -23,7 +38,8 @@ def app():
         'TESTING': True,
         'SECRET_KEY': 'test-key',
         'DEBUG': False,
-        'WTF_CSRF_ENABLED': False
+        'WTF_CSRF_ENABLED': False,
+        'SEMANTIC_CACHE_ENABLED': False
     })
     
     # Mock Firebase and other external services
@@ -39,6 +55,22 @@ def app():
                     yield flask_app
 
 
+@pytest.fixture(autouse=True)
+def clear_rerank_cache():
+    """Start every test with no cached re-rankings so mocked LLM responses are always used."""
+    from blueprints.search import rerank_cache
+    rerank_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_user_caches():
+    """Start every test with no cached users or lists so mocked Firestore reads are always used."""
+    from firebase_config import clear_user_caches
+    clear_user_caches()
+    yield
+
+
 @pytest.fixture
 def client(app):
     """Create a test client for the app."""
@@ -52,20 +52,20 @@ def test_search_execute_endpoint(mock_perform_search, client):
     assert kwargs.get('limit') == 50
 
 
-@patch('blueprints.search.deep_search_status')
-def test_deep_search_status_endpoint(mock_status, client):
+@patch('blueprints.search.deep_search_store')
+def test_deep_search_status_endpoint(mock_store, client):
     """
     Test that the deep search status endpoint returns the correct response.
     """
     # Setup mock
-    mock_status.copy.return_value = {
+    mock_store.snapshot.return_value = {
         'active': True,
         'progress': 50,
         'current_step': 'Processing search variations',
         'completed': False,
         'error': None,
-        'result_count': 10,
-        'ready_for_viewing': False
+        'results': [{'appid': appid} for appid in range(10)],
+        'results_served': False
     }
     
     # Execute
@@ -57,6 +57,32 @@ def test_user_get_method(mock_db):
     assert user.photo_url == "https://example.com/photo.jpg"
 
 
+@patch('firebase_config.db')
+def test_user_get_method_cached(mock_db):
+    """
+    Test User.get serves repeat lookups from the cache until the user is updated
+    """
+    mock_document = MagicMock()
+    mock_document.exists = True
+    mock_document.to_dict.return_value = {'email': 'test@example.com', 'display_name': 'Test User'}
+    mock_document_ref = mock_db.collection.return_value.document.return_value
+    mock_document_ref.get.return_value = mock_document
+    
+    first = User.get("test123")
+    second = User.get("test123")
+    
+    # One Firestore read, but a separate User for each caller
+    mock_document_ref.get.assert_called_once()
+    assert second is not first
+    assert second.email == "test@example.com"
+    assert second.display_name == "Test User"
+    
+    # Updating the user drops the cached entry
+    first.create_or_update()
+    User.get("test123")
+    assert mock_document_ref.get.call_count == 2
+
+
 @patch('firebase_config.db')
 def test_user_get_method_nonexistent_user(mock_db):
     """
@@ -5,11 +5,16 @@ import pytest
 import os
 import json
 import pickle
+import orjson
+import numpy as np
 from unittest.mock import patch, mock_open, MagicMock, call
 import tempfile
 
 # Import the functions to test
-from data_loader import build_steam_data_index, load_summaries, get_game_data_by_appid
+import data_loader
+from data_loader import (build_steam_data_index, load_summaries, build_summaries_db,
+                         get_summaries_for_appids, get_game_data_by_appid, get_games_data_by_appids,
+                         build_game_attributes, AppIdIndex)
 
 # Sample game data for testing
 SAMPLE_GAME_DATA = [
@@ -26,78 +31,84 @@ SAMPLE_SUMMARY_DATA = [
 ]
 
 
-def test_build_steam_data_index_new():
+def test_build_steam_data_index_new(tmp_path):
     """
     Test building a new index when no cache exists
     """
-    # Create mock file data
-    mock_file_data = '\n'.join(SAMPLE_GAME_DATA)
-    
-    # Mock pickle.dump to avoid serialization issues with MagicMock
-    with patch('pickle.dump') as mock_dump:
-        # Mock the open function for both the data file and cache file
-        with patch('builtins.open', mock_open(read_data=mock_file_data)) as mock_file:
-            # Mock os.path.exists to return False for cache file
-            with patch('os.path.exists', return_value=False):
-                # Call the function
-                result = build_steam_data_index('fake_path.jsonl')
-                
-                # Verify the result has the expected keys
-                assert 123 in result
-                assert 456 in result
-                assert 789 in result
-                
-                # Verify pickle.dump was called
-                mock_dump.assert_called_once()
+    # The index is built by memory-mapping the data file, so use a real one
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join(SAMPLE_GAME_DATA))
+    cache_file = tmp_path / 'index_map.npz'
+    
+    # Point the cache at a file that doesn't exist yet
+    with patch('data_loader.INDEX_CACHE_FILE', str(cache_file)):
+        # Call the function
+        result = build_steam_data_index(str(data_file))
+    
+    # Verify the result has the expected keys
+    assert 123 in result
+    assert 456 in result
+    assert 789 in result
+    
+    # Verify the index was cached as appid and offset arrays
+    with np.load(cache_file) as cache:
+        assert dict(zip(cache['appids'].tolist(), cache['offsets'].tolist())) == result
 
 
-def test_build_steam_data_index_cached():
+def test_build_steam_data_index_cached(tmp_path):
     """
-    Test loading index from cache when it exists and is newer than the data file
+    Test loading index from cache when it was built from the same file contents
     """
-    # Create a mock index map
+    # Create a cached index map
     mock_index_map = {123: 0, 456: 100, 789: 200}
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join(SAMPLE_GAME_DATA))
+    cache_file = tmp_path / 'index_map.npz'
+    np.savez(cache_file, appids=np.array(list(mock_index_map), dtype=np.int64),
+             offsets=np.array(list(mock_index_map.values()), dtype=np.int64),
+             fingerprint=np.array(data_loader._file_fingerprint(str(data_file))))
+    
+    # Touching the data file after the cache was written doesn't invalidate it
+    os.utime(cache_file, (100, 100))
+    os.utime(data_file, (200, 200))
     
-    # Mock pickle.load to return our mock index map
-    with patch('pickle.load', return_value=mock_index_map):
-        # Mock os.path.exists to return True for cache file
-        with patch('os.path.exists', return_value=True):
-            # Mock os.path.getmtime to make cache file newer than data file
-            with patch('os.path.getmtime', side_effect=[100, 200]):  # data_mtime, cache_mtime
-                # Mock open to avoid actually opening any files
-                with patch('builtins.open', mock_open()):
-                    # Call the function
-                    result = build_steam_data_index('fake_path.jsonl')
-                    
-                    # Verify the result is the same as our mock index map
-                    assert result == mock_index_map
+    with patch('data_loader.INDEX_CACHE_FILE', str(cache_file)):
+        # Call the function
+        result = build_steam_data_index(str(data_file))
+    
+    # Verify the result is the same as the cached index map
+    assert result == mock_index_map
+    assert all(type(key) is int and type(value) is int for key, value in result.items())
 
 
-def test_build_steam_data_index_rebuild():
+def test_build_steam_data_index_rebuild(tmp_path):
     """
-    Test rebuilding index when cache exists but is older than the data file
+    Test rebuilding index when cache exists but was built from different file contents
     """
-    # Create mock file data
-    mock_file_data = '\n'.join(SAMPLE_GAME_DATA)
-    
-    # Mock pickle.dump to avoid serialization issues with MagicMock
-    with patch('pickle.dump') as mock_dump:
-        # Mock the open function for both the data file and cache file
-        with patch('builtins.open', mock_open(read_data=mock_file_data)) as mock_file:
-            # Mock os.path.exists to return True for cache file
-            with patch('os.path.exists', return_value=True):
-                # Mock os.path.getmtime to make data file newer than cache file
-                with patch('os.path.getmtime', side_effect=[200, 100]):  # data_mtime, cache_mtime
-                    # Call the function
-                    result = build_steam_data_index('fake_path.jsonl')
-                    
-                    # Verify the result has the expected keys
-                    assert 123 in result
-                    assert 456 in result
-                    assert 789 in result
-                    
-                    # Verify pickle.dump was called
-                    mock_dump.assert_called_once()
+    # The index is built by memory-mapping the data file, so use a real one
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text(SAMPLE_GAME_DATA[0])
+    cache_file = tmp_path / 'index_map.npz'
+    np.savez(cache_file, appids=np.array([], dtype=np.int64), offsets=np.array([], dtype=np.int64),
+             fingerprint=np.array(data_loader._file_fingerprint(str(data_file))))
+    
+    # Change the contents while keeping the cache newer than the data file
+    data_file.write_text('\n'.join(SAMPLE_GAME_DATA))
+    os.utime(data_file, (100, 100))
+    os.utime(cache_file, (200, 200))
+    
+    with patch('data_loader.INDEX_CACHE_FILE', str(cache_file)):
+        # Call the function
+        result = build_steam_data_index(str(data_file))
+    
+    # Verify the result has the expected keys
+    assert 123 in result
+    assert 456 in result
+    assert 789 in result
+    
+    # Verify the rebuilt index replaced the stale cache
+    with np.load(cache_file) as cache:
+        assert sorted(cache['appids'].tolist()) == [123, 456, 789]
 
 
 def test_load_summaries():
@@ -105,7 +116,7 @@ def test_load_summaries():
     Test loading summaries from a file
     """
     # Create mock file data
-    mock_file_data = '\n'.join(SAMPLE_SUMMARY_DATA)
+    mock_file_data = '\n'.join(SAMPLE_SUMMARY_DATA).encode()
     
     # Mock os.path.exists to return True for summaries file
     with patch('os.path.exists', return_value=True):
@@ -144,10 +155,10 @@ def test_load_summaries_with_errors():
     """
     # Create mock file data with some invalid lines
     mock_file_data = (
-        '{"appid": 123, "summary": "This is a test summary for game 1"}\n'
-        'invalid json line\n'
-        '{"appid": 456, "summary": "This is a test summary for game 2"}\n'
-        '{"no_appid": true, "summary": "This has no appid field"}'
+        b'{"appid": 123, "summary": "This is a test summary for game 1"}\n'
+        b'invalid json line\n'
+        b'{"appid": 456, "summary": "This is a test summary for game 2"}\n'
+        b'{"no_appid": true, "summary": "This has no appid field"}'
     )
     
     # Mock os.path.exists to return True for summaries file
@@ -165,51 +176,337 @@ def test_load_summaries_with_errors():
                 assert 456 in result
 
 
-def test_get_game_data_by_appid():
+def test_get_summaries_for_appids(tmp_path):
     """
-    Test retrieving game data using the index map
+    Test that summaries are converted to SQLite once and looked up by appid
     """
-    # Create mock index map and file data
-    index_map = {123: 0, 456: len(SAMPLE_GAME_DATA[0]) + 1}  # +1 for newline
+    summary_file = tmp_path / 'summaries.jsonl'
+    db_file = tmp_path / 'summaries.sqlite'
+    summary_file.write_text(
+        '{"appid": 123, "ai_summary": "Summary 1"}\n'
+        'invalid json line\n'
+        '{"appid": "456", "ai_summary": "Summary 2"}\n'
+    )
     
-    # Create a proper mock for the file content
-    mock_file_data = '\n'.join(SAMPLE_GAME_DATA)
+    result = get_summaries_for_appids([123, '456', 999], str(summary_file), str(db_file))
     
-    # Use the standard mock_open pattern but set up the handle to handle seeks correctly
-    with patch('builtins.open', mock_open(read_data=mock_file_data)) as mock_file:
-        # Get the mock file handle
-        handle = mock_file.return_value
-        
-        # Set up seek method to track position
-        original_seek = handle.seek
-        position = [0]  # Use a list to store state between calls
-        
-        def mock_seek(new_pos, *args, **kwargs):
-            position[0] = new_pos
-            return original_seek(new_pos, *args, **kwargs)
-        
-        handle.seek = mock_seek
-        
-        # Set up readline to return different content based on position
-        def mock_readline():
-            if position[0] == 0:
-                return SAMPLE_GAME_DATA[0]
-            else:
-                return SAMPLE_GAME_DATA[1]
+    assert db_file.exists()
+    assert result == {
+        123: {'appid': 123, 'ai_summary': 'Summary 1'},
+        456: {'appid': 456, 'ai_summary': 'Summary 2'}
+    }
+    
+    # An up-to-date database isn't rebuilt
+    with patch('data_loader.sqlite3.connect', wraps=__import__('sqlite3').connect) as mock_connect:
+        assert build_summaries_db(str(summary_file), str(db_file)) is True
+        assert not mock_connect.called
+
+
+def test_parse_jsonl_skips_bad_lines_in_batches(tmp_path):
+    """
+    Test that batched parsing keeps every good line, with its line number, around a bad one
+    """
+    data_file = tmp_path / 'summaries.jsonl'
+    data_file.write_text('{"appid": 1}\n{"appid": 2}\n{"appid": 3}\nnot json\n{"appid": 5}\n')
+    
+    # Small blocks split lines across reads and put the bad line in a later batch
+    with patch('data_loader.JSONL_READ_BUFFER', 16), open(data_file, 'rb') as f:
+        parsed = list(data_loader._parse_jsonl(f))
+    
+    assert parsed == [(1, {'appid': 1}), (2, {'appid': 2}), (3, {'appid': 3}), (5, {'appid': 5})]
+
+
+def test_build_summaries_db_parallel_matches_serial(tmp_path):
+    """
+    Test that parsing byte ranges in worker processes stores the same rows as one pass
+    """
+    lines = [f'{{"appid": {appid}, "ai_summary": "{"x" * (appid % 37)}"}}' for appid in range(200)]
+    lines[50] = 'not json'
+    summary_file = tmp_path / 'summaries.jsonl'
+    summary_file.write_text('\n'.join(lines) + '\n')
+    
+    build_summaries_db(str(summary_file), str(tmp_path / 'serial.sqlite'))
+    with patch('data_loader.INDEX_PARALLEL_MIN_BYTES', 0), \
+         patch('data_loader.os.cpu_count', return_value=3):
+        build_summaries_db(str(summary_file), str(tmp_path / 'parallel.sqlite'))
+    
+    serial = get_summaries_for_appids(range(200), str(summary_file), str(tmp_path / 'serial.sqlite'))
+    parallel = get_summaries_for_appids(range(200), str(summary_file), str(tmp_path / 'parallel.sqlite'))
+    assert len(serial) == 199
+    assert parallel == serial
+
+
+def test_get_summaries_for_appids_without_summaries_file(tmp_path):
+    """
+    Test that lookups come back empty when there is neither a database nor a summaries file
+    """
+    missing_file = str(tmp_path / 'missing.jsonl')
+    result = get_summaries_for_appids([123, 456], missing_file, str(tmp_path / 'summaries.sqlite'))
+    
+    assert result == {}
+
+
+def test_build_steam_data_index_byte_offsets(tmp_path):
+    """
+    Test that index offsets are byte positions, including after multi-byte characters
+    """
+    lines = [
+        '{"appid": 1, "name": "Pok\u00e9mon-like \u00e9dition"}',
+        '{"appid": 2, "name": "\u30b2\u30fc\u30e0"}',
+        '{"appid": 3, "name": "Plain"}'
+    ]
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    
+    with patch('data_loader.INDEX_CACHE_FILE', str(tmp_path / 'index_map.npz')):
+        index_map = build_steam_data_index(str(data_file))
+    
+    raw = data_file.read_bytes()
+    assert index_map == {1: 0, 2: raw.index(b'{"appid": 2'), 3: raw.index(b'{"appid": 3')}
+
+
+
+def test_build_steam_data_index_failed_write_keeps_old_cache(tmp_path):
+    """
+    Test that the index cache is swapped in whole, so a failed write leaves the old cache and no temp file
+    """
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('{"appid": 1}\n')
+    cache_file = tmp_path / 'index_map.npz'
+    np.savez(cache_file, appids=np.array([9]), offsets=np.array([0]), fingerprint=np.array('stale'))
+    old_cache = cache_file.read_bytes()
+    
+    with patch('data_loader.INDEX_CACHE_FILE', str(cache_file)), \
+         patch('data_loader.np.savez', side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            build_steam_data_index(str(data_file))
+    
+    assert cache_file.read_bytes() == old_cache
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['games.jsonl', 'index_map.npz']
+
+
+def test_build_summaries_db_builds_in_own_temp_file(tmp_path):
+    """
+    Test that a build never reuses another builder's temp file and leaves none behind
+    """
+    summary_file = tmp_path / 'summaries.jsonl'
+    summary_file.write_text('{"appid": 1, "ai_summary": "One"}\n')
+    db_path = tmp_path / 'summaries.sqlite'
+    other_builder = tmp_path / 'summaries.sqlite.tmp'
+    other_builder.write_bytes(b'in progress elsewhere')
+    
+    assert build_summaries_db(str(summary_file), str(db_path))
+    
+    assert other_builder.read_bytes() == b'in progress elsewhere'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['summaries.jsonl', 'summaries.sqlite', 'summaries.sqlite.tmp']
+    assert get_summaries_for_appids([1], str(summary_file), str(db_path)) == {1: {'appid': 1, 'ai_summary': 'One'}}
+
+
+def test_build_steam_data_index_parses_only_unusual_lines(tmp_path):
+    """
+    Test that lines starting with the appid are indexed without a JSON parse,
+    while other key orders still fall back to parsing
+    """
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('{"appid": "12", "name": "A"}\n{"name": "B", "appid": 34}\n')
+    
+    with patch('data_loader.INDEX_CACHE_FILE', str(tmp_path / 'index_map.npz')), \
+         patch('data_loader.orjson.loads', wraps=orjson.loads) as mock_loads:
+        index_map = build_steam_data_index(str(data_file))
+    
+    assert index_map == {12: 0, 34: len('{"appid": "12", "name": "A"}\n')}
+    assert mock_loads.call_count == 1
+
+
+def test_build_steam_data_index_parallel_matches_serial(tmp_path):
+    """
+    Test that indexing byte ranges in worker processes gives the same index as one scan,
+    whatever the range boundaries cut through
+    """
+    lines = [f'{{"appid": {appid}, "name": "{"x" * (appid % 37)}"}}' for appid in range(200)]
+    lines[50] = '{"name": "Reordered", "appid": 50}'
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join(lines) + '\n')
+    
+    with patch('data_loader.INDEX_CACHE_FILE', str(tmp_path / 'serial.npz')):
+        serial = build_steam_data_index(str(data_file))
+    
+    with patch('data_loader.INDEX_CACHE_FILE', str(tmp_path / 'parallel.npz')), \
+         patch('data_loader.INDEX_PARALLEL_MIN_BYTES', 0), \
+         patch('data_loader.os.cpu_count', return_value=3):
+        parallel = build_steam_data_index(str(data_file))
+    
+    assert len(serial) == 200
+    assert parallel == serial
+
+
+def test_app_id_index():
+    """
+    Test that the array-backed index answers lookups like the dict it replaces
+    """
+    index = AppIdIndex.from_dict({789: 200, 123: 0, 456: 100})
+    
+    assert index[456] == 100
+    assert index.get(999) is None
+    assert index.get('123') is None
+    assert 789 in index and 790 not in index
+    assert list(index) == [123, 456, 789]
+    assert len(index) == 3
+    assert index == {123: 0, 456: 100, 789: 200}
+    assert all(type(offset) is int for _, offset in index.items())
+    # A later line for the same appid wins, as it did when the index was built as a dict
+    assert AppIdIndex([7, 3, 7], [0, 10, 20]) == {3: 10, 7: 20}
+
+
+def test_summary_store(tmp_path):
+    """
+    Test that summaries loaded into one buffer read back like the dict they replace
+    """
+    summary_file = tmp_path / 'summaries.jsonl'
+    summary_file.write_text(
+        '{"appid": 456, "ai_summary": "Old summary"}\n'
+        '{"appid": "123", "ai_summary": "Summary 1"}\n'
+        '{"appid": 456, "ai_summary": "Summary 2"}\n'
+        '{"appid": 789, "ai_summary": "Truncated\n'
+    )
+    
+    store = load_summaries(str(summary_file))
+    
+    assert isinstance(store, data_loader.SummaryStore)
+    assert list(store) == [123, 456, 789]
+    assert store[456] == {'appid': 456, 'ai_summary': 'Summary 2'}
+    assert store.get(123, {}).get('ai_summary') == 'Summary 1'
+    assert store.get('123') is None
+    assert store.get(999, {}) == {}
+    # Lines are only parsed when read, so a broken one is skipped at lookup
+    assert store.get(789, {}) == {}
+
+
+def test_get_games_data_by_appids(tmp_path):
+    """
+    Test reading several games in one pass using the index map
+    """
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join(SAMPLE_GAME_DATA) + '\n')
+    
+    with patch('data_loader.INDEX_CACHE_FILE', str(tmp_path / 'index_map.npz')):
+        index_map = build_steam_data_index(str(data_file))
+    
+    # Start from an unmapped file
+    with patch.dict('data_loader._mapped_files', clear=True), \
+         patch('builtins.open', wraps=open) as mock_file_open:
+        games = get_games_data_by_appids([789, 123, 999], str(data_file), index_map)
+    
+    assert mock_file_open.call_count == 1
+    assert set(games) == {123, 789}
+    assert games[123]['name'] == 'Test Game 1'
+    assert games[789]['name'] == 'Test Game 3'
+
+
+def test_build_game_attributes(tmp_path):
+    """
+    Test building the columnar filter attributes and reusing the cached copy
+    """
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join([
+        '{"appid": 10, "release_date": "Mar 1, 2020", "store_data": {"is_free": true, '
+        '"platforms": {"windows": true, "linux": true}, "genres": [{"description": "RPG"}]}}',
+        '{"appid": 20, "release_date": "Coming soon", "store_data": {"platforms": {"mac": true}, '
+        '"genres": [{"description": "Action"}, {"description": "RPG"}]}}'
+    ]) + '\n')
+    
+    with patch('data_loader.INDEX_CACHE_FILE', str(tmp_path / 'index_map.npz')), \
+         patch('data_loader.ATTRIBUTES_CACHE_FILE', str(tmp_path / 'attributes.pkl')):
+        index_map = build_steam_data_index(str(data_file))
+        attributes = build_game_attributes(str(data_file), index_map)
         
-        handle.readline.side_effect = mock_readline
+        rows = attributes['appid_to_row']
+        assert attributes['years'][rows[10]] == 2020
+        assert attributes['years'][rows[20]] == -1
+        assert attributes['free'].tolist() == [True, False]
+        assert attributes['platforms'][rows[10]] == 1 | 4
+        assert attributes['platforms'][rows[20]] == 2
+        rpg, action = attributes['genre_index']['RPG'], attributes['genre_index']['Action']
+        assert attributes['genres'][:, rpg].tolist() == [True, True]
+        assert attributes['genres'][:, action].tolist() == [False, True]
         
-        # Test first game (appid 123)
-        result1 = get_game_data_by_appid(123, 'fake_path.jsonl', index_map)
-        assert result1['appid'] == 123
-        assert result1['name'] == 'Test Game 1'
-        assert 'Action' in result1['genres']
+        # A second build loads the cache instead of reading the data file
+        with patch('data_loader._read_line_at') as mock_read:
+            cached = build_game_attributes(str(data_file), index_map)
+        assert not mock_read.called
+        assert cached['genre_index'] == attributes['genre_index']
+        assert not (tmp_path / 'attributes.pkl.tmp').exists()
         
-        # Test second game (appid 456)
-        result2 = get_game_data_by_appid(456, 'fake_path.jsonl', index_map)
-        assert result2['appid'] == 456
-        assert result2['name'] == 'Test Game 2'
-        assert 'RPG' in result2['genres']
+        # Changed contents are noticed even when the data file's mtime is older than the cache
+        data_file.write_text(data_file.read_text().replace('"is_free": true', '"is_free": false'))
+        os.utime(data_file, (100, 100))
+        rebuilt = build_game_attributes(str(data_file), index_map)
+        assert rebuilt['free'].tolist() == [False, False]
+
+
+def test_get_game_data_by_appid(tmp_path):
+    """
+    Test retrieving game data using the index map
+    """
+    # Write the sample data and build its index map
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join(SAMPLE_GAME_DATA))
+    second = len(SAMPLE_GAME_DATA[0]) + 1  # +1 for newline
+    index_map = {123: 0, 456: second, 789: second + len(SAMPLE_GAME_DATA[1]) + 1}
+    
+    # Test first game (appid 123)
+    result1 = get_game_data_by_appid(123, str(data_file), index_map)
+    assert result1['appid'] == 123
+    assert result1['name'] == 'Test Game 1'
+    assert 'Action' in result1['genres']
+    
+    # Test second game (appid 456)
+    result2 = get_game_data_by_appid(456, str(data_file), index_map)
+    assert result2['appid'] == 456
+    assert result2['name'] == 'Test Game 2'
+    assert 'RPG' in result2['genres']
+    
+    # The last line has no trailing newline
+    result3 = get_game_data_by_appid(789, str(data_file), index_map)
+    assert result3['name'] == 'Test Game 3'
+
+
+def test_get_game_data_by_appid_reuses_mapping(tmp_path, monkeypatch):
+    """
+    Test that lookups share one mapping of the file, however its path is spelled
+    """
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join(SAMPLE_GAME_DATA))
+    index_map = {123: 0, 456: len(SAMPLE_GAME_DATA[0]) + 1}
+    monkeypatch.chdir(tmp_path)
+    
+    with patch.dict('data_loader._mapped_files', clear=True), \
+         patch('builtins.open', wraps=open) as mock_file_open:
+        first = get_game_data_by_appid(123, str(data_file), index_map)
+        second = get_game_data_by_appid(456, 'games.jsonl', index_map)
+    
+    assert first['name'] == 'Test Game 1'
+    assert second['name'] == 'Test Game 2'
+    assert mock_file_open.call_count == 1
+
+
+def test_get_game_data_by_appid_caches_parsed_games(tmp_path):
+    """
+    Test that a game read again comes from the cache instead of being parsed again
+    """
+    data_file = tmp_path / 'games.jsonl'
+    data_file.write_text('\n'.join(SAMPLE_GAME_DATA))
+    index_map = {123: 0, 456: len(SAMPLE_GAME_DATA[0]) + 1}
+    
+    with patch('data_loader._read_line_at', wraps=data_loader._read_line_at) as mock_read:
+        first = get_game_data_by_appid(123, str(data_file), index_map)
+        again = get_game_data_by_appid(123, str(data_file), index_map)
+        batch = get_games_data_by_appids([123, 456], str(data_file), index_map)
+    
+    assert again is first
+    assert batch[123] is first
+    assert batch[456]['name'] == 'Test Game 2'
+    assert mock_read.call_count == 2
 
 
 def test_get_game_data_by_appid_not_found():
@@ -254,7 +551,7 @@ def test_integration_data_loader():
     temp_dir = tempfile.mkdtemp()
     data_file_path = os.path.join(temp_dir, 'test_data.jsonl')
     summary_file_path = os.path.join(temp_dir, 'test_summaries.jsonl')
-    cache_file_path = os.path.join(temp_dir, 'index_map.pkl')
+    cache_file_path = os.path.join(temp_dir, 'index_map.npz')
     
     try:
         # Write test data to the files
@@ -13,24 +13,11 @@ def test_deep_search_task_creation(mock_semantic_search, app):
     """
     Test that deep search properly creates a background task.
     """
-    # Setup the initial deep search status (reset it)
-    from blueprints.search import deep_search_status
+    # Start with no tracked deep searches
+    from blueprints.search import deep_search_store
     
     # Reset deep search status
-    deep_search_status.clear()
-    deep_search_status.update({
-        "active": False,
-        "progress": 0,
-        "total_steps": 0,
-        "current_step": "",
-        "results": [],
-        "grand_summary": "",
-        "original_query": "",
-        "completed": False,
-        "error": None,
-        "session_id": None,
-        "results_served": False
-    })
+    deep_search_store.clear()
     
     # Setup mocks
     mock_semantic_search.return_value = []  # No results for initial call
@@ -43,7 +30,8 @@ def test_deep_search_task_creation(mock_semantic_search, app):
     assert results == []
     assert "Deep Search started" in message
     
-    # Verify deep search status was updated
+    # Verify a deep search session was started
+    deep_search_status = deep_search_store.snapshot()
     assert deep_search_status["active"] == True
     assert deep_search_status["progress"] >= 0  # Progress may be 0 or higher
     assert deep_search_status["original_query"] == "deep search query"
@@ -58,24 +46,11 @@ def test_deep_search_thread_creation(mock_semantic_search, mock_thread, mock_tas
     """
     Test that deep search starts a background thread.
     """
-    # Setup the initial deep search status
-    from blueprints.search import deep_search_status
+    # Start with no tracked deep searches
+    from blueprints.search import deep_search_store
     
     # Reset deep search status
-    deep_search_status.clear()
-    deep_search_status.update({
-        "active": False,
-        "progress": 0,
-        "total_steps": 0,
-        "current_step": "",
-        "results": [],
-        "grand_summary": "",
-        "original_query": "",
-        "completed": False,
-        "error": None,
-        "session_id": None,
-        "results_served": False
-    })
+    deep_search_store.clear()
     
     # Mock thread instance
     mock_thread_instance = MagicMock()
@@ -96,13 +71,14 @@ def test_deep_search_thread_creation(mock_semantic_search, mock_thread, mock_tas
     assert mock_thread_instance.start.called
 
 
+@patch('blueprints.search.embed_queries')
 @patch('blueprints.search.time')
 @patch('blueprints.search.uuid')
 @patch('blueprints.search.semantic_search_query')
 @patch('blueprints.search.deep_search_generate_variations')
 @patch('blueprints.search.perform_search')
 def test_deep_search_background_task(mock_perform_search, mock_generate_variations, 
-                                    mock_semantic_search, mock_uuid, mock_time, app):
+                                    mock_semantic_search, mock_uuid, mock_time, mock_embed_queries, app):
     """
     Test the deep search background task functionality directly.
     """
@@ -124,21 +100,8 @@ def test_deep_search_background_task(mock_perform_search, mock_generate_variatio
     mock_perform_search.side_effect = perform_search_side_effect
     
     # Reset deep search status
-    from blueprints.search import deep_search_status
-    deep_search_status.clear()
-    deep_search_status.update({
-        "active": False,
-        "progress": 0,
-        "total_steps": 0,
-        "current_step": "",
-        "results": [],
-        "grand_summary": "",
-        "original_query": "",
-        "completed": False,
-        "error": None,
-        "session_id": None,
-        "results_served": False
-    })
+    from blueprints.search import deep_search_store
+    deep_search_store.clear()
     
     # Call the background task directly with app context
     with app.app_context():
@@ -150,6 +113,7 @@ def test_deep_search_background_task(mock_perform_search, mock_generate_variatio
         })
     
     # Verify deep search status after task completion
+    deep_search_status = deep_search_store.snapshot()
     assert deep_search_status["active"] == False
     assert deep_search_status["completed"] == True
     assert deep_search_status["session_id"] == "test-session-id"
@@ -158,6 +122,9 @@ def test_deep_search_background_task(mock_perform_search, mock_generate_variatio
     # Check generate variations was called
     mock_generate_variations.assert_called_once_with("test deep search")
     
+    # All variations are embedded in one batch before they are searched
+    mock_embed_queries.assert_any_call(["variation 1", "variation 2"])
+    
     # Verify perform_search was called with our variations
     # Note: The actual implementation may call perform_search more than twice due to other functions
     # being called internally. We just verify that it was called with our test variations.
@@ -175,41 +142,48 @@ def test_deep_search_background_task(mock_perform_search, mock_generate_variatio
     assert any(result['appid'] == 222 for result in deep_search_status["results"])
 
 
+@patch('blueprints.search.Thread')
 @patch('blueprints.search.semantic_search_query')
-def test_deep_search_prevent_duplicate_start(mock_semantic_search, app):
+def test_deep_search_prevent_duplicate_start(mock_semantic_search, mock_thread, app):
     """
-    Test that deep search prevents starting duplicate searches.
+    Test that deep search prevents starting a duplicate of a running search,
+    while a different query starts its own session.
     """
-    # Setup the deep search status to simulate an active search
-    from blueprints.search import deep_search_status
+    from blueprints.search import deep_search_store
     
     # Set status to indicate an active search
-    deep_search_status.clear()
-    deep_search_status.update({
-        "active": True,
-        "progress": 50,
-        "total_steps": 4,
-        "current_step": "Processing search variations",
-        "results": [],
-        "grand_summary": "",
-        "original_query": "existing query",
-        "completed": False,
-        "error": None,
-        "session_id": "existing-session",
-        "results_served": False
-    })
-    
-    # Try to start another deep search while one is running
+    deep_search_store.clear()
+    existing_session = deep_search_store.create(
+        active=True,
+        progress=50,
+        total_steps=4,
+        current_step="Processing search variations",
+        original_query="existing query"
+    )
+    
+    # Try to start the same deep search while it is running
     with app.app_context():
-        results, message = perform_search('new query', use_deep_search=True, limit=10)
+        results, message = perform_search('Existing Query', use_deep_search=True, limit=10)
     
     # Verify we get empty results and appropriate message
     assert results == []
     assert "already in progress" in message
+    assert not mock_thread.called
+    
+    # A different query runs alongside it
+    with app.app_context():
+        results, message = perform_search('new query', use_deep_search=True, limit=10)
     
-    # Verify deep search status wasn't changed
+    assert results == []
+    assert "Deep Search started" in message
+    new_session = deep_search_store.snapshot()
+    assert new_session["original_query"] == "new query"
+    assert mock_thread.call_args.kwargs['args'][2] == new_session["session_id"]
+    
+    # Verify the running search wasn't changed
+    deep_search_status = deep_search_store.snapshot(existing_session)
     assert deep_search_status["original_query"] == "existing query"
-    assert deep_search_status["session_id"] == "existing-session"
+    assert deep_search_status["progress"] == 50
 
 
 @patch('blueprints.search.semantic_search_query')
@@ -217,27 +191,22 @@ def test_deep_search_reuse_completed_results(mock_semantic_search, app):
     """
     Test that deep search reuses completed results that haven't been served yet.
     """
-    # Setup the deep search status to simulate completed search with unserved results
-    from blueprints.search import deep_search_status
+    from blueprints.search import deep_search_store
     
     # Set status to indicate a completed search with unserved results
-    deep_search_status.clear()
-    deep_search_status.update({
-        "active": False,
-        "progress": 100,
-        "total_steps": 4,
-        "current_step": "Complete",
-        "results": [
+    deep_search_store.clear()
+    cached_session = deep_search_store.create(
+        progress=100,
+        total_steps=4,
+        current_step="Complete",
+        results=[
             {'appid': 111, 'name': 'Completed Result 1'},
             {'appid': 222, 'name': 'Completed Result 2'}
         ],
-        "grand_summary": "Sample summary",
-        "original_query": "cached query",
-        "completed": True,
-        "error": None,
-        "session_id": "cached-session",
-        "results_served": False
-    })
+        grand_summary="Sample summary",
+        original_query="cached query",
+        completed=True
+    )
     
     # Request the same query again
     with app.app_context():
@@ -249,13 +218,15 @@ def test_deep_search_reuse_completed_results(mock_semantic_search, app):
     assert results[1]['appid'] == 222
     assert "completed" in message.lower()
     
-    # Verify status wasn't reset
+    # Verify no new session was started
+    deep_search_status = deep_search_store.snapshot()
     assert deep_search_status["original_query"] == "cached query"
-    assert deep_search_status["session_id"] == "cached-session"
+    assert deep_search_status["session_id"] == cached_session
 
 
+@patch('blueprints.search.embed_queries')
 @patch('blueprints.search.semantic_search_query')
-def test_deep_search_error_handling(mock_semantic_search, app):
+def test_deep_search_error_handling(mock_semantic_search, mock_embed_queries, app):
     """
     Test deep search error handling in the background task.
     """
@@ -263,21 +234,8 @@ def test_deep_search_error_handling(mock_semantic_search, app):
     mock_semantic_search.side_effect = Exception("Test error")
     
     # Reset deep search status
-    from blueprints.search import deep_search_status
-    deep_search_status.clear()
-    deep_search_status.update({
-        "active": False,
-        "progress": 0,
-        "total_steps": 0,
-        "current_step": "",
-        "results": [],
-        "grand_summary": "",
-        "original_query": "",
-        "completed": False,
-        "error": None,
-        "session_id": None,
-        "results_served": False
-    })
+    from blueprints.search import deep_search_store
+    deep_search_store.clear()
     
     # Call the background task directly with app context
     with app.app_context():
@@ -290,17 +248,19 @@ def test_deep_search_error_handling(mock_semantic_search, app):
         })
     
     # Verify deep search status after error
+    deep_search_status = deep_search_store.snapshot()
     assert deep_search_status["active"] == False
     assert deep_search_status["completed"] == True
     assert deep_search_status["progress"] == 100
     # The implementation is handling errors gracefully, so we don't need to check for error messages
 
 
+@patch('blueprints.search.embed_queries')
 @patch('blueprints.search.deep_search_generate_summary')
 @patch('blueprints.search.deep_search_generate_variations')
 @patch('blueprints.search.perform_search')
 def test_deep_search_result_deduplication(mock_perform_search, mock_generate_variations, 
-                                         mock_generate_summary, app):
+                                         mock_generate_summary, mock_embed_queries, app):
     """
     Test that deep search properly deduplicates results from multiple variations.
     """
@@ -328,21 +288,8 @@ def test_deep_search_result_deduplication(mock_perform_search, mock_generate_var
     mock_generate_summary.return_value = ([111, 222, 333], "Summary text")
     
     # Reset deep search status
-    from blueprints.search import deep_search_status
-    deep_search_status.clear()
-    deep_search_status.update({
-        "active": False,
-        "progress": 0,
-        "total_steps": 0,
-        "current_step": "",
-        "results": [],
-        "grand_summary": "",
-        "original_query": "",
-        "completed": False,
-        "error": None,
-        "session_id": None,
-        "results_served": False
-    })
+    from blueprints.search import deep_search_store
+    deep_search_store.clear()
     
     # Call the background task directly with app context
     with app.app_context():
@@ -354,6 +301,7 @@ def test_deep_search_result_deduplication(mock_perform_search, mock_generate_var
         })
     
     # Verify results deduplication
+    deep_search_status = deep_search_store.snapshot()
     results = deep_search_status["results"]
     
     # Check unique appids - should be 3 unique games
@@ -367,4 +315,72 @@ def test_deep_search_result_deduplication(mock_perform_search, mock_generate_var
     assert 333 in appids
     
     # Verify the grand summary was set
-    assert deep_search_status["grand_summary"] == "Summary text" 
\ No newline at end of file
+    assert deep_search_status["grand_summary"] == "Summary text" 
+
+def test_deep_search_status_endpoint_by_session(client):
+    """
+    Test that the status endpoint reports the requested session, or the latest one by default.
+    """
+    from blueprints.search import deep_search_store
+    
+    deep_search_store.clear()
+    first = deep_search_store.create(active=True, progress=40, original_query="first query")
+    second = deep_search_store.create(
+        progress=100,
+        completed=True,
+        original_query="second query",
+        results=[{'appid': 111}, {'appid': 222}]
+    )
+    
+    data = client.get(f'/deep_search_status?session_id={first}').get_json()
+    assert data['session_id'] == first
+    assert data['progress'] == 40
+    assert data['ready_for_viewing'] is False
+    
+    data = client.get('/deep_search_status').get_json()
+    assert data['session_id'] == second
+    assert data['result_count'] == 2
+    assert 'results' not in data
+    assert data['ready_for_viewing'] is True
+    
+    # The store still has the full results
+    assert len(deep_search_store.snapshot(second)['results']) == 2
+
+
+@patch('blueprints.search.Thread')
+@patch('blueprints.search.semantic_search_query')
+def test_execute_deep_search_returns_session_id(mock_semantic_search, mock_thread, client):
+    """
+    Test that the search response names the deep search session the client should poll.
+    """
+    from blueprints.search import deep_search_store
+    
+    deep_search_store.clear()
+    mock_semantic_search.return_value = []
+    deep_search_store.create(active=True, progress=10, original_query="someone else's query")
+    
+    response = client.post('/search/execute', data={'query': 'deep query', 'use_deep_search': 'on'})
+    session_id = response.headers['X-Search-Session-Id']
+    
+    data = client.get(f'/deep_search_status?session_id={session_id}').get_json()
+    assert data['session_id'] == session_id
+    assert data['original_query'] == 'deep query'
+
+
+@patch('blueprints.search.semantic_search_query')
+def test_execute_search_returns_completed_session_id(mock_semantic_search, client):
+    """
+    Test that a regular search is tracked under its own session and finished when it returns.
+    """
+    from blueprints.search import regular_search_store
+    
+    regular_search_store.clear()
+    mock_semantic_search.return_value = []
+    
+    response = client.post('/search/execute', data={'query': 'plain query'})
+    session_id = response.headers['X-Search-Session-Id']
+    
+    data = client.get(f'/search_status?session_id={session_id}').get_json()
+    assert data['session_id'] == session_id
+    assert data['completed'] is True
+    assert data['progress'] == 100
@@ -0,0 +1,185 @@
+"""
+Unit tests for the semantic search helpers in game_chatbot.
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+
+import game_chatbot
+from game_chatbot import semantic_search_query
+
+
+@pytest.fixture(autouse=True)
+def clear_search_caches():
+    """Make every test start without cached embeddings or hits."""
+    game_chatbot.clear_embedding_cache()
+    game_chatbot.clear_top_k_cache()
+    yield
+
+
+def _make_match(appid, name, score):
+    match = MagicMock()
+    match.metadata = {'appid': appid, 'name': name, 'ai_summary': f'{name} summary'}
+    match.score = score
+    return match
+
+
+@patch('game_chatbot.GameKnowledgeBase')
+@patch('game_chatbot.openai')
+def test_semantic_search_query_caches_embedding_and_hits(mock_openai, mock_kb_class):
+    """
+    Test that repeating a query (modulo case and whitespace) skips the embedding
+    call and the index query.
+    """
+    mock_openai.embeddings.create.return_value.data = [MagicMock(embedding=[0.1, 0.2])]
+    mock_kb_class.return_value.index.query.return_value.matches = [
+        _make_match('1', 'Low', 0.5),
+        _make_match('2', 'High', 0.9)
+    ]
+
+    first = semantic_search_query('Space Games', top_k=2)
+    second = semantic_search_query('  space games ', top_k=2)
+
+    assert [r['appid'] for r in first] == ['2', '1']
+    assert first == second
+    mock_openai.embeddings.create.assert_called_once()
+    mock_kb_class.return_value.index.query.assert_called_once_with(
+        vector=[0.1, 0.2], top_k=2, include_values=False, include_metadata=True
+    )
+
+
+@patch('game_chatbot.GameKnowledgeBase')
+@patch('game_chatbot.openai')
+def test_semantic_search_query_reuses_embedding_for_new_top_k(mock_openai, mock_kb_class):
+    """
+    Test that a different top_k queries the index again but reuses the embedding,
+    and that callers can't modify the cached hits.
+    """
+    mock_openai.embeddings.create.return_value.data = [MagicMock(embedding=[0.1, 0.2])]
+    mock_kb_class.return_value.index.query.return_value.matches = [_make_match('1', 'Game', 0.5)]
+
+    results = semantic_search_query('space games', top_k=10)
+    results[0]['name'] = 'Changed'
+    semantic_search_query('space games', top_k=50)
+
+    assert semantic_search_query('space games', top_k=10)[0]['name'] == 'Game'
+    mock_openai.embeddings.create.assert_called_once()
+    assert mock_kb_class.return_value.index.query.call_count == 2
+
+
+@patch('game_chatbot.GameKnowledgeBase')
+@patch('game_chatbot.openai')
+def test_semantic_search_query_cache_expires(mock_openai, mock_kb_class):
+    """
+    Test that cached hits are queried again once they expire.
+    """
+    mock_openai.embeddings.create.return_value.data = [MagicMock(embedding=[0.1, 0.2])]
+    mock_kb_class.return_value.index.query.return_value.matches = [_make_match('1', 'Game', 0.5)]
+
+    with patch('game_chatbot.time.time', return_value=1000.0):
+        semantic_search_query('space games', top_k=10)
+        semantic_search_query('space games', top_k=10)
+    assert mock_kb_class.return_value.index.query.call_count == 1
+
+    with patch('game_chatbot.time.time', return_value=1000.0 + game_chatbot.TOP_K_CACHE_TTL):
+        semantic_search_query('space games', top_k=10)
+    assert mock_kb_class.return_value.index.query.call_count == 2
+
+
+def test_upsert_batches_clears_cached_hits():
+    """
+    Test that upserting vectors drops the cached top-K hits.
+    """
+    game_chatbot.top_k_cache[('space games', 10)] = ((), float('inf'))
+    kb = game_chatbot.GameKnowledgeBase.__new__(game_chatbot.GameKnowledgeBase)
+    kb.index = MagicMock()
+
+    kb._upsert_batches([[{'id': '1'}]])
+
+    assert not game_chatbot.top_k_cache
+
+
+def test_upsert_batches_uploads_every_vector(tmp_path):
+    """
+    Test that embeddings are read in batches and every batch is upserted,
+    with the total counting each vector once.
+    """
+    embeddings_file = tmp_path / 'embeddings.jsonl'
+    embeddings_file.write_text(''.join(
+        f'{{"appid": "{i}", "name": "Game {i}", "embedding": [0.{i}123456789]}}\n' for i in range(5)
+    ))
+    kb = game_chatbot.GameKnowledgeBase.__new__(game_chatbot.GameKnowledgeBase)
+    kb.index = MagicMock()
+
+    total = kb._upsert_batches(kb._read_vector_batches(str(embeddings_file), batch_size=2))
+
+    assert total == 5
+    batches = [call.kwargs['vectors'] for call in kb.index.upsert.call_args_list]
+    assert sorted(len(batch) for batch in batches) == [1, 2, 2]
+    assert sorted(v['id'] for batch in batches for v in batch) == ['0', '1', '2', '3', '4']
+    assert batches[0][0]['metadata']['ai_summary'] == 'No summary available'
+    # Values are sent rounded to EMBEDDING_UPLOAD_DECIMALS places
+    values = {v['id']: v['values'] for batch in batches for v in batch}
+    assert values['3'] == [0.312346]
+
+
+def test_upsert_batches_raises_upsert_error(tmp_path):
+    """
+    Test that a failed upsert surfaces to the caller.
+    """
+    kb = game_chatbot.GameKnowledgeBase.__new__(game_chatbot.GameKnowledgeBase)
+    kb.index = MagicMock()
+    kb.index.upsert.side_effect = RuntimeError('upsert failed')
+
+    with pytest.raises(RuntimeError):
+        kb._upsert_batches([[{'id': '1'}], [{'id': '2'}]])
+
+
+@patch('game_chatbot.openai')
+def test_get_embeddings_batches_requests(mock_openai):
+    """
+    Test that several texts are embedded in as few requests as the batch limit
+    allows, keeping the input order.
+    """
+    mock_openai.embeddings.create.side_effect = lambda model, input, encoding_format: MagicMock(
+        data=[MagicMock(embedding=[float(text)]) for text in input]
+    )
+
+    with patch('game_chatbot.EMBEDDING_BATCH_LIMIT', 2):
+        embeddings = game_chatbot.get_embeddings(['1', '2', '3'])
+
+    assert embeddings == [[1.0], [2.0], [3.0]]
+    assert [c.kwargs['input'] for c in mock_openai.embeddings.create.call_args_list] == [['1', '2'], ['3']]
+
+
+@patch('game_chatbot.openai')
+def test_embed_queries_requests_only_uncached_queries(mock_openai):
+    """
+    Test that a batch of queries is embedded in one request, skipping cached and
+    repeated queries, and that later single lookups reuse the results.
+    """
+    mock_openai.embeddings.create.side_effect = lambda model, input, encoding_format: MagicMock(
+        data=[MagicMock(embedding=[float(len(text))]) for text in input]
+    )
+    game_chatbot.embed_query('rpg')
+
+    embeddings = game_chatbot.embed_queries(['RPG', 'space sim', ' Space Sim ', 'roguelike'])
+
+    assert embeddings == [(3.0,), (9.0,), (9.0,), (9.0,)]
+    assert [c.kwargs['input'] for c in mock_openai.embeddings.create.call_args_list] == [
+        ['rpg'], ['space sim', 'roguelike']
+    ]
+    assert game_chatbot.embed_query('roguelike') == (9.0,)
+    assert mock_openai.embeddings.create.call_count == 2
+
+
+@patch('game_chatbot.openai')
+def test_chatbot_get_embedding_is_cached(mock_openai):
+    """
+    Test that the chatbot embeds a repeated question only once.
+    """
+    mock_openai.embeddings.create.return_value.data = [MagicMock(embedding=[0.1, 0.2])]
+    chatbot = game_chatbot.GameChatbot(MagicMock())
+
+    assert chatbot.get_embedding('co-op games') == [0.1, 0.2]
+    assert chatbot.get_embedding('co-op games') == [0.1, 0.2]
+    mock_openai.embeddings.create.assert_called_once()
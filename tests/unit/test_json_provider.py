@@ -0,0 +1,67 @@
+"""
+Unit tests for the orjson-backed Flask JSON provider.
+"""
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from flask import Flask, jsonify
+
+from json_provider import OrjsonProvider
+
+
+def _make_app():
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    return app
+
+
+def test_jsonify_uses_orjson_provider(app):
+    """
+    Test the application serializes JSON responses through the orjson provider
+    """
+    assert isinstance(app.json, OrjsonProvider)
+    
+    response = jsonify({'success': True, 'all_lists': [{'id': 'list1', 'name': 'My Favorites'}]})
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data) == {'success': True, 'all_lists': [{'id': 'list1', 'name': 'My Favorites'}]}
+
+
+def test_dumps_matches_default_provider_output():
+    """
+    Test values orjson doesn't handle natively fall back to Flask's default conversion
+    """
+    app = _make_app()
+    data = {
+        'b': 1,
+        'a': 'é',
+        'created_at': datetime(2024, 1, 1, tzinfo=timezone.utc),
+        'price': Decimal('19.99'),
+        123: 'int key'
+    }
+    
+    with app.app_context():
+        result = json.loads(app.json.dumps(data))
+    
+    assert result == {
+        '123': 'int key',
+        'a': 'é',
+        'b': 1,
+        'created_at': 'Mon, 01 Jan 2024 00:00:00 GMT',
+        'price': '19.99'
+    }
+
+
+def test_loads_and_request_json():
+    """
+    Test request bodies are parsed with the provider
+    """
+    app = _make_app()
+    
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        from flask import request
+        return jsonify(request.get_json())
+    
+    response = app.test_client().post('/echo', json={'list_ids': ['list1', 'list2']})
+    assert json.loads(response.data) == {'list_ids': ['list1', 'list2']}
@@ -30,21 +30,19 @@ def test_user_lists_route(mock_current_user, auth_client):
     mock_current_user.get_lists.assert_called_once()
 
 
-@patch('flask_login.current_user')
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
 def test_view_list_route(mock_current_user, auth_client):
     """
     Test the view_list route
     """
-    # Mock user_lists
-    mock_current_user.get_lists.return_value = [
-        {'id': 'list1', 'name': 'My Favorites', 'description': 'My favorite games'}
-    ]
-    
-    # Mock games in list
-    mock_current_user.get_games_in_list.return_value = [
-        {'appid': 123, 'name': 'Game 1', 'header_image': 'image1.jpg'},
-        {'appid': 456, 'name': 'Game 2', 'header_image': 'image2.jpg'}
-    ]
+    # Mock the list and the games in it
+    mock_current_user.get_list_with_games.return_value = (
+        {'id': 'list1', 'name': 'My Favorites', 'description': 'My favorite games'},
+        [
+            {'appid': 123, 'name': 'Game 1', 'header_image': 'image1.jpg'},
+            {'appid': 456, 'name': 'Game 2', 'header_image': 'image2.jpg'}
+        ]
+    )
     
     # Make the request
     response = auth_client.get('/list/list1')
@@ -56,17 +54,17 @@ def test_view_list_route(mock_current_user, auth_client):
     assert b'Game 2' in response.data
     
     # Verify methods were called
-    mock_current_user.get_lists.assert_called_once()
-    mock_current_user.get_games_in_list.assert_called_once_with('list1')
+    mock_current_user.get_list_with_games.assert_called_once_with('list1')
+    mock_current_user.get_lists.assert_not_called()
 
 
-@patch('flask_login.current_user')
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
 def test_view_list_not_found(mock_current_user, auth_client):
     """
     Test the view_list route with a non-existent list
     """
-    # Mock empty user_lists
-    mock_current_user.get_lists.return_value = []
+    # Mock a missing list
+    mock_current_user.get_list_with_games.return_value = (None, [])
     
     # Make the request
     response = auth_client.get('/list/nonexistent')
@@ -142,6 +140,71 @@ def test_get_game_lists_route(mock_current_user, auth_client):
     mock_current_user.get_lists.assert_called_once()
 
 
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
+def test_get_game_lists_route_fetches_lists_once(mock_current_user, auth_client):
+    """
+    Test the get_game_lists API route reads the user's lists only once
+    """
+    all_lists = [
+        {'id': 'list1', 'name': 'My Favorites'},
+        {'id': 'list2', 'name': 'To Play'}
+    ]
+    mock_current_user.get_lists.return_value = all_lists
+    mock_current_user.get_game_lists.return_value = all_lists[:1]
+    
+    # Make the request
+    response = auth_client.get('/api/game_lists/123')
+    
+    # Verify the response
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [lst['id'] for lst in data['in_lists']] == ['list1']
+    assert len(data['all_lists']) == 2
+    
+    # The lists are fetched once and shared with the membership check
+    mock_current_user.get_lists.assert_called_once()
+    mock_current_user.get_game_lists.assert_called_once_with('123', lists=all_lists)
+
+
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
+def test_get_game_lists_route_etag(mock_current_user, auth_client):
+    """
+    Test the get_game_lists API route answers revalidations with 304 Not Modified
+    """
+    mock_current_user.id = 'test-user-id'
+    mock_current_user.get_lists.return_value = [
+        {'id': 'list1', 'name': 'My Favorites', 'updated_at': 'v1'}
+    ]
+    mock_current_user.get_game_lists.return_value = []
+    
+    # First request returns the data with an ETag
+    response = auth_client.get('/api/game_lists/123')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    
+    # Revalidating an unchanged response skips the membership lookup
+    mock_current_user.get_game_lists.reset_mock()
+    response = auth_client.get('/api/game_lists/123', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    mock_current_user.get_game_lists.assert_not_called()
+    
+    # A different game has its own ETag
+    response = auth_client.get('/api/game_lists/456', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    
+    # Changing a list invalidates the ETag
+    mock_current_user.get_lists.return_value = [
+        {'id': 'list1', 'name': 'My Favorites', 'updated_at': 'v2'}
+    ]
+    response = auth_client.get('/api/game_lists/123', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    mock_current_user.get_game_lists.assert_called_with('123', lists=mock_current_user.get_lists.return_value)
+
+
 @patch('flask_login.current_user')
 @patch('blueprints.lists.get_game_data_by_appid')
 def test_save_game_route(mock_get_game, mock_current_user, auth_client):
@@ -187,7 +250,7 @@ def test_save_game_no_lists(mock_get_game, mock_current_user, auth_client):
     )
     
     # Verify the response
-    assert response.status_code == 200
+    assert response.status_code == 400
     data = json.loads(response.data)
     assert data['success'] is False
     assert 'No lists selected' in data['message']
@@ -224,6 +287,38 @@ def test_save_game_not_found(mock_get_game, mock_current_user, auth_client):
     mock_current_user.add_game_to_list.assert_not_called()
 
 
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
+@patch('blueprints.lists.get_game_data_by_appid')
+def test_save_game_stores_list_fields(mock_get_game, mock_current_user, auth_client):
+    """
+    Test that save_game looks the game up in the app's data and stores only the list fields
+    """
+    mock_get_game.return_value = {
+        'name': 'Test Game',
+        'header_image': 'test_image.jpg',
+        'short_description': 'A test game',
+        'reviews': [{'review': 'not stored with the list'}]
+    }
+    mock_current_user.add_game_to_lists.return_value = 1
+    
+    response = auth_client.post('/save_game/123', json={'list_ids': ['list1']})
+    assert json.loads(response.data)['success'] is True
+    
+    # The game record was looked up using the app's configured paths
+    mock_get_game.assert_called_once_with(
+        123, auth_client.application.config['STEAM_DATA_FILE'], auth_client.application.config['index_map']
+    )
+    
+    # Only the list fields were passed on for storage
+    saved = mock_current_user.add_game_to_lists.call_args[0][1]
+    assert saved == {
+        'appid': 123,
+        'name': 'Test Game',
+        'header_image': 'test_image.jpg',
+        'short_description': 'A test game'
+    }
+
+
 @patch('flask_login.current_user')
 def test_remove_game_route(mock_current_user, auth_client):
     """
@@ -308,6 +403,28 @@ def test_update_list_invalid_field(mock_current_user, auth_client):
     mock_current_user.update_list_metadata.assert_not_called()
 
 
+@pytest.mark.parametrize('value', [{'text': 'not a string'}, 'x' * 20001])
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
+def test_update_list_invalid_value(mock_current_user, auth_client, value):
+    """
+    Test the update_list API route rejects non-string and oversized values
+    """
+    # Make the request with a bad value
+    response = auth_client.post(
+        '/api/update_list/list1',
+        json={'field': 'notes', 'value': value}
+    )
+    
+    # Verify the response
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    assert data['success'] is False
+    assert 'Invalid value' in data['message']
+    
+    # Verify update_list_metadata was not called
+    mock_current_user.update_list_metadata.assert_not_called()
+
+
 @patch('flask_login.current_user')
 def test_save_results_as_list(mock_current_user, auth_client):
     """
@@ -351,5 +468,36 @@ def test_save_results_as_list(mock_current_user, auth_client):
     # Verify create_list was called
     mock_current_user.create_list.assert_called_once_with('Search Results')
     
-    # Verify add_game_to_list was called for each game
-    assert mock_current_user.add_game_to_list.call_count == 2 
\ No newline at end of file
+    # Verify both games were added to the new list
+    mock_current_user.add_games_to_list.assert_called_once()
+    assert len(mock_current_user.add_games_to_list.call_args[0][1]) == 2 
+
+
+def test_game_from_result():
+    """
+    Test the list entry built from a search result
+    """
+    from blueprints.lists import _game_from_result
+    
+    long_summary = 'x' * 250
+    entry = _game_from_result({
+        'appid': 123,
+        'name': 'Test Game',
+        'media': ['image1.jpg', 'image2.jpg'],
+        'ai_summary': long_summary
+    })
+    assert entry == {
+        'appid': 123,
+        'name': 'Test Game',
+        'header_image': 'image1.jpg',
+        'short_description': 'x' * 200 + '...'
+    }
+    
+    # Missing media and summary fall back to empty strings
+    entry = _game_from_result({'appid': 456, 'media': [], 'ai_summary': None})
+    assert entry == {
+        'appid': 456,
+        'name': 'Unknown Game',
+        'header_image': '',
+        'short_description': ''
+    }
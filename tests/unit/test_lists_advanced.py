@@ -4,6 +4,8 @@ Advanced unit tests for lists functionality focusing on edge cases and error han
 import pytest
 from unittest.mock import patch, MagicMock
 import json
+from werkzeug.exceptions import NotFound
+from google.api_core.exceptions import GoogleAPIError
 
 
 @patch('flask_login.current_user')
@@ -48,7 +50,7 @@ def test_update_list_missing_field(mock_current_user, auth_client):
     mock_current_user.update_list_metadata.assert_not_called()
 
 
-@patch('flask_login.current_user')
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
 @patch('blueprints.lists.get_game_data_by_appid')
 def test_save_game_with_server_error(mock_get_game, mock_current_user, auth_client):
     """
@@ -56,7 +58,7 @@ def test_save_game_with_server_error(mock_get_game, mock_current_user, auth_clie
     """
     # Set up mock to raise exception
     mock_get_game.return_value = {"name": "Test Game", "header_image": "test.jpg", "short_description": "A test game"}
-    mock_current_user.add_game_to_list.side_effect = Exception("Database error")
+    mock_current_user.add_game_to_lists.side_effect = GoogleAPIError("Database error")
     
     # Make request
     response = auth_client.post(
@@ -71,19 +73,29 @@ def test_save_game_with_server_error(mock_get_game, mock_current_user, auth_clie
     assert 'Error' in data['message']
 
 
-@patch('flask_login.current_user')
-def test_remove_game_invalid_appid(mock_current_user, auth_client):
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
+def test_save_game_with_non_object_json(mock_current_user, auth_client):
     """
-    Test removing a game with an invalid app ID
+    Test the save_game route answers a JSON body that isn't an object with an error message
     """
-    # Make the request with non-numeric app ID
-    response = auth_client.post('/remove_game/list1/invalid')
+    response = auth_client.post('/save_game/123', json=['list1'])
     
-    # Verify the response
     assert response.status_code == 200
     data = json.loads(response.data)
     assert data['success'] is False
-    assert 'Error' in data['message']
+    mock_current_user.add_game_to_lists.assert_not_called()
+
+
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
+def test_remove_game_invalid_appid(mock_current_user, auth_client):
+    """
+    Test removing a game with an invalid app ID
+    """
+    # A non-numeric app ID doesn't match the route, so Flask answers 404
+    adapter = auth_client.application.url_map.bind('localhost')
+    with pytest.raises(NotFound):
+        adapter.match('/remove_game/list1/invalid', method='POST')
+    assert adapter.match('/remove_game/list1/123', method='POST') == ('lists.remove_game', {'list_id': 'list1', 'appid': 123})
     
     # Verify remove_game_from_list was not called
     mock_current_user.remove_game_from_list.assert_not_called()
@@ -153,12 +165,13 @@ def test_save_results_as_list_creation_failure(mock_current_user, auth_client):
     mock_current_user.add_game_to_list.assert_not_called()
 
 
-@patch('flask_login.current_user')
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
 def test_get_game_lists_when_empty(mock_current_user, auth_client):
     """
     Test the get_game_lists API route when user has no lists
     """
     # Mock current_user methods to return empty lists
+    mock_current_user.id = 'test-user-id'
     mock_current_user.get_game_lists.return_value = []
     mock_current_user.get_lists.return_value = []
     
@@ -173,6 +186,51 @@ def test_get_game_lists_when_empty(mock_current_user, auth_client):
     assert len(data['in_lists']) == 0
     assert len(data['all_lists']) == 0
     
-    # Verify the methods were called correctly
-    mock_current_user.get_game_lists.assert_called_once_with('123')
-    mock_current_user.get_lists.assert_called_once() 
\ No newline at end of file
+    # Verify the methods were called correctly: the lists are read fresh for the ETag
+    mock_current_user.get_lists.assert_called_once_with(fresh=True)
+    mock_current_user.get_game_lists.assert_called_once_with('123', lists=[])
+    
+    # Revalidating with the ETag answers 304 without looking up memberships
+    mock_current_user.get_game_lists.reset_mock()
+    response = auth_client.get('/api/game_lists/123', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    mock_current_user.get_game_lists.assert_not_called()
+
+
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
+def test_update_list_invalid_json(mock_current_user, auth_client):
+    """
+    Test the update_list API route with a body that isn't valid JSON
+    """
+    response = auth_client.post(
+        '/api/update_list/list1',
+        data='not json',
+        content_type='application/json'
+    )
+    
+    # Verify the response
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['success'] is False
+    assert 'Missing' in data['message']
+    
+    # Verify update_list_metadata was not called
+    mock_current_user.update_list_metadata.assert_not_called()
+
+
+@patch('blueprints.lists.current_user', new_callable=MagicMock)
+@patch('blueprints.lists.get_game_data_by_appid')
+def test_save_game_form_data(mock_get_game, mock_current_user, auth_client):
+    """
+    Test the save_game route reads list IDs from a form submission
+    """
+    mock_get_game.return_value = {"name": "Test Game", "header_image": "test.jpg", "short_description": "A test game"}
+    mock_current_user.add_game_to_lists.return_value = 2
+    
+    response = auth_client.post('/save_game/123', data={'list_ids': ['list1', 'list2']})
+    
+    # Verify the response
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['success'] is True
+    assert mock_current_user.add_game_to_lists.call_args[0][0] == ['list1', 'list2']
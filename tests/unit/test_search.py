@@ -3,7 +3,7 @@ Unit tests for search functionality.
 """
 import pytest
 from unittest.mock import patch, MagicMock
-from blueprints.search import perform_search
+from blueprints.search import perform_search, rerank_cache
 
 
 @patch('blueprints.search.semantic_search_query')
@@ -168,4 +168,248 @@ def test_perform_search_with_filters(mock_get_game, mock_semantic_search, app):
     # Assert
     assert len(results) == 1
     assert results[0]['appid'] == 123456
-    assert results[0]['name'] == 'Test Game 1' 
\ No newline at end of file
+    assert results[0]['name'] == 'Test Game 1' 
+
+@patch('blueprints.search.embed_query')
+@patch('blueprints.search.semantic_search_query')
+@patch('blueprints.search.get_game_data_by_appid')
+def test_perform_search_semantic_cache(mock_get_game, mock_semantic_search, mock_embed, app):
+    """
+    Test that a query with a near-identical embedding and the same options reuses
+    the cached results, while different options or a distant query miss.
+    """
+    from blueprints.search import semantic_cache
+    
+    vectors = {
+        'cozy farming games': [1.0, 0.0],
+        'relaxing farm sim': [0.99, 0.05],
+        'space shooter': [0.0, 1.0]
+    }
+    mock_embed.side_effect = lambda query: vectors[query]
+    mock_semantic_search.return_value = [
+        {'appid': '123456', 'name': 'Test Game 1', 'ai_summary': 'Farming', 'similarity_score': 0.9}
+    ]
+    mock_get_game.return_value = {'appid': 123456, 'name': 'Test Game 1', 'store_data': {}}
+    
+    semantic_cache.clear()
+    app.config['SEMANTIC_CACHE_ENABLED'] = True
+    try:
+        with app.app_context():
+            first, _ = perform_search('cozy farming games', sort_by='Name (A-Z)', limit=10)
+            similar, _ = perform_search('relaxing farm sim', sort_by='Name (A-Z)', limit=10)
+            assert mock_semantic_search.call_count == 1
+            
+            perform_search('relaxing farm sim', sort_by='Name (A-Z)', selected_price='Free', limit=10)
+            perform_search('space shooter', sort_by='Name (A-Z)', limit=10)
+            assert mock_semantic_search.call_count == 3
+    finally:
+        app.config['SEMANTIC_CACHE_ENABLED'] = False
+        semantic_cache.clear()
+    
+    assert similar == first
+    assert first[0]['appid'] == 123456
+
+
+@patch('blueprints.search.rerank_search_results')
+def test_rerank_in_chunks(mock_rerank, app):
+    """
+    Test that candidates are re-ranked in chunks of 10, that the best of each chunk
+    are re-ranked together to lead the results, and that a failed chunk keeps its
+    semantic order.
+    """
+    from blueprints.search import rerank_in_chunks
+    
+    candidates = [{'appid': appid, 'ai_summary': f'Game {appid}'} for appid in range(25)]
+    
+    def rerank_side_effect(query, chunk):
+        appids = [c['appid'] for c in chunk]
+        if appids[0] == 10:
+            raise Exception("Chunk failed")
+        return list(reversed(appids)), f"Ranked from {appids[0]}"
+    
+    mock_rerank.side_effect = rerank_side_effect
+    
+    with app.app_context():
+        ordered, comment = rerank_in_chunks('test query', candidates)
+    
+    # Three chunks, then one final round over the top three of each
+    assert mock_rerank.call_count == 4
+    assert [c['appid'] for c in mock_rerank.call_args.args[1]] == [9, 8, 7, 10, 11, 12, 24, 23, 22]
+    assert ordered == ([22, 23, 24, 12, 11, 10, 7, 8, 9] + list(range(6, -1, -1))
+                       + list(range(13, 20)) + [21, 20])
+    assert comment == "Ranked from 9"
+    
+    # If the final round fails, each chunk keeps its own order
+    rerank_cache.clear()
+    mock_rerank.side_effect = lambda query, chunk: (
+        (None, "Final round failed") if len(chunk) == 9 else rerank_side_effect(query, chunk)
+    )
+    with app.app_context():
+        ordered, comment = rerank_in_chunks('test query', candidates)
+    
+    assert ordered == list(range(9, -1, -1)) + list(range(10, 20)) + list(range(24, 19, -1))
+    assert comment == "Ranked from 0"
+    
+    # Forget the chunks ranked above so every chunk goes back to the LLM
+    rerank_cache.clear()
+    mock_rerank.side_effect = Exception("Everything failed")
+    with app.app_context():
+        ordered, comment = rerank_in_chunks('test query', candidates)
+    
+    assert ordered is None
+    assert comment == "Everything failed"
+
+
+@patch('blueprints.search.rerank_search_results')
+def test_rerank_in_chunks_reuses_cached_orderings(mock_rerank, app):
+    """
+    Test that re-ranking the same games for the same query asks the LLM once,
+    whatever order the candidates arrive in, and that failures are retried.
+    """
+    from blueprints.search import rerank_in_chunks
+    
+    candidates = [{'appid': appid, 'ai_summary': f'Game {appid}'} for appid in range(5)]
+    mock_rerank.return_value = ([4, 3, 2, 1, 0], "Ranked")
+    
+    with app.app_context():
+        first = rerank_in_chunks('Test Query', candidates)
+        second = rerank_in_chunks(' test query ', list(reversed(candidates)))
+    
+    assert first == second == ([4, 3, 2, 1, 0], "Ranked")
+    assert mock_rerank.call_count == 1
+    
+    mock_rerank.reset_mock()
+    mock_rerank.return_value = (None, "LLM unavailable")
+    with app.app_context():
+        rerank_in_chunks('other query', candidates)
+        rerank_in_chunks('other query', candidates)
+    
+    assert mock_rerank.call_count == 2
+
+
+@patch('blueprints.search.semantic_search_query')
+@patch('blueprints.search.get_game_data_by_appid')
+def test_perform_search_media_urls_use_https(mock_get_game, mock_semantic_search, app):
+    """
+    Test that header, screenshot and movie URLs are all upgraded to https.
+    """
+    from blueprints.search import force_https
+    
+    mock_semantic_search.return_value = [{'appid': '123', 'name': 'Test Game', 'ai_summary': ''}]
+    mock_get_game.return_value = {
+        'name': 'Test Game',
+        'header_image': 'http://example.com/header.jpg',
+        'screenshots': [{'path_full': 'https://example.com/shot.jpg'}, 'http://example.com/raw.jpg'],
+        'store_data': {'movies': [{'webm': {'max': 'http://example.com/movie.webm'}}]}
+    }
+    
+    with app.app_context():
+        results, _ = perform_search('test query', sort_by='Name (A-Z)', limit=10)
+    
+    assert results[0]['media'] == [
+        'https://example.com/header.jpg',
+        'https://example.com/shot.jpg',
+        'https://example.com/raw.jpg',
+        'https://example.com/movie.webm'
+    ]
+    assert force_https('http://example.com') == 'https://example.com'
+    assert force_https('httpx://example.com') == 'httpx://example.com'
+
+
+@patch('blueprints.search.semantic_search_query')
+@patch('blueprints.search.get_game_data_by_appid')
+def test_perform_search_reads_each_game_once(mock_get_game, mock_semantic_search, app):
+    """
+    Test that each result's game data is read once, although it is used both for
+    the rerank candidates and for the final results.
+    """
+    mock_semantic_search.return_value = [
+        {'appid': '123', 'name': 'Game 1', 'ai_summary': ''},
+        {'appid': '456', 'name': 'Game 2', 'ai_summary': ''}
+    ]
+    mock_get_game.side_effect = lambda appid, *args, **kwargs: {'name': f'Game {appid}'}
+    
+    with app.app_context():
+        results, _ = perform_search('test query', sort_by='Name (A-Z)', limit=10)
+    
+    assert len(results) == 2
+    assert sorted(call.args[0] for call in mock_get_game.call_args_list) == [123, 456]
+
+
+@patch('blueprints.search.perform_search')
+def test_execute_search_streams_results(mock_perform_search, client):
+    """
+    Test that the results partial is streamed rather than rendered up front.
+    """
+    mock_perform_search.return_value = ([], "Nothing matched")
+    
+    response = client.post('/search/execute', data={'query': 'test query'}, buffered=False)
+    
+    assert response.is_streamed
+    assert response.mimetype == 'text/html'
+    assert b'row-cols-1' in response.data
+
+
+@patch('blueprints.search.rerank_search_results')
+@patch('blueprints.search.semantic_search_query')
+@patch('blueprints.search.get_game_data_by_appid')
+def test_synthetic_summaries_follow_config(mock_get_game, mock_semantic_search, mock_rerank, app):
+    """
+    Test that games without an AI summary only get a synthetic one for re-ranking
+    while TESTING_ENABLE_SYNTHETIC_SUMMARIES is on.
+    """
+    mock_semantic_search.return_value = [{'appid': '123', 'name': 'Game 1', 'ai_summary': ''}]
+    mock_get_game.return_value = {'name': 'Game 1', 'short_description': 'A test game.'}
+    mock_rerank.return_value = ([123], "Ranked")
+    
+    enabled = app.config.get('TESTING_ENABLE_SYNTHETIC_SUMMARIES')
+    try:
+        app.config['TESTING_ENABLE_SYNTHETIC_SUMMARIES'] = True
+        with app.app_context():
+            perform_search('test query', sort_by='Relevance', limit=10)
+        
+        candidates = mock_rerank.call_args.args[1]
+        assert candidates[0]['ai_summary'].startswith("SYNTHETIC SUMMARY FOR TESTING:\nGame 1")
+        
+        mock_rerank.reset_mock()
+        app.config['TESTING_ENABLE_SYNTHETIC_SUMMARIES'] = False
+        with app.app_context():
+            perform_search('other query', sort_by='Relevance', limit=10)
+        
+        mock_rerank.assert_not_called()
+    finally:
+        app.config['TESTING_ENABLE_SYNTHETIC_SUMMARIES'] = enabled
+
+
+@patch('blueprints.search.rerank_search_results')
+@patch('blueprints.search.get_summaries_for_appids')
+@patch('blueprints.search.semantic_search_query')
+@patch('blueprints.search.get_games_data_by_appids')
+@patch('blueprints.search.get_game_data_by_appid')
+def test_synthetic_summaries_read_only_games_without_summaries(mock_get_game, mock_get_games,
+                                                               mock_semantic_search, mock_summaries,
+                                                               mock_rerank, app):
+    """
+    Test that preparing re-rank candidates only reads the games that need a synthetic summary.
+    """
+    mock_semantic_search.return_value = [
+        {'appid': '123', 'name': 'Game 1', 'ai_summary': ''},
+        {'appid': '456', 'name': 'Game 2', 'ai_summary': ''}
+    ]
+    mock_summaries.return_value = {123: {'appid': 123, 'ai_summary': 'A real summary'}}
+    mock_get_games.return_value = {456: {'name': 'Game 2', 'short_description': 'A test game.'}}
+    mock_get_game.return_value = None
+    mock_rerank.return_value = ([456, 123], "Ranked")
+    
+    enabled = app.config.get('TESTING_ENABLE_SYNTHETIC_SUMMARIES')
+    try:
+        app.config['TESTING_ENABLE_SYNTHETIC_SUMMARIES'] = True
+        with app.app_context():
+            perform_search('test query', sort_by='Relevance', limit=10)
+    finally:
+        app.config['TESTING_ENABLE_SYNTHETIC_SUMMARIES'] = enabled
+    
+    assert list(mock_get_games.call_args_list[0].args[0]) == [456]
+    candidates = mock_rerank.call_args.args[1]
+    assert [c['appid'] for c in candidates] == [123, 456]
+    assert candidates[1]['ai_summary'].startswith("SYNTHETIC SUMMARY FOR TESTING:\nGame 2")
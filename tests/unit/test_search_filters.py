@@ -385,4 +385,131 @@ def test_search_with_multiple_filters(mock_get_game, mock_semantic_search, app):
     assert len(results) == 1
     assert results[0]['appid'] == 444
     assert results[0]['name'] == 'RPG Paid 2023'
-    assert results[0]['platforms']['linux'] == True 
\ No newline at end of file
+    assert results[0]['platforms']['linux'] == True 
+
+@patch('blueprints.search.semantic_search_query')
+@patch('blueprints.search.get_game_data_by_appid')
+def test_search_sorting_keeps_ties_in_relevance_order(mock_get_game, mock_semantic_search, app):
+    """
+    Test the explicit sorts, including unknown release years and ties, which
+    keep their relevance order.
+    """
+    mock_semantic_search.return_value = [
+        {'appid': str(appid), 'name': f'Game {appid}', 'ai_summary': ''} for appid in (1, 2, 3, 4)
+    ]
+    
+    games = {
+        1: {'name': 'Delta', 'release_date': 'Mar 1, 2020', 'reviews': [{'voted_up': True}, {'voted_up': False}]},
+        2: {'name': 'Alpha', 'release_date': '', 'reviews': []},
+        3: {'name': 'Charlie', 'release_date': 'Jan 5, 2018', 'reviews': [{'voted_up': True}, {'voted_up': False}]},
+        4: {'name': 'Bravo', 'release_date': 'Jun 9, 2020', 'reviews': [{'voted_up': True}]}
+    }
+    mock_get_game.side_effect = lambda appid, *args, **kwargs: games.get(appid)
+    
+    def appids_for(sort_by):
+        with app.app_context():
+            results, _ = perform_search('test query', sort_by=sort_by, limit=10)
+        return [r['appid'] for r in results]
+    
+    assert appids_for('Name (A-Z)') == [2, 4, 3, 1]
+    assert appids_for('Release Date (Newest)') == [1, 4, 3, 2]
+    assert appids_for('Release Date (Oldest)') == [3, 1, 4, 2]
+    assert appids_for('Review Count (High to Low)') == [1, 3, 4, 2]
+    assert appids_for('Positive Review % (High to Low)') == [4, 1, 3, 2]
+    
+    with app.app_context():
+        results, _ = perform_search('test query', sort_by='Positive Review % (High to Low)', limit=10)
+    assert [r['pos_percent'] for r in results] == [100.0, 50.0, 50.0, 0.0]
+
+
+@patch('blueprints.search.heapq.nsmallest', wraps=__import__('heapq').nsmallest)
+@patch('blueprints.search.semantic_search_query')
+@patch('blueprints.search.get_game_data_by_appid')
+def test_search_sorting_with_limit_uses_top_k(mock_get_game, mock_semantic_search, mock_nsmallest, app):
+    """
+    Test that a limit smaller than the result count selects the top results
+    without a full sort, in the same order a full sort would give.
+    """
+    review_counts = {1: 3, 2: 7, 3: 7, 4: 1, 5: 5}
+    mock_semantic_search.return_value = [
+        {'appid': str(appid), 'name': f'Game {appid}', 'ai_summary': ''} for appid in review_counts
+    ]
+    mock_get_game.side_effect = lambda appid, *args, **kwargs: {
+        'name': f'Game {appid}',
+        'reviews': [{'voted_up': True}] * review_counts[appid]
+    }
+    
+    with app.app_context():
+        results, _ = perform_search('test query', sort_by='Review Count (High to Low)', limit=3)
+    
+    assert [r['appid'] for r in results] == [2, 3, 5]
+    assert mock_nsmallest.called
+
+
+def test_prefilter_appids():
+    """
+    Test that precomputed attributes rule out games before their data is processed,
+    while games without attributes are left for the full filter.
+    """
+    import numpy as np
+    from blueprints.search import prefilter_appids
+    
+    attributes = {
+        'appid_to_row': {1: 0, 2: 1, 3: 2},
+        'known': np.array([True, True, False]),
+        'years': np.array([2020, 2023, -1], dtype=np.int32),
+        'free': np.array([True, False, False]),
+        'platforms': np.array([1, 1 | 2, 0], dtype=np.uint8),
+        'genre_index': {'RPG': 0, 'Action': 1},
+        'genres': np.array([[True, False], [True, True], [False, False]])
+    }
+    appids = [3, 1, 4, 2]
+    
+    assert prefilter_appids(appids, attributes, 'All', 'All', 'All', 'All') == appids
+    assert prefilter_appids(appids, attributes, 'Action', 'All', 'All', 'All') == [3, 4, 2]
+    assert prefilter_appids(appids, attributes, 'Strategy', 'All', 'All', 'All') == [3, 4]
+    assert prefilter_appids(appids, attributes, 'RPG', '2020', 'All', 'Free') == [3, 1, 4]
+    assert prefilter_appids(appids, attributes, 'All', 'All', 'Mac', 'Paid') == [3, 4, 2]
+    assert prefilter_appids(appids, None, 'RPG', 'All', 'All', 'All') == appids
+
+
+@patch('blueprints.search.semantic_search_query')
+@patch('blueprints.search.get_games_data_by_appids')
+@patch('blueprints.search.get_game_data_by_appid')
+def test_search_reads_only_prefiltered_games(mock_get_game, mock_get_games, mock_semantic_search, app):
+    """
+    Test that games the precomputed attributes rule out are never read from disk,
+    and the rest are read in one batch.
+    """
+    import numpy as np
+    
+    mock_semantic_search.return_value = [
+        {'appid': '1', 'name': 'Game 1', 'ai_summary': ''},
+        {'appid': '2', 'name': 'Game 2', 'ai_summary': ''}
+    ]
+    mock_get_games.side_effect = lambda appids, *args: {
+        appid: {'name': f'Game {appid}', 'store_data': {'is_free': True}} for appid in appids
+    }
+    attributes = {
+        'appid_to_row': {1: 0, 2: 1},
+        'known': np.array([True, True]),
+        'years': np.array([2020, 2021], dtype=np.int32),
+        'free': np.array([True, False]),
+        'platforms': np.array([1, 1], dtype=np.uint8),
+        'genre_index': {},
+        'genres': np.zeros((2, 0), dtype=bool)
+    }
+    
+    # Synthetic summaries would read games for re-ranking; leave only the results path
+    saved = {key: app.config.get(key) for key in ('game_attributes', 'TESTING_ENABLE_SYNTHETIC_SUMMARIES')}
+    try:
+        app.config.update(game_attributes=attributes, TESTING_ENABLE_SYNTHETIC_SUMMARIES=False)
+        with app.app_context():
+            results, _ = perform_search('test query', selected_price='Free', sort_by='Name (A-Z)', limit=10)
+    finally:
+        app.config.update(saved)
+    
+    assert [r['appid'] for r in results] == [1]
+    mock_get_games.assert_called_once()
+    assert list(mock_get_games.call_args.args[0]) == [1]
+    mock_get_game.assert_not_called()
@@ -3,6 +3,7 @@ Unit tests for User list and game note management functionality.
 """
 import pytest
 from unittest.mock import patch, MagicMock, call
+from google.api_core.exceptions import NotFound
 from firebase_config import User
 
 
@@ -59,6 +60,51 @@ def test_get_lists(mock_db):
     assert results[1]['description'] == 'Games I want to play'
 
 
+@patch('firebase_config.db')
+def test_get_lists_cached_until_list_write(mock_db):
+    """
+    Test User.get_lists reuses a recent read across User instances until a list changes
+    """
+    mock_list_doc = MagicMock()
+    mock_list_doc.id = "list1"
+    mock_list_doc.to_dict.return_value = {'name': 'My Favorites'}
+    mock_lists_collection = mock_db.collection.return_value.document.return_value.collection.return_value
+    mock_lists_collection.get.return_value = [mock_list_doc]
+    
+    assert User(uid="test123", email="test@example.com").get_lists() == [{'id': 'list1', 'name': 'My Favorites'}]
+    user = User(uid="test123", email="test@example.com")
+    assert user.get_lists() == [{'id': 'list1', 'name': 'My Favorites'}]
+    mock_lists_collection.get.assert_called_once()
+    
+    # The cached read also fills the id -> list index
+    assert user.get_list('list1') == {'id': 'list1', 'name': 'My Favorites'}
+    
+    # A list write drops the cached lists
+    user.create_list("To Play")
+    user.get_lists()
+    assert mock_lists_collection.get.call_count == 2
+
+
+@patch('firebase_config.db')
+def test_get_lists_returns_copies_and_fresh_skips_cache(mock_db):
+    """
+    Test User.get_lists hands out copies of cached lists, and fresh=True reads Firestore again
+    """
+    mock_list_doc = MagicMock()
+    mock_list_doc.id = "list1"
+    mock_list_doc.to_dict.return_value = {'name': 'My Favorites'}
+    mock_lists_collection = mock_db.collection.return_value.document.return_value.collection.return_value
+    mock_lists_collection.get.return_value = [mock_list_doc]
+    user = User(uid="test123", email="test@example.com")
+    
+    user.get_lists()[0]['name'] = 'Changed'
+    assert user.get_lists() == [{'id': 'list1', 'name': 'My Favorites'}]
+    mock_lists_collection.get.assert_called_once()
+    
+    user.get_lists(fresh=True)
+    assert mock_lists_collection.get.call_count == 2
+
+
 @patch('firebase_config.db')
 def test_get_lists_error(mock_db):
     """
@@ -77,6 +123,66 @@ def test_get_lists_error(mock_db):
     assert results == []
 
 
+@patch('firebase_config.db')
+def test_get_list(mock_db):
+    """
+    Test User.get_list fetches a single list document
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    
+    # Mock the Firestore chain of calls
+    mock_list_doc = MagicMock()
+    mock_list_doc.exists = True
+    mock_list_doc.id = "list1"
+    mock_list_doc.to_dict.return_value = {'name': 'My Favorites'}
+    
+    mock_lists_collection = mock_db.collection.return_value.document.return_value.collection.return_value
+    mock_lists_collection.document.return_value.get.return_value = mock_list_doc
+    
+    # Call the method
+    result = user.get_list("list1")
+    
+    # Verify only the single list document was read
+    mock_lists_collection.document.assert_called_once_with("list1")
+    mock_lists_collection.get.assert_not_called()
+    assert result == {'id': 'list1', 'name': 'My Favorites'}
+
+
+@patch('firebase_config.db')
+def test_get_list_uses_lists_index(mock_db):
+    """
+    Test User.get_list answers from the index built by get_lists
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    
+    # Mock the Firestore query results
+    mock_list_doc1 = MagicMock()
+    mock_list_doc1.id = "list1"
+    mock_list_doc1.to_dict.return_value = {'name': 'My Favorites'}
+    mock_list_doc2 = MagicMock()
+    mock_list_doc2.id = "list2"
+    mock_list_doc2.to_dict.return_value = {'name': 'To Play'}
+    
+    mock_lists_collection = mock_db.collection.return_value.document.return_value.collection.return_value
+    mock_lists_collection.get.return_value = [mock_list_doc1, mock_list_doc2]
+    
+    user.get_lists()
+    
+    # Lookups are served without another Firestore read
+    assert user.get_list("list2") == {'id': 'list2', 'name': 'To Play'}
+    assert user.get_list("missing") is None
+    mock_lists_collection.document.assert_not_called()
+    
+    # A write drops the index so the next lookup goes back to Firestore
+    mock_lists_collection.add.return_value = (None, MagicMock(id="list3"))
+    user.create_list("New List")
+    mock_lists_collection.document.return_value.get.return_value.exists = False
+    assert user.get_list("list2") is None
+    mock_lists_collection.document.assert_called_once_with("list2")
+
+
 @patch('firebase_config.db')
 @patch('firebase_config.firestore.SERVER_TIMESTAMP')
 def test_create_list(mock_timestamp, mock_db):
@@ -178,6 +284,31 @@ def test_delete_list(mock_db):
     assert result is True
 
 
+@patch('firebase_config.db')
+def test_delete_collection_batches_deletes(mock_db):
+    """
+    Test User._delete_collection deletes each page of documents in one batch commit
+    """
+    user = User(uid="test123", email="test@example.com")
+    
+    full_page = [MagicMock() for _ in range(500)]
+    last_page = [MagicMock() for _ in range(3)]
+    collection_ref = MagicMock()
+    collection_ref.select.return_value.limit.return_value.get.side_effect = [full_page, last_page]
+    mock_batch = mock_db.batch.return_value
+    
+    user._delete_collection(collection_ref)
+    
+    # Only document references are fetched, a page at a time, until a short page
+    collection_ref.select.assert_called_with([])
+    collection_ref.select.return_value.limit.assert_called_with(500)
+    assert collection_ref.select.return_value.limit.return_value.get.call_count == 2
+    assert mock_batch.delete.call_count == 503
+    assert mock_batch.commit.call_count == 2
+    mock_batch.delete.assert_any_call(last_page[0].reference)
+    full_page[0].reference.delete.assert_not_called()
+
+
 @patch('firebase_config.db')
 @patch('firebase_config.time.time')
 @patch('firebase_config.firestore.SERVER_TIMESTAMP')
@@ -230,14 +361,16 @@ def test_add_game_to_list(mock_timestamp, mock_time, mock_db):
     mock_list_doc.collection.assert_called_once_with('games')
     mock_games_collection.document.assert_called_once_with('123')
     
-    # Verify set was called with the correct data
-    mock_game_doc.set.assert_called_once()
+    # Verify the game and the list's updated_at were written in one batch commit
+    mock_batch = mock_db.batch.return_value
     game_data_with_timestamps = dict(game_data)
     game_data_with_timestamps['timestamp'] = 1600000000
     game_data_with_timestamps['added_at'] = mock_timestamp
-    
-    # Verify update was called on list_ref
-    mock_list_doc.update.assert_called_once_with({'updated_at': mock_timestamp})
+    mock_batch.set.assert_called_once_with(mock_game_doc, game_data_with_timestamps)
+    mock_batch.update.assert_called_once_with(mock_list_doc, {'updated_at': mock_timestamp})
+    mock_batch.commit.assert_called_once()
+    mock_game_doc.set.assert_not_called()
+    mock_list_doc.update.assert_not_called()
     
     # Verify the method returned True on success
     assert result is True
@@ -280,6 +413,123 @@ def test_add_game_to_list_nonexistent_list(mock_db):
     assert result is False
 
 
+@patch('firebase_config.db')
+@patch('firebase_config.time.time')
+@patch('firebase_config.firestore.SERVER_TIMESTAMP')
+def test_add_game_to_lists(mock_timestamp, mock_time, mock_db):
+    """
+    Test User.add_game_to_lists writes to every existing list in one batch
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    mock_time.return_value = 1600000000
+    game_data = {'appid': 123, 'name': 'Test Game'}
+    
+    mock_lists_collection = mock_db.collection.return_value.document.return_value.collection.return_value
+    list_refs = {list_id: MagicMock(name=list_id) for list_id in ['list1', 'list2', 'list3']}
+    mock_lists_collection.document.side_effect = lambda list_id: list_refs[list_id]
+    
+    # list2 doesn't exist
+    def snapshot(list_id, exists):
+        doc = MagicMock()
+        doc.exists = exists
+        doc.reference = list_refs[list_id]
+        return doc
+    mock_db.get_all.return_value = [snapshot('list1', True), snapshot('list2', False), snapshot('list3', True)]
+    mock_batch = mock_db.batch.return_value
+    
+    # Call the method
+    result = user.add_game_to_lists(['list1', 'list2', 'list3'], game_data)
+    
+    # One read to check the lists, one commit for all the writes
+    mock_db.get_all.assert_called_once_with([list_refs['list1'], list_refs['list2'], list_refs['list3']])
+    mock_batch.commit.assert_called_once()
+    assert result == 2
+    
+    # The game was written to the existing lists only
+    expected_game = {'appid': 123, 'name': 'Test Game', 'timestamp': 1600000000, 'added_at': mock_timestamp}
+    assert mock_batch.set.call_count == 2
+    for list_id in ['list1', 'list3']:
+        list_refs[list_id].collection.return_value.document.assert_called_once_with('123')
+        mock_batch.set.assert_any_call(list_refs[list_id].collection.return_value.document.return_value, expected_game)
+        mock_batch.update.assert_any_call(list_refs[list_id], {'updated_at': mock_timestamp})
+    list_refs['list2'].collection.assert_not_called()
+    
+    # The caller's dict is left untouched
+    assert game_data == {'appid': 123, 'name': 'Test Game'}
+
+
+@patch('firebase_config.db')
+def test_add_game_to_lists_no_existing_lists(mock_db):
+    """
+    Test User.add_game_to_lists skips the write when none of the lists exist
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    
+    missing = MagicMock()
+    missing.exists = False
+    mock_db.get_all.return_value = [missing]
+    
+    result = user.add_game_to_lists(['gone'], {'appid': 123})
+    
+    assert result == 0
+    mock_db.batch.assert_not_called()
+
+
+@patch('firebase_config.db')
+@patch('firebase_config.time.time')
+@patch('firebase_config.firestore.SERVER_TIMESTAMP')
+def test_add_games_to_list(mock_timestamp, mock_time, mock_db):
+    """
+    Test User.add_games_to_list writes all games in batches under Firestore's limit
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    mock_time.return_value = 1600000000
+    games = [{'appid': appid, 'name': f'Game {appid}'} for appid in range(600)]
+    
+    mock_list_doc = mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value
+    mock_list_doc.get.return_value.exists = True
+    mock_games_collection = mock_list_doc.collection.return_value
+    mock_batch = mock_db.batch.return_value
+    
+    # Call the method
+    result = user.add_games_to_list('list1', games)
+    
+    assert result == 600
+    mock_list_doc.collection.assert_called_once_with('games')
+    
+    # 600 games need two commits of at most 499 games plus the list update
+    assert mock_batch.commit.call_count == 2
+    assert mock_batch.set.call_count == 600
+    assert mock_batch.update.call_count == 2
+    mock_batch.update.assert_called_with(mock_list_doc, {'updated_at': mock_timestamp})
+    mock_games_collection.document.assert_any_call('599')
+    
+    # Each stored game carries the write timestamps; the input is left untouched
+    stored = mock_batch.set.call_args_list[0][0][1]
+    assert stored == {'appid': 0, 'name': 'Game 0', 'timestamp': 1600000000, 'added_at': mock_timestamp}
+    assert games[0] == {'appid': 0, 'name': 'Game 0'}
+
+
+@patch('firebase_config.db')
+def test_add_games_to_list_nonexistent_list(mock_db):
+    """
+    Test User.add_games_to_list with a nonexistent list
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    
+    mock_list_doc = mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value
+    mock_list_doc.get.return_value.exists = False
+    
+    result = user.add_games_to_list('missing', [{'appid': 1}])
+    
+    assert result == 0
+    mock_db.batch.assert_not_called()
+
+
 @patch('firebase_config.db')
 @patch('firebase_config.firestore.SERVER_TIMESTAMP')
 def test_remove_game_from_list(mock_timestamp, mock_db):
@@ -316,6 +566,48 @@ def test_remove_game_from_list(mock_timestamp, mock_db):
     assert result is True
 
 
+@patch('firebase_config.db')
+@patch('firebase_config.firestore.SERVER_TIMESTAMP')
+def test_remove_game_from_list_single_commit(mock_timestamp, mock_db):
+    """
+    Test User.remove_game_from_list deletes the game and touches the list in one batch
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    
+    mock_list_doc = mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value
+    mock_game_doc = mock_list_doc.collection.return_value.document.return_value
+    mock_batch = mock_db.batch.return_value
+    
+    # Call the method
+    result = user.remove_game_from_list("list-id", 123)
+    
+    # Verify both writes went through a single batch commit
+    mock_list_doc.collection.return_value.document.assert_called_once_with('123')
+    mock_batch.delete.assert_called_once_with(mock_game_doc)
+    mock_batch.update.assert_called_once_with(mock_list_doc, {'updated_at': mock_timestamp})
+    mock_batch.commit.assert_called_once()
+    mock_game_doc.delete.assert_not_called()
+    mock_list_doc.update.assert_not_called()
+    assert result is True
+
+
+@patch('firebase_config.db')
+def test_remove_game_from_list_commit_error(mock_db):
+    """
+    Test User.remove_game_from_list when the commit fails (e.g. the list is gone)
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    
+    mock_db.batch.return_value.commit.side_effect = Exception("No document to update")
+    
+    # Call the method
+    result = user.remove_game_from_list("missing-list", 123)
+    
+    assert result is False
+
+
 @patch('firebase_config.db')
 def test_get_games_in_list(mock_db):
     """
@@ -375,6 +667,38 @@ def test_get_games_in_list(mock_db):
     assert results[1]['name'] == 'Game 2'
 
 
+def test_get_list_with_games():
+    """
+    Test User.get_list_with_games returns the list together with its games
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    list_info = {'id': 'list1', 'name': 'My Favorites'}
+    games = [{'appid': 123, 'name': 'Test Game'}]
+    
+    with patch.object(User, 'get_list', return_value=list_info) as mock_get_list, \
+         patch.object(User, 'get_games_in_list', return_value=games) as mock_get_games:
+        result = user.get_list_with_games('list1')
+    
+    mock_get_list.assert_called_once_with('list1')
+    mock_get_games.assert_called_once_with('list1')
+    assert result == (list_info, games)
+
+
+def test_get_list_with_games_missing_list():
+    """
+    Test User.get_list_with_games when the list doesn't exist
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    
+    with patch.object(User, 'get_list', return_value=None), \
+         patch.object(User, 'get_games_in_list', return_value=[{'appid': 123}]):
+        result = user.get_list_with_games('missing')
+    
+    assert result == (None, [])
+
+
 @patch('firebase_config.db')
 def test_is_game_in_list(mock_db):
     """
@@ -413,12 +737,82 @@ def test_is_game_in_list(mock_db):
     mock_lists_collection.document.assert_called_once_with('list-id')
     mock_list_doc.collection.assert_called_once_with('games')
     mock_games_collection.document.assert_called_once_with('123')
-    mock_game_doc.get.assert_called_once()
+    mock_game_doc.get.assert_called_once_with(field_paths=['appid'])
     
     # Verify the result is correct
     assert result is True
 
 
+@patch('firebase_config.db')
+def test_get_game_lists(mock_db):
+    """
+    Test User.get_game_lists checks every list's membership in one batched read
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    lists = [
+        {'id': 'list1', 'name': 'My Favorites'},
+        {'id': 'list2', 'name': 'To Play'},
+        {'id': 'list3', 'name': 'Played'}
+    ]
+    
+    # Only list1 and list3 contain the game
+    def snapshot(list_id, exists):
+        doc = MagicMock()
+        doc.exists = exists
+        doc.reference.parent.parent.id = list_id
+        return doc
+    mock_db.get_all.return_value = [snapshot('list3', True), snapshot('list1', True), snapshot('list2', False)]
+    
+    with patch.object(User, 'get_lists', return_value=lists):
+        result = user.get_game_lists(123)
+    
+    # One batched read covering every list
+    mock_db.get_all.assert_called_once()
+    assert len(mock_db.get_all.call_args[0][0]) == 3
+    # Only the appid field of each game document is fetched
+    assert mock_db.get_all.call_args[1] == {'field_paths': ['appid']}
+    
+    # Results keep the order of the user's lists
+    assert [lst['id'] for lst in result] == ['list1', 'list3']
+
+
+@patch('firebase_config.db')
+def test_get_game_lists_with_prefetched_lists(mock_db):
+    """
+    Test User.get_game_lists reuses lists the caller already fetched
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    lists = [{'id': 'list1', 'name': 'My Favorites'}]
+    
+    found = MagicMock()
+    found.exists = True
+    found.reference.parent.parent.id = 'list1'
+    mock_db.get_all.return_value = [found]
+    
+    with patch.object(User, 'get_lists') as mock_get_lists:
+        result = user.get_game_lists(123, lists=lists)
+    
+    mock_get_lists.assert_not_called()
+    assert result == lists
+
+
+@patch('firebase_config.db')
+def test_get_game_lists_no_lists(mock_db):
+    """
+    Test User.get_game_lists skips the membership read when the user has no lists
+    """
+    # Create a User instance
+    user = User(uid="test123", email="test@example.com")
+    
+    with patch.object(User, 'get_lists', return_value=[]):
+        result = user.get_game_lists(123)
+    
+    assert result == []
+    mock_db.get_all.assert_not_called()
+
+
 @patch('firebase_config.db')
 @patch('firebase_config.firestore.SERVER_TIMESTAMP')
 def test_save_game_note_new(mock_timestamp, mock_db):
@@ -434,15 +828,12 @@ def test_save_game_note_new(mock_timestamp, mock_db):
     mock_notes_collection = MagicMock()
     mock_note_doc = MagicMock()
     
-    # Mock a document that doesn't exist
-    mock_note_get = MagicMock()
-    mock_note_get.exists = False
-    
+    # Mock a document that doesn't exist, so the update fails
     mock_db.collection.return_value = mock_collection
     mock_collection.document.return_value = mock_document_ref
     mock_document_ref.collection.return_value = mock_notes_collection
     mock_notes_collection.document.return_value = mock_note_doc
-    mock_note_doc.get.return_value = mock_note_get
+    mock_note_doc.update.side_effect = NotFound("No document to update")
     
     # Call the method
     result = user.save_game_note(123, "This is my note about the game.")
@@ -452,11 +843,11 @@ def test_save_game_note_new(mock_timestamp, mock_db):
     mock_collection.document.assert_called_once_with('test123')
     mock_document_ref.collection.assert_called_once_with('game_notes')
     mock_notes_collection.document.assert_called_once_with('123')
-    mock_note_doc.get.assert_called_once()
+    mock_note_doc.get.assert_not_called()
     
-    # Verify set was called with the correct data
-    mock_note_doc.set.assert_called_once()
-    note_data = mock_note_doc.set.call_args[0][0]
+    # Verify the note was created with the correct data
+    mock_note_doc.create.assert_called_once()
+    note_data = mock_note_doc.create.call_args[0][0]
     assert note_data['appid'] == '123'
     assert note_data['note'] == "This is my note about the game."
     assert note_data['updated_at'] == mock_timestamp
@@ -481,15 +872,11 @@ def test_save_game_note_update(mock_timestamp, mock_db):
     mock_notes_collection = MagicMock()
     mock_note_doc = MagicMock()
     
-    # Mock a document that exists
-    mock_note_get = MagicMock()
-    mock_note_get.exists = True
-    
+    # Mock a document that exists, so the update succeeds
     mock_db.collection.return_value = mock_collection
     mock_collection.document.return_value = mock_document_ref
     mock_document_ref.collection.return_value = mock_notes_collection
     mock_notes_collection.document.return_value = mock_note_doc
-    mock_note_doc.get.return_value = mock_note_get
     
     # Call the method
     result = user.save_game_note(123, "Updated note text.")
@@ -499,11 +886,12 @@ def test_save_game_note_update(mock_timestamp, mock_db):
     mock_collection.document.assert_called_once_with('test123')
     mock_document_ref.collection.assert_called_once_with('game_notes')
     mock_notes_collection.document.assert_called_once_with('123')
-    mock_note_doc.get.assert_called_once()
+    mock_note_doc.get.assert_not_called()
+    mock_note_doc.create.assert_not_called()
     
-    # Verify set was called with the correct data
-    mock_note_doc.set.assert_called_once()
-    note_data = mock_note_doc.set.call_args[0][0]
+    # Verify update was called with the correct data
+    mock_note_doc.update.assert_called_once()
+    note_data = mock_note_doc.update.call_args[0][0]
     assert note_data['appid'] == '123'
     assert note_data['note'] == "Updated note text."
     assert note_data['updated_at'] == mock_timestamp
@@ -625,10 +1013,11 @@ def test_delete_game_note(mock_db):
     mock_collection.document.assert_called_once_with('test123')
     mock_document_ref.collection.assert_called_once_with('game_notes')
     mock_notes_collection.document.assert_called_once_with('123')
-    mock_note_doc.get.assert_called_once()
+    mock_note_doc.get.assert_not_called()
     
-    # Verify delete was called
-    mock_note_doc.delete.assert_called_once()
+    # Verify delete was called, conditional on the note existing
+    mock_db.write_option.assert_called_once_with(exists=True)
+    mock_note_doc.delete.assert_called_once_with(option=mock_db.write_option.return_value)
     
     # Verify the method returned True on success
     assert result is True
@@ -648,15 +1037,12 @@ def test_delete_game_note_nonexistent(mock_db):
     mock_notes_collection = MagicMock()
     mock_note_doc = MagicMock()
     
-    # Mock a document that doesn't exist
-    mock_note_get = MagicMock()
-    mock_note_get.exists = False
-    
+    # Mock a document that doesn't exist, so the conditional delete fails
     mock_db.collection.return_value = mock_collection
     mock_collection.document.return_value = mock_document_ref
     mock_document_ref.collection.return_value = mock_notes_collection
     mock_notes_collection.document.return_value = mock_note_doc
-    mock_note_doc.get.return_value = mock_note_get
+    mock_note_doc.delete.side_effect = NotFound("No document to delete")
     
     # Call the method
     result = user.delete_game_note(456)
@@ -666,10 +1052,8 @@ def test_delete_game_note_nonexistent(mock_db):
     mock_collection.document.assert_called_once_with('test123')
     mock_document_ref.collection.assert_called_once_with('game_notes')
     mock_notes_collection.document.assert_called_once_with('456')
-    mock_note_doc.get.assert_called_once()
-    
-    # Verify delete was not called
-    mock_note_doc.delete.assert_not_called()
+    mock_note_doc.get.assert_not_called()
+    mock_note_doc.delete.assert_called_once()
     
     # Verify the method returned False when note doesn't exist
     assert result is False 
\ No newline at end of file
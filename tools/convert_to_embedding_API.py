@@ -1,9 +1,16 @@
 import os
 import json
-import time
 import sys
+import hashlib
+import itertools
+import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import orjson
 import openai
 from dotenv import load_dotenv
+from tenacity import retry, stop_after_attempt, wait_random_exponential
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,7 +24,39 @@ INPUT_FILE = "data/summaries.jsonl"     # Adjust path as needed
 OUTPUT_FILE = "embeddings.jsonl"
 CHECKPOINT_FILE = "checkpoint.txt"
 EMBEDDING_MODEL = "text-embedding-3-large"
-SLEEP_SECONDS = 0.1
+BATCH_SIZE = 128                        # Summaries embedded per API request
+CACHE_FILE = "embedding_cache.sqlite"   # Embeddings by summary hash, reused across runs
+CACHE_LOOKUP_CHUNK = 500                # Stay under SQLite's bound-parameter limit
+EMBED_WORKERS = 4                       # Batch requests in flight at once
+
+def open_cache():
+    """Open (and if needed create) the on-disk embedding cache."""
+    conn = sqlite3.connect(CACHE_FILE)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache ("
+        "hash TEXT NOT NULL, model TEXT NOT NULL, embedding BLOB NOT NULL, "
+        "PRIMARY KEY (hash, model))"
+    )
+    return conn
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def lookup_cached_embeddings(conn, hashes):
+    """Load every cached embedding for the given hashes with a few IN (...) queries."""
+    hashes = list(set(hashes))
+    cached = {}
+    for i in range(0, len(hashes), CACHE_LOOKUP_CHUNK):
+        chunk = hashes[i:i + CACHE_LOOKUP_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT hash, embedding FROM cache WHERE model = ? AND hash IN ({placeholders})",
+            [EMBEDDING_MODEL, *chunk]
+        )
+        for h, blob in rows:
+            cached[h] = np.frombuffer(blob, dtype=np.float32).tolist()
+    print(f"[Cache] Found {len(cached)} of {len(hashes)} embeddings in {CACHE_FILE}.")
+    return cached
 
 def load_checkpoint():
     """Load the last processed index from the checkpoint file."""
@@ -34,84 +73,149 @@ def load_checkpoint():
         return 0
 
 def save_checkpoint(idx):
-    """Save the current index to the checkpoint file."""
+    """Save the current index to the checkpoint file, replacing it atomically."""
     try:
-        with open(CHECKPOINT_FILE, "w") as f:
+        tmp_path = CHECKPOINT_FILE + ".tmp"
+        with open(tmp_path, "w") as f:
             f.write(str(idx))
+        os.replace(tmp_path, CHECKPOINT_FILE)  # A crash can't leave a truncated checkpoint
     except Exception as e:
         print(f"[Checkpoint] Error saving checkpoint: {e}")
 
-def load_input_data():
-    """Load game data from the input JSON Lines file."""
-    data = []
+def sync_output(out_file):
+    """Make sure written embeddings are on disk before a checkpoint says they are."""
+    out_file.flush()
+    os.fsync(out_file.fileno())
+
+def iter_input_data(start_idx=0):
+    """Yield game data lazily from the input JSON Lines file, starting at entry start_idx."""
     try:
-        with open(INPUT_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    entry = json.loads(line)
-                    data.append(entry)
-        print(f"[Data] Loaded {len(data)} entries from {INPUT_FILE}.")
-        return data
+        with open(INPUT_FILE, "rb") as f:
+            entries = (orjson.loads(line) for line in f if line.strip())
+            yield from itertools.islice(entries, start_idx, None)
     except Exception as e:
         print(f"[Data] Error loading input file: {e}")
         sys.exit(1)
 
-def process_entry(entry):
-    text = entry.get("ai_summary", "")
-    if not text:
-        print(f"[Process] Skipping entry {entry.get('appid')} (no ai_summary found).")
-        return None
+@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
+def embed_texts(texts):
+    """Embed a batch of texts in one API call, backing off when rate limited."""
+    response = openai.embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=texts
+    )
+    # The API returns one item per input, tagged with its position
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+def lookup_batch(entries, conn):
+    """
+    Return the batch's summary hashes (None for entries without a summary), the
+    embeddings already cached for them, and the summaries that still need embedding.
+    """
+    hashes = []
+    texts = {}
+    for entry in entries:
+        text = entry.get("ai_summary", "")
+        if not text:
+            print(f"[Process] Skipping entry {entry.get('appid')} (no ai_summary found).")
+            hashes.append(None)
+            continue
+        h = text_hash(text)
+        hashes.append(h)
+        texts[h] = text
 
+    # Only this batch's embeddings are held in memory
+    cached = lookup_cached_embeddings(conn, texts)
+    new_texts = {h: text for h, text in texts.items() if h not in cached}
+    return hashes, cached, new_texts
+
+def embed_new_texts(new_texts):
+    """Embed one batch's uncached summaries. Runs on a worker thread, so it doesn't touch SQLite."""
+    if not new_texts:
+        return {}
     try:
-        response = openai.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=[text]
-        )
-        # Use dot notation to get the embedding
-        embedding = response.data[0].embedding
-        return embedding
+        return dict(zip(new_texts, embed_texts(list(new_texts.values()))))
     except Exception as e:
-        print(f"[Process] Error processing entry {entry.get('appid')}: {e}")
-        return None
+        print(f"[Process] Error embedding batch of {len(new_texts)} summaries: {e}")
+        return {}
+
+def cache_embeddings(conn, embeddings):
+    """Store freshly embedded summaries so later runs can reuse them."""
+    if not embeddings:
+        return
+    conn.executemany(
+        "INSERT OR REPLACE INTO cache (hash, model, embedding) VALUES (?, ?, ?)",
+        [(h, EMBEDDING_MODEL, np.asarray(embedding, dtype=np.float32).tobytes())
+         for h, embedding in embeddings.items()]
+    )
+    conn.commit()
 
 
 def main():
-    data = load_input_data()
-    total_entries = len(data)
     start_idx = load_checkpoint()
 
+    # Count entries for the progress label without parsing them
+    with open(INPUT_FILE, "rb") as f:
+        total_entries = sum(1 for line in f if line.strip())
+    print(f"[Data] Found {total_entries} entries in {INPUT_FILE}.")
+
+    conn = open_cache()
+    executor = ThreadPoolExecutor(max_workers=EMBED_WORKERS)
+
     # Open the output file in append mode
     with open(OUTPUT_FILE, "a", encoding="utf-8") as out_file:
+        next_idx = start_idx
+        entries = iter_input_data(start_idx)
+        # Batches whose embeddings are in flight, oldest first: (entries, hashes, cached, future)
+        pending = deque()
         try:
-            for idx in range(start_idx, total_entries):
-                entry = data[idx]
-                appid = entry.get("appid", "Unknown")
-                print(f"[{idx+1}/{total_entries}] Processing game ID {appid}...")
-
-                embedding = process_entry(entry)
-                if embedding is not None:
-                    output_record = {
-                        "appid": appid,
-                        "name": entry.get("name", ""),
-                        "ai_summary": entry.get("ai_summary", "No summary available"),
-                        "embedding": embedding
-                    }
-
-                    out_file.write(json.dumps(output_record) + "\n")
-                    out_file.flush()
-                    print(f"[{idx+1}] Saved embedding for game ID {appid}.")
-                else:
-                    print(f"[{idx+1}] Failed to process game ID {appid}.")
-
-                # Save progress after each entry
-                save_checkpoint(idx + 1)
-                time.sleep(SLEEP_SECONDS)
+            batch_start = start_idx
+            while True:
+                # Keep up to EMBED_WORKERS requests running while earlier batches are written
+                while len(pending) < EMBED_WORKERS and (batch := list(itertools.islice(entries, BATCH_SIZE))):
+                    hashes, cached, new_texts = lookup_batch(batch, conn)
+                    pending.append((batch, hashes, cached, executor.submit(embed_new_texts, new_texts)))
+                if not pending:
+                    break
+
+                # Batches are written in input order so the checkpoint stays a simple index
+                batch, hashes, cached, future = pending.popleft()
+                print(f"[{batch_start+1}-{batch_start+len(batch)}/{total_entries}] Processing batch...")
+                new_embeddings = future.result()
+                cache_embeddings(conn, new_embeddings)
+                cached.update(new_embeddings)
+
+                for idx, (entry, h) in enumerate(zip(batch, hashes), start=batch_start):
+                    appid = entry.get("appid", "Unknown")
+                    embedding = cached.get(h) if h else None
+                    if embedding is not None:
+                        output_record = {
+                            "appid": appid,
+                            "name": entry.get("name", ""),
+                            "ai_summary": entry.get("ai_summary", "No summary available"),
+                            "embedding": embedding
+                        }
+
+                        out_file.write(json.dumps(output_record) + "\n")
+                    else:
+                        print(f"[{idx+1}] Failed to process game ID {appid}.")
+                    next_idx = idx + 1
+
+                # Save progress after each batch, not after each entry
+                sync_output(out_file)
+                save_checkpoint(next_idx)
+                print(f"[{next_idx}] Saved embeddings up to entry {next_idx}.")
+                batch_start = next_idx
 
         except KeyboardInterrupt:
             print("\n[Interrupt] Process interrupted by user. Saving progress and exiting...")
-            save_checkpoint(idx)  # Save current progress before exiting
+            sync_output(out_file)
+            save_checkpoint(next_idx)  # Save current progress before exiting
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit(0)
+        finally:
+            executor.shutdown(cancel_futures=True)
+            conn.close()
 
 if __name__ == "__main__":
     main()
@@ -1,24 +1,86 @@
 import aiohttp
 import asyncio
+import heapq
 import json
 import time
 import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 import logging
+import logging.handlers
+import queue
 from tqdm.asyncio import tqdm
-import urllib.parse
-import random
+import orjson
+from yarl import URL
 from dataclasses import dataclass
 from enum import Enum
 
+# Steam allows about this many requests per window before answering 429
+RATE_LIMIT_REQUESTS = 200
+RATE_LIMIT_PERIOD = 300  # seconds
+# Requests that may start back to back before the average rate applies
+RATE_LIMIT_BURST = 20
+
+# Connection pool for the shared session; nearly every request goes to store.steampowered.com
+MAX_CONNECTIONS = 32
+MAX_CONNECTIONS_PER_HOST = 16
+
+# GetAppList is read as a stream, picking out each app's id without parsing the whole list
+APP_LIST_URL = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
+APP_ID_RE = re.compile(rb'"appid"\s*:\s*(\d+)')
+APP_LIST_CHUNK_SIZE = 64 * 1024
+
+# Store data sections requested from appdetails: the fields stored per game plus those
+# the app reads from store_data (genres, platforms, is_free, price_overview, movies, screenshots)
+STORE_DETAILS_FILTERS = ("basic,release_date,developers,publishers,genres,platforms,"
+                         "price_overview,movies,screenshots")
+
+# Compressed response bodies; Brotli only when a decoder is installed for aiohttp to use
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Games between progress summaries in the log
+PROGRESS_LOG_EVERY = 50
+
+# Completed games written between flushes of the output and checkpoint files
+FLUSH_EVERY_GAMES = 10
+
+# Review collection state for unfinished games: the resume cursor and the reviews collected
+# so far, one row per review, so each page is a single appending transaction.
+# Finished games are not recorded here but in the checkpoint file, which is written after the
+# output file is flushed (see flush_outputs). That file is what marks a game as stored: no
+# SQLite transaction can cover the JSONL output, and main.py reads the same plain-text list.
+# A game whose partial state was cleared but whose checkpoint wasn't written yet when the run
+# stopped is simply collected again on the next run
+PARTIAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS review_cursors (
+    appid TEXT PRIMARY KEY,
+    next_cursor TEXT NOT NULL,
+    pages_collected INTEGER NOT NULL,
+    last_updated TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS partial_reviews (
+    appid TEXT NOT NULL,
+    recommendationid TEXT NOT NULL,
+    review BLOB NOT NULL,
+    PRIMARY KEY (appid, recommendationid)
+) WITHOUT ROWID;
+"""
+
 class ReviewFilter(Enum):
     """Available filter options for Steam reviews."""
     RECENT = "recent"  # Sort by creation date
     UPDATED = "updated"  # Sort by last update date
     ALL = "all"  # Sort by helpfulness (not recommended for pagination)
 
-@dataclass
+@dataclass(slots=True)
 class ReviewQueryParams:
     """Parameters for Steam review API queries."""
     filter: ReviewFilter = ReviewFilter.RECENT
@@ -30,27 +92,99 @@ class ReviewQueryParams:
     num_per_page: int = 100
     filter_offtopic: int = 1  # Set to 0 to include review bombs
 
+def review_rank(review: Dict[str, Any]) -> Tuple[int, int]:
+    """Sort key for stored reviews: most helpful first, older reviews breaking ties."""
+    return review.get('votes_up', 0), -review.get('timestamp_created', 0)
+
+class TokenBucket:
+    """
+    Lets requests start at `rate` per second on average, with up to `burst` back to back.
+    Waits only when the bucket is empty, and only as long as the next token takes.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self.last is not None:
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 0
+                self.last = loop.time()
+            else:
+                self.tokens -= 1
+
+class CreditSemaphore:
+    """
+    Lets up to `credits` requests run at once, and no more than `credits` start in any
+    `period` seconds: each request takes a credit, refunded `period` seconds after it finishes.
+    A token bucket spreads the starts over the period, so the credits aren't spent in one burst.
+    """
+    def __init__(self, credits: int, period: float, burst: int):
+        self._semaphore = asyncio.Semaphore(credits)
+        self._bucket = TokenBucket(credits / period, burst)
+        self._period = period
+        self._resume_at = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        delay = self._resume_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._bucket.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        asyncio.get_running_loop().call_later(self._period, self._semaphore.release)
+
+    def penalize(self, seconds: float):
+        """Hold back every request for `seconds`, e.g. after the server answers 429."""
+        loop = asyncio.get_running_loop()
+        self._resume_at = max(self._resume_at, loop.time() + seconds)
+
 class SteamDataCollector:
     def __init__(self, output_file: str, checkpoint_file: str):
         # Initialize file paths and create data directory
         self.output_file = output_file
         self.checkpoint_file = checkpoint_file
-        self.partial_data_dir = os.path.join(os.path.dirname(output_file), "partial_data")
-        os.makedirs(self.partial_data_dir, exist_ok=True)
+        self.partial_db_file = os.path.join(os.path.dirname(output_file), "partial_reviews.db")
+        os.makedirs(os.path.dirname(self.partial_db_file) or ".", exist_ok=True)
         
         self.session = None
+        self._rate_sem = None
+        # Partial review state, opened in initialize()
+        self._partial_db = None
+        # Long-lived append handles, opened in initialize(). Only the writer thread touches
+        # them, so writes and flushes run in submission order and never overlap
+        self._output_fh = None
+        self._checkpoint_fh = None
+        self._writer = None
+        # Completed appids not yet in the checkpoint file, written once their games are flushed
+        self._pending_checkpoints = []
+        self._games_since_flush = 0
         self.processed_ids = set()
         self.in_progress_ids = set()
         
-        # Configure logging with more detailed format
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-            handlers=[
-                logging.FileHandler('steam_collection.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Configure logging with more detailed format. Records are only queued on the event
+        # loop; a listener thread formats them and writes the log file and console
+        formatter = logging.Formatter(
+            '%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s')
+        handlers = [logging.FileHandler('steam_collection.log'), logging.StreamHandler()]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        log_queue = queue.SimpleQueue()
+        self._log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+        self._log_listener.start()
+        logging.basicConfig(level=logging.INFO,
+                            handlers=[logging.handlers.QueueHandler(log_queue)])
         self.logger = logging.getLogger(__name__)
         
         # Track statistics with more detail
@@ -60,8 +194,7 @@ class SteamDataCollector:
             'failed_games': 0,
             'total_reviews_collected': 0,
             'rate_limited_count': 0,
-            'start_time': time.time(),
-            'last_request_time': 0
+            'start_time': time.time()
         }
 
     async def initialize(self):
@@ -71,88 +204,165 @@ class SteamDataCollector:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'application/json',
             'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': ACCEPT_ENCODING,
         }
-        self.session = aiohttp.ClientSession(timeout=timeout, headers=headers)
+        # Keep connections (and their TLS sessions) open between review pages and games,
+        # and resolve Steam's hosts once instead of every few seconds
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=600,
+            keepalive_timeout=75
+        )
+        self.session = aiohttp.ClientSession(timeout=timeout, headers=headers, connector=connector)
+        # Paces every request; concurrent games share Steam's rate limit instead of queuing one by one
+        self._rate_sem = CreditSemaphore(RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD, RATE_LIMIT_BURST)
+        self._partial_db = self.open_partial_db()
         self.processed_ids = self.load_processed_ids()
         self.in_progress_ids = self.load_in_progress_ids()
+        self._output_fh = open(self.output_file, 'ab')
+        self._checkpoint_fh = open(self.checkpoint_file, 'a')
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-writer")
         self.logger.info(f"Initialized with {len(self.processed_ids)} completed and "
                         f"{len(self.in_progress_ids)} in-progress games")
 
     def load_processed_ids(self) -> set:
         """Load completely processed app IDs."""
         if os.path.exists(self.checkpoint_file):
-            with open(self.checkpoint_file, 'r') as f:
-                return {line.strip() for line in f}
+            # One read and one split, both in C, rather than a Python step per line
+            with open(self.checkpoint_file, 'rb') as f:
+                return set(f.read().decode('ascii').split())
         return set()
 
+    def open_partial_db(self) -> sqlite3.Connection:
+        """
+        Open the partial review database. Autocommit mode, so each save is its own short
+        transaction; WAL with synchronous=NORMAL commits without an fsync per page.
+        """
+        conn = sqlite3.connect(self.partial_db_file, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(PARTIAL_SCHEMA)
+        return conn
+
     def load_in_progress_ids(self) -> set:
         """Load IDs of games that were started but not completed."""
-        return {filename.replace('reviews_', '').replace('.json', '')
-                for filename in os.listdir(self.partial_data_dir)
-                if filename.startswith('reviews_')}
+        return {appid for (appid,) in self._partial_db.execute("SELECT appid FROM review_cursors")}
 
     def save_checkpoint(self, appid: str, in_progress: bool = False):
-        """Save an appid to the appropriate checkpoint file."""
+        """
+        Record an appid as in progress, or as completed; completed appids reach the
+        checkpoint file with the next flush_outputs, after the game itself.
+        """
         if in_progress:
             self.in_progress_ids.add(appid)
         else:
             self.in_progress_ids.discard(appid)
             self.processed_ids.add(appid)
-            with open(self.checkpoint_file, 'a') as f:
-                f.write(f"{appid}\n")
-                f.flush()
-
-    def get_partial_reviews_path(self, appid: str) -> str:
-        """Get path for partial reviews data file."""
-        return os.path.join(self.partial_data_dir, f"reviews_{appid}.json")
-
-    def load_partial_reviews(self, appid: str) -> Tuple[List[Dict], str, int]:
-        """Load partial review data for a game."""
-        partial_file = self.get_partial_reviews_path(appid)
-        if os.path.exists(partial_file):
-            try:
-                with open(partial_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return (
-                        data.get('reviews', []),
-                        data.get('next_cursor', '*'),
-                        data.get('pages_collected', 0)
-                    )
-            except Exception as e:
-                self.logger.warning(f"Error loading partial reviews for {appid}: {e}")
-        return [], '*', 0
+            self._pending_checkpoints.append(appid)
 
-    def save_partial_reviews(self, appid: str, reviews: List[Dict], 
+    def flush_outputs(self, pending: List[str], sync: bool = False):
+        """
+        Flush written games, then checkpoint the given appids, so the checkpoint
+        never lists a game that isn't on disk yet. With sync, also fsync both files.
+        """
+        self._output_fh.flush()
+        if sync:
+            os.fsync(self._output_fh.fileno())
+        self._checkpoint_fh.writelines(f"{appid}\n" for appid in pending)
+        self._checkpoint_fh.flush()
+        if sync:
+            os.fsync(self._checkpoint_fh.fileno())
+
+    async def write_output(self, line: bytes):
+        """Append one line to the output file on the writer thread."""
+        await asyncio.get_running_loop().run_in_executor(self._writer, self._output_fh.write, line)
+
+    async def maybe_flush_outputs(self):
+        """Flush every FLUSH_EVERY_GAMES games on the writer thread, after the writes queued before it."""
+        self._games_since_flush += 1
+        if self._games_since_flush < FLUSH_EVERY_GAMES:
+            return
+        self._games_since_flush = 0
+        pending, self._pending_checkpoints = self._pending_checkpoints, []
+        await asyncio.get_running_loop().run_in_executor(self._writer, self.flush_outputs, pending)
+
+    def load_partial_reviews(self, appid: str) -> Tuple[Dict[str, Dict], str, int]:
+        """Load partial review data for a game, with reviews keyed by recommendationid."""
+        try:
+            state = self._partial_db.execute(
+                "SELECT next_cursor, pages_collected FROM review_cursors WHERE appid = ?",
+                (appid,)
+            ).fetchone()
+            if state:
+                reviews = {recommendationid: orjson.loads(review)
+                           for recommendationid, review in self._partial_db.execute(
+                               "SELECT recommendationid, review FROM partial_reviews WHERE appid = ?",
+                               (appid,))}
+                return reviews, state[0], state[1]
+        except (sqlite3.Error, orjson.JSONDecodeError) as e:
+            self.logger.warning(f"Error loading partial reviews for {appid}: {e}")
+        return {}, '*', 0
+
+    def save_partial_reviews(self, appid: str, new_reviews: List[Dict],
                            cursor: str, pages: int, error: Optional[str] = None):
-        """Save partial review collection progress."""
-        partial_file = self.get_partial_reviews_path(appid)
-        data = {
-            'reviews': reviews,
-            'next_cursor': cursor,
-            'pages_collected': pages,
-            'last_updated': datetime.now().isoformat()
-        }
-        if error:
-            data['error'] = str(error)
-            
-        with open(partial_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """
+        Save partial review collection progress: insert the reviews collected since the
+        last save and record the cursor to resume from, in one transaction.
+        """
+        with self._partial_db:
+            self._partial_db.execute("BEGIN")
+            if new_reviews:
+                self._partial_db.executemany(
+                    "INSERT OR IGNORE INTO partial_reviews VALUES (?, ?, ?)",
+                    [(appid, review['recommendationid'], orjson.dumps(review))
+                     for review in new_reviews]
+                )
+            self._partial_db.execute(
+                "INSERT OR REPLACE INTO review_cursors VALUES (?, ?, ?, ?, ?)",
+                (appid, cursor, pages, datetime.now().isoformat(),
+                 str(error) if error else None)
+            )
         
         if not error:
             self.save_checkpoint(appid, in_progress=True)
 
-    async def enforce_rate_limit(self):
-        """Ensure we don't exceed Steam's rate limits."""
-        # Maintain at least 1 second between requests
-        now = time.time()
-        if now - self.stats['last_request_time'] < 1:
-            delay = random.uniform(1.0, 2.0)  # Random delay between 1-2 seconds
-            await asyncio.sleep(delay)
-        self.stats['last_request_time'] = time.time()
+    def clear_partial_reviews(self, appid: str):
+        """Drop a game's partial review state once all its reviews are collected."""
+        with self._partial_db:
+            self._partial_db.execute("BEGIN")
+            self._partial_db.execute("DELETE FROM partial_reviews WHERE appid = ?", (appid,))
+            self._partial_db.execute("DELETE FROM review_cursors WHERE appid = ?", (appid,))
 
-    def build_review_url(self, appid: str, params: ReviewQueryParams) -> str:
-        """Build the Steam review API URL with all parameters."""
-        base_url = f"https://store.steampowered.com/appreviews/{appid}"
+    async def fetch_app_ids(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Stream Steam's app list and collect app IDs in list order, stopping
+        as soon as `limit` IDs have been read.
+        """
+        appids = []
+        tail = b""
+        async with self._rate_sem, self.session.get(APP_LIST_URL) as response:
+            async for chunk in response.content.iter_chunked(APP_LIST_CHUNK_SIZE):
+                buf = tail + chunk
+                consumed = 0
+                for match in APP_ID_RE.finditer(buf):
+                    # A number running to the end of the chunk may continue in the next one
+                    if match.end() == len(buf):
+                        break
+                    appids.append(match[1].decode())
+                    consumed = match.end()
+                    if limit and len(appids) >= limit:
+                        return appids
+                # Carry over enough bytes to finish an "appid": key split between chunks
+                tail = buf[max(consumed, len(buf) - 32):]
+        return appids
+
+    def build_review_url(self, appid: str, params: ReviewQueryParams) -> URL:
+        """
+        Build the Steam review API URL with every parameter but the cursor,
+        which changes each page and is added with update_query (yarl encodes it).
+        """
+        base_url = URL(f"https://store.steampowered.com/appreviews/{appid}")
         
         query_params = {
             'json': 1,
@@ -160,7 +370,6 @@ class SteamDataCollector:
             'review_type': params.review_type,
             'purchase_type': params.purchase_type,
             'num_per_page': params.num_per_page,
-            'cursor': urllib.parse.quote(params.cursor),
             'filter_offtopic_activity': params.filter_offtopic
         }
         
@@ -172,9 +381,7 @@ class SteamDataCollector:
         if params.filter == ReviewFilter.ALL and params.day_range > 0:
             query_params['day_range'] = params.day_range
             
-        # Build query string
-        query_string = '&'.join(f"{k}={v}" for k, v in query_params.items())
-        return f"{base_url}?{query_string}"
+        return base_url.with_query(query_params)
 
     async def get_reviews(self, appid: str, max_reviews: int = 500) -> List[Dict]:
         """
@@ -192,10 +399,10 @@ class SteamDataCollector:
         start_time = time.time()
         
         if reviews:
-            self.logger.info(f"Resuming review collection for {appid} from page {review_pages + 1} "
-                           f"(found {len(reviews)} existing reviews)")
+            self.logger.debug("Resuming review collection for %s from page %d "
+                              "(found %d existing reviews)", appid, review_pages + 1, len(reviews))
         else:
-            self.logger.info(f"Starting fresh review collection for {appid}")
+            self.logger.debug("Starting fresh review collection for %s", appid)
 
         # Initialize query parameters
         params = ReviewQueryParams(
@@ -204,30 +411,37 @@ class SteamDataCollector:
             cursor=cursor
         )
         
+        base_url = self.build_review_url(appid, params)
+        first_page = review_pages + 1
+        
         try:
             while len(reviews) < max_reviews:
                 review_pages += 1
                 page_start = time.time()
                 
-                # Enforce rate limiting
-                await self.enforce_rate_limit()
-                
-                url = self.build_review_url(appid, params)
-                self.logger.debug(f"Fetching reviews from: {url}")
+                url = base_url.update_query(cursor=params.cursor)
+                self.logger.debug("Fetching reviews from: %s", url)
                 
                 try:
-                    async with self.session.get(url) as response:
+                    async with self._rate_sem, self.session.get(url) as response:
                         if response.status == 429:  # Rate limited
                             wait_time = int(response.headers.get('Retry-After', 30))
                             self.logger.warning(f"Rate limited, waiting {wait_time}s...")
                             self.stats['rate_limited_count'] += 1
                             # Save progress before waiting
-                            self.save_partial_reviews(appid, reviews, params.cursor, review_pages)
-                            await asyncio.sleep(wait_time)
+                            self.save_partial_reviews(appid, [], params.cursor, review_pages)
+                            # Hold back every request, not just this game's, until the limit resets
+                            self._rate_sem.penalize(wait_time)
                             continue
                             
                         response.raise_for_status()
-                        data = await response.json()
+                        body = await response.read()
+                        if review_pages == first_page:
+                            self.logger.debug("Reviews for %s sent with Content-Encoding %s: "
+                                              "%s bytes for %d", appid,
+                                              response.headers.get('Content-Encoding', 'identity'),
+                                              response.content_length, len(body))
+                        data = orjson.loads(body)
                     
                     if not data.get('success') or 'reviews' not in data:
                         self.logger.warning(f"No more reviews available for {appid}")
@@ -237,103 +451,107 @@ class SteamDataCollector:
                     if not new_reviews:  # Empty page means we've reached the end
                         break
                         
-                    reviews.extend(new_reviews)
-                    
+                    # Pages can overlap near the end of the feed; keep the first copy of each review
+                    added = [review for review in new_reviews
+                             if reviews.setdefault(review['recommendationid'], review) is review]
+
+                    # Enough reviews collected; the partial state is cleared below
+                    if len(reviews) >= max_reviews:
+                        self.logger.debug("Reached max_reviews=%d for %s", max_reviews, appid)
+                        break
+
                     # Update cursor for next page
                     params.cursor = data.get('cursor', '')
                     if not params.cursor or params.cursor == '*':
-                        self.logger.info(f"No more pages available for {appid}")
+                        self.logger.debug("No more pages available for %s", appid)
                         break
                     
                     # Save progress after each page
-                    self.save_partial_reviews(appid, reviews, params.cursor, review_pages)
+                    self.save_partial_reviews(appid, added, params.cursor, review_pages)
                     
-                    page_time = time.time() - page_start
-                    self.logger.info(f"Page {review_pages} completed in {page_time:.2f}s "
-                                   f"(got {len(new_reviews)} reviews)")
+                    self.logger.debug("Page %d completed in %.2fs (got %d reviews)",
+                                      review_pages, time.time() - page_start, len(new_reviews))
                     
                     # Check query summary for total reviews
                     query_summary = data.get('query_summary', {})
                     total_reviews = query_summary.get('total_reviews', 0)
                     if len(reviews) >= total_reviews:
-                        self.logger.info(f"Collected all available reviews for {appid}")
+                        self.logger.debug("Collected all available reviews for %s", appid)
                         break
                     
                 except aiohttp.ClientError as e:
                     self.logger.error(f"HTTP error for {appid} on page {review_pages}: {e}")
                     # Save progress and retry after delay
-                    self.save_partial_reviews(appid, reviews, params.cursor, review_pages,
+                    self.save_partial_reviews(appid, [], params.cursor, review_pages,
                                            error=str(e))
                     await asyncio.sleep(5)
                     continue
-                
-                # Small delay between pages
-                await asyncio.sleep(random.uniform(1.0, 2.0))
             
-            # Successfully got all reviews - clean up partial file
-            partial_file = self.get_partial_reviews_path(appid)
-            if os.path.exists(partial_file):
-                os.remove(partial_file)
+            # Successfully got all reviews - clean up partial state
+            self.clear_partial_reviews(appid)
             
             total_time = time.time() - start_time
-            self.logger.info(f"Completed review collection for {appid} "
-                           f"({len(reviews)} reviews in {total_time:.2f}s)")
+            self.logger.debug("Completed review collection for %s (%d reviews in %.2fs)",
+                              appid, len(reviews), total_time)
             
-            # Sort reviews by helpfulness for storage
-            return sorted(reviews, 
-                        key=lambda x: (x.get('votes_up', 0), 
-                                     -x.get('timestamp_created', 0)), 
-                        reverse=True)[:max_reviews]
+            # Keep the most helpful reviews for storage, most helpful first
+            return heapq.nlargest(max_reviews, reviews.values(), key=review_rank)
             
         except Exception as e:
             self.logger.error(f"Error collecting reviews for {appid}: {e}")
             # Save progress on error
             if reviews:
-                self.save_partial_reviews(appid, reviews, params.cursor, review_pages, 
+                self.save_partial_reviews(appid, [], params.cursor, review_pages, 
                                        error=str(e))
-            return reviews
+            return list(reviews.values())
 
     async def process_game(self, appid: str) -> bool:
         """Process a single game with resume support."""
         try:
             # Skip if fully processed
             if appid in self.processed_ids:
-                self.logger.debug(f"Skipping completed game {appid}")
+                self.logger.debug("Skipping completed game %s", appid)
                 return False
                 
             # Check if we have partial progress
             has_partial = appid in self.in_progress_ids
             if has_partial:
-                self.logger.info(f"Resuming partially processed game {appid}")
+                self.logger.debug("Resuming partially processed game %s", appid)
             
             # Get store data
             start_time = time.time()
-            self.logger.info(f"Fetching store data for {appid}...")
+            self.logger.debug("Fetching store data for %s...", appid)
             
-            await self.enforce_rate_limit()
-            
-            store_url = f"https://store.steampowered.com/api/appdetails?appids={appid}"
-            async with self.session.get(store_url) as response:
+            store_url = (f"https://store.steampowered.com/api/appdetails?appids={appid}"
+                         f"&filters={STORE_DETAILS_FILTERS}")
+            async with self._rate_sem, self.session.get(store_url) as response:
                 if response.status != 200:
                     self.logger.warning(f"No store data for {appid}")
                     return False
                     
-                data = await response.json()
-                if not data or not data.get(str(appid), {}).get('success'):
+                # appids are kept as the strings read from the app list, matching the response keys
+                app_details = (orjson.loads(await response.read()) or {}).get(appid)
+                if not app_details or not app_details.get('success'):
                     return False
                 
-                store_data = data[str(appid)]['data']
+                store_data = app_details['data']
                 if store_data.get('type') != 'game':
-                    self.logger.info(f"Skipping {appid}: not a game")
+                    self.logger.debug("Skipping %s: not a game", appid)
                     return False
 
             game_name = store_data.get('name', 'Unknown')
-            self.logger.info(f"Got store data for {game_name} ({time.time() - start_time:.2f}s)")
+            self.logger.debug("Got store data for %s (%.2fs)", game_name, time.time() - start_time)
 
             # Get reviews
-            self.logger.info(f"Fetching reviews for {game_name}...")
+            self.logger.debug("Fetching reviews for %s...", game_name)
             reviews = await self.get_reviews(appid)
 
+            # Tally both review counts in one pass
+            positive_count = steam_purchase_count = 0
+            for review in reviews:
+                positive_count += review.get('voted_up', False)
+                steam_purchase_count += review.get('steam_purchase', False)
+
             # Save complete game data
             game_info = {
                 'appid': appid,
@@ -350,19 +568,19 @@ class SteamDataCollector:
                 'collection_timestamp': datetime.now().isoformat(),
                 'review_stats': {
                     'total_collected': len(reviews),
-                    'positive_count': sum(1 for r in reviews if r.get('voted_up', False)),
-                    'has_steam_purchase': sum(1 for r in reviews if r.get('steam_purchase', False))
+                    'positive_count': positive_count,
+                    'has_steam_purchase': steam_purchase_count
                 }
             }
 
-            # Write to output file with proper encoding and formatting
-            with open(self.output_file, 'a', encoding='utf-8') as f:
-                json.dump(game_info, f, ensure_ascii=False, indent=None)
-                f.write('\n')
-                f.flush()  # Ensure immediate write to disk
+            # Append one JSON line to the output file; it reaches disk with the next flush.
+            # Serialized inline: orjson holds the GIL while encoding, so a worker thread
+            # wouldn't let the event loop run meanwhile, and it takes about a millisecond
+            await self.write_output(orjson.dumps(game_info) + b"\n")
 
             # Mark as fully completed
             self.save_checkpoint(appid, in_progress=False)
+            await self.maybe_flush_outputs()
             self.stats['successful_games'] += 1
             self.stats['total_reviews_collected'] += len(reviews)
 
@@ -382,126 +600,83 @@ class SteamDataCollector:
             self.stats['failed_games'] += 1
             return False
 
-    async def process_batch(self, appids: List[str], batch_size: int = 5) -> Tuple[int, int]:
-        """
-        Process a batch of games with progress tracking and rate limiting.
+    async def _worker(self, queue: asyncio.Queue, progress: tqdm, total: int):
+        """Process games from the queue until cancelled; the credit semaphore does the pacing."""
+        while True:
+            appid = await queue.get()
+            try:
+                await self.process_game(appid)
+            except Exception as e:
+                self.logger.error(f"Error processing {appid}: {e}")
+            finally:
+                self.stats['total_processed'] += 1
+                progress.update(1)
+                if self.stats['total_processed'] % PROGRESS_LOG_EVERY == 0:
+                    self.log_progress(total)
+                queue.task_done()
+
+    def log_progress(self, total: int):
+        """Log a progress summary for a run over `total` apps."""
+        elapsed = time.time() - self.stats['start_time']
+        progress = (self.stats['total_processed'] / total) * 100
+        speed = self.stats['total_processed'] / elapsed if elapsed > 0 else 0
         
-        Args:
-            appids: List of Steam app IDs to process
-            batch_size: Number of games to process concurrently
-            
-        Returns:
-            Tuple of (successful_count, failed_count)
-        """
-        tasks = []
-        total = 0
-        batch_start = time.time()
+        self.logger.info("\nProgress Summary:")
+        self.logger.info(f"- Progress: {progress:.1f}% ({self.stats['total_processed']}/{total})")
+        self.logger.info(f"- Successful games: {self.stats['successful_games']}")
+        self.logger.info(f"- Failed games: {self.stats['failed_games']}")
+        self.logger.info(f"- Reviews collected: {self.stats['total_reviews_collected']}")
+        self.logger.info(f"- Processing speed: {speed:.2f} games/second")
+        self.logger.info(f"- Runtime: {elapsed/3600:.1f} hours")
+        self.logger.info(f"- Rate limit hits: {self.stats['rate_limited_count']}")
         
-        for i in range(0, len(appids), batch_size):
-            batch = appids[i:i + batch_size]
-            self.logger.info(f"\nProcessing batch of {len(batch)} games...")
-            
-            # Process games concurrently within batch size limit
-            results = await asyncio.gather(
-                *[self.process_game(appid) for appid in batch],
-                return_exceptions=True
-            )
-            
-            # Count successes and handle any exceptions
-            successes = sum(1 for r in results if isinstance(r, bool) and r)
-            failures = sum(1 for r in results if isinstance(r, Exception) or 
-                         (isinstance(r, bool) and not r))
-            
-            tasks.extend([r for r in results if isinstance(r, bool)])
-            total += len(batch)
-            
-            # Calculate and log statistics
-            elapsed = time.time() - batch_start
-            speed = total / elapsed if elapsed > 0 else 0
-            
-            self.logger.info("\nBatch Statistics:")
-            self.logger.info(f"- Processed: {len(batch)}")
-            self.logger.info(f"- Speed: {speed:.1f} games/second")
-            self.logger.info(f"- Successes: {successes}")
-            self.logger.info(f"- Failures: {failures}")
-            
-            # Log any exceptions that occurred
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    self.logger.error(f"Error processing {batch[i]}: {result}")
-            
-            # Rate limiting between batches
-            await asyncio.sleep(random.uniform(2.0, 3.0))
-            
-        return (
-            sum(1 for t in tasks if isinstance(t, bool) and t),
-            sum(1 for t in tasks if isinstance(t, bool) and not t)
-        )
+        if speed > 0:
+            remaining = total - self.stats['total_processed']
+            eta = remaining / speed
+            self.logger.info(f"- Estimated time remaining: {eta/3600:.1f} hours")
 
-    async def run(self, limit: Optional[int] = None):
+    async def run(self, limit: Optional[int] = None, batch_size: int = 5):
         """
         Main execution with comprehensive progress tracking and error handling.
         
         Args:
             limit: Optional limit on number of games to process
+            batch_size: Games to process concurrently; twice as many workers pull from
+                the queue, so a slow game never holds the others up
         """
         try:
             await self.initialize()
             
             # Get all Steam apps
             self.logger.info("Fetching list of Steam apps...")
-            async with self.session.get(
-                "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
-            ) as response:
-                data = await response.json()
-                apps = data['applist']['apps']
-            
-            total_apps = len(apps)
-            self.logger.info(f"Found {total_apps} Steam apps")
+            appids = await self.fetch_app_ids(limit)
+            self.logger.info(f"Found {len(appids)} Steam apps")
 
             if limit:
-                apps = apps[:limit]
                 self.logger.info(f"Limited to first {limit} apps")
                 
             # Process games
-            appids = [str(app['appid']) for app in apps]
-            batches = (len(appids) + 49) // 50  # Calculate total number of batches
+            worker_count = batch_size * 2
             
             self.logger.info(f"\nStarting collection:")
             self.logger.info(f"- Apps to process: {len(appids)}")
-            self.logger.info(f"- Total batches: {batches}")
+            self.logger.info(f"- Workers: {worker_count}")
             self.logger.info(f"- Already completed: {len(self.processed_ids)}")
             self.logger.info(f"- In progress: {len(self.in_progress_ids)}")
             
-            # Process in batches with progress bar
-            async for batch in tqdm(
-                [appids[i:i+50] for i in range(0, len(appids), 50)],
-                desc="Processing games",
-                total=batches,
-                unit="batch"
-            ):
-                successes, failures = await self.process_batch(batch)
-                self.stats['total_processed'] += len(batch)
-                
-                # Show detailed progress
-                elapsed = time.time() - self.stats['start_time']
-                progress = (self.stats['total_processed'] / len(appids)) * 100
-                speed = self.stats['total_processed'] / elapsed if elapsed > 0 else 0
-                
-                self.logger.info("\nProgress Summary:")
-                self.logger.info(f"- Progress: {progress:.1f}% ({self.stats['total_processed']}/{len(appids)})")
-                self.logger.info(f"- Successful games: {self.stats['successful_games']}")
-                self.logger.info(f"- Failed games: {self.stats['failed_games']}")
-                self.logger.info(f"- Reviews collected: {self.stats['total_reviews_collected']}")
-                self.logger.info(f"- Processing speed: {speed:.2f} games/second")
-                self.logger.info(f"- Runtime: {elapsed/3600:.1f} hours")
-                self.logger.info(f"- Rate limit hits: {self.stats['rate_limited_count']}")
-                
-                if speed > 0:
-                    remaining = len(appids) - self.stats['total_processed']
-                    eta = remaining / speed
-                    self.logger.info(f"- Estimated time remaining: {eta/3600:.1f} hours")
-
+            queue = asyncio.Queue()
+            for appid in appids:
+                queue.put_nowait(appid)
+            with tqdm(total=len(appids), desc="Processing games", unit="game") as progress:
+                workers = [asyncio.create_task(self._worker(queue, progress, len(appids)))
+                           for _ in range(worker_count)]
+                try:
+                    await queue.join()
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+            
             # Final summary
             final_time = time.time() - self.stats['start_time']
             self.logger.info("\nCollection Complete!")
@@ -521,12 +696,30 @@ class SteamDataCollector:
             raise
         finally:
             await self.close()
-            self.logger.info("Resources cleaned up")
 
     async def close(self):
         """Clean up resources."""
+        if self._writer:
+            # Let writes and flushes queued by cancelled workers finish before the final flush
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._output_fh:
+            pending, self._pending_checkpoints = self._pending_checkpoints, []
+            self.flush_outputs(pending, sync=True)
+            self._output_fh.close()
+            self._checkpoint_fh.close()
+            self._output_fh = self._checkpoint_fh = None
         if self.session:
+            # The session owns its connector, so this closes the pooled connections too
             await self.session.close()
+        if self._partial_db:
+            self._partial_db.close()
+            self._partial_db = None
+        self.logger.info("Resources cleaned up")
+        # Write out any queued log records; nothing logged after this reaches the handlers
+        if self._log_listener:
+            self._log_listener.stop()
+            self._log_listener = None
 
 async def main():
     """Entry point with command line argument handling."""
@@ -549,7 +742,7 @@ async def main():
     collector = SteamDataCollector(args.output, args.checkpoint)
     
     try:
-        await collector.run(limit=args.limit)
+        await collector.run(limit=args.limit, batch_size=args.batch_size)
     except KeyboardInterrupt:
         print("\nDetected interrupt, cleaning up...")
         await collector.close()